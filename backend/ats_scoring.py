@@ -0,0 +1,335 @@
+"""Deterministic local ATS keyword scoring.
+
+Job descriptions and resumes are tokenised into 1-3 word n-grams. Job
+description terms are weighted with BM25 against a bundled reference corpus
+of job adverts (data/ats_corpus.json), so boilerplate that every advert
+contains ("communication skills", "team") counts for little while specific
+tools and domains count for a lot. The score is the weighted share of those
+keywords the resume covers, blended with a section completeness check.
+Everything here is pure Python and runs in a few milliseconds.
+"""
+import json
+import math
+import re
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Tuple
+
+CORPUS_PATH = Path(__file__).parent / "data" / "ats_corpus.json"
+
+MAX_KEYWORDS = 25
+MAX_NGRAM = 3
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+TOKEN_RE = re.compile(r"[A-Za-z0-9][A-Za-z0-9+#]*(?:[.\-/][A-Za-z0-9+#]+)*")
+# Punctuation between tokens that ends a phrase: list separators, clause and sentence ends, bullets, lines
+SEGMENT_BREAK_RE = re.compile(r"[,;:.!?\n•|/()]")
+
+STOPWORDS = frozenset("""
+a about above across after all also an and any are as at be been being both but by can could do does
+during each either etc for from had has have having he her here his how i if in into is it its just may
+me more most must my no not of on or other our ours out over own per plus same she should so some such
+than that the their them then there these they this those through to too under until up us very via
+was we were what when where which while who whom why will with within without would you your yours
+ability able across based candidate candidates company day demonstrable desirable environment essential
+excellent experience experienced familiarity good great help highly ideal ideally including join junior
+key knowledge looking new opportunity plus preferred proven required requirements responsibilities role
+running seeking senior strong successful understanding using work working years year
+""".split())
+
+# Words job adverts use to label their sections. A keyword made only of
+# these ("Skills", "Key Responsibilities") names a heading, not a requirement
+SECTION_WORDS = frozenset("""
+about application apply benefits bonus competencies description duties essentials job key location must
+nice offer overview position profile qualifications qualification requirements responsibilities salary
+skills skill summary technical title tools what
+""".split())
+
+# Common action verbs for bullet points, used by the readability check
+ACTION_VERBS = frozenset("""
+accelerated achieved analysed analyzed architected automated boosted built championed coached collaborated
+created cut decreased defined delivered designed developed devised directed drove eliminated enabled
+engineered established expanded generated grew headed implemented improved increased initiated introduced
+launched led managed mentored migrated modernised negotiated optimised optimized orchestrated overhauled
+oversaw pioneered planned produced raised reduced redesigned refactored resolved restructured revamped
+saved scaled secured shipped simplified spearheaded streamlined supervised trained transformed won wrote
+""".split())
+
+WEAK_PHRASES = frozenset(["responsible", "helped", "worked", "assisted", "various", "duties"])
+
+QUANTIFIED_RE = re.compile(r"\d|%|£|\$|€")
+
+
+def stem(word: str) -> str:
+    """Crude suffix stripping so "mentor"/"mentored" and "service"/"services" compare equal.
+
+    Only ever used for matching; keywords are reported in their original form.
+    """
+    if len(word) < 5 or not word.isalpha():
+        return word
+    for suffix in ("ing", "ed", "s"):
+        if word.endswith(suffix) and not word.endswith("ss"):
+            word = word[:-len(suffix)]
+            break
+    if word.endswith("e") and len(word) > 4:
+        word = word[:-1]
+    return word
+
+
+SECTION_TERMS = frozenset(stem(word) for word in SECTION_WORDS)
+
+
+def segments(text: str) -> List[List[Tuple[str, str]]]:
+    """Tokens of ``text`` split into runs that no phrase crosses, so "Docker,
+    Kubernetes" is two terms rather than the phrase "docker kubernetes".
+
+    Punctuation inside a token ("node.js", "CI/CD") does not split it.
+    """
+    runs: List[List[Tuple[str, str]]] = [[]]
+    end = 0
+    for match in TOKEN_RE.finditer(text):
+        if runs[-1] and SEGMENT_BREAK_RE.search(text, end, match.start()):
+            runs.append([])
+        surface = match.group().rstrip(".-/")
+        runs[-1].append((surface.lower(), surface))
+        end = match.end()
+    return [run for run in runs if run]
+
+
+def tokenize(text: str) -> List[Tuple[str, str]]:
+    """(normalised, surface) pairs for each token in ``text``"""
+    return [token for run in segments(text) for token in run]
+
+
+def ngrams(tokens: List[Tuple[str, str]], max_n: int = MAX_NGRAM) -> Iterable[Tuple[str, str, int]]:
+    """(stemmed term, surface, n) for every n-gram of one run of tokens free of stopwords and bare numbers"""
+    keys = [None if t in STOPWORDS or t.isdigit() else stem(t) for t, _ in tokens]
+    for n in range(1, max_n + 1):
+        for i in range(len(tokens) - n + 1):
+            window = keys[i:i + n]
+            if None in window or (n == 1 and len(window[0]) < 2):
+                continue
+            yield " ".join(window), " ".join(t[1] for t in tokens[i:i + n]), n
+
+
+def text_ngrams(text: str, max_n: int = MAX_NGRAM) -> Iterable[Tuple[str, str, int]]:
+    """``ngrams`` of each segment of ``text``"""
+    for run in segments(text):
+        yield from ngrams(run, max_n)
+
+
+class Corpus:
+    """Document frequencies over the bundled job advert corpus"""
+
+    def __init__(self, documents: List[str]):
+        self.size = len(documents)
+        self.df: Counter = Counter()
+        lengths = []
+        for document in documents:
+            runs = segments(document)
+            lengths.append(sum(len(run) for run in runs))
+            self.df.update({term for run in runs for term, _, _ in ngrams(run)})
+        self.avg_length = sum(lengths) / len(lengths) if lengths else 1.0
+
+    def idf(self, term: str) -> float:
+        df = self.df.get(term, 0)
+        return math.log(1 + (self.size - df + 0.5) / (df + 0.5))
+
+    @classmethod
+    def load(cls, path: Path = CORPUS_PATH) -> "Corpus":
+        with open(path) as f:
+            return cls(json.load(f)["documents"])
+
+
+CORPUS = Corpus.load()
+
+
+@dataclass
+class Keyword:
+    term: str
+    surface: str
+    weight: float
+    # Words of a phrase left out of the keyword list because the phrase covers them
+    parts: List["Keyword"] = field(default_factory=list)
+
+
+def extract_keywords(job_description: str, corpus: Corpus = CORPUS, limit: int = MAX_KEYWORDS) -> List[Keyword]:
+    """Top BM25-weighted terms of a job description"""
+    runs = segments(job_description)
+    tf: Counter = Counter()
+    surfaces: Dict[str, str] = {}
+    sizes: Dict[str, int] = {}
+    for run in runs:
+        for term, surface, n in ngrams(run):
+            tf[term] += 1
+            surfaces.setdefault(term, surface)
+            sizes[term] = n
+
+    length_norm = 1 - BM25_B + BM25_B * sum(len(run) for run in runs) / corpus.avg_length
+    candidates = []
+    for term, count in tf.items():
+        if all(word in SECTION_TERMS for word in term.split()):
+            continue
+        n = sizes[term]
+        # Phrases only count when repeated or known from the corpus, which
+        # keeps accidental word pairs ("design build") out of the list
+        if n > 1 and count < 2 and corpus.df.get(term, 0) == 0:
+            continue
+        saturation = count * (BM25_K1 + 1) / (count + BM25_K1 * length_norm)
+        weight = corpus.idf(term) * saturation * (1 + 0.25 * (n - 1))
+        candidates.append(Keyword(term, surfaces[term], weight))
+    candidates.sort(key=lambda k: (-k.weight, k.term))
+
+    selected: List[Keyword] = []
+    for keyword in candidates:
+        # Fold words into a selected phrase that uses them as often; they are
+        # only checked on their own when the phrase itself is not found
+        if " " not in keyword.term:
+            phrase = next((
+                chosen for chosen in selected
+                if keyword.term in chosen.term.split() and tf[chosen.term] >= tf[keyword.term]
+            ), None)
+            if phrase is not None:
+                phrase.parts.append(keyword)
+                continue
+        selected.append(keyword)
+        if len(selected) >= limit:
+            break
+    return selected
+
+
+def match_keywords(keywords: List[Keyword], present: Callable[[str], bool]) -> Tuple[List[str], List[str], float, float]:
+    """(matched, missing, matched weight, total weight) of keywords, given a term lookup.
+
+    A phrase that is not present is replaced by the words folded into it,
+    so having both "Docker" and "Kubernetes" still counts for them.
+    """
+    matched, missing = [], []
+    matched_weight = total_weight = 0.0
+    for keyword in keywords:
+        checks = keyword.parts if keyword.parts and not present(keyword.term) else [keyword]
+        for check in checks:
+            total_weight += check.weight
+            if present(check.term):
+                matched.append(check.surface)
+                matched_weight += check.weight
+            else:
+                missing.append(check.surface)
+    return matched, missing, matched_weight, total_weight
+
+
+def resume_text(resume: dict) -> str:
+    """Flatten the searchable parts of a ResumeData dict into one string"""
+    parts = [resume.get("summary", ""), ", ".join(resume.get("skills", []))]
+    for exp in resume.get("experience", []):
+        parts.append(f"{exp.get('title', '')} {exp.get('company', '')}")
+        parts.extend(exp.get("bullets", []))
+    for edu in resume.get("education", []):
+        parts.append(f"{edu.get('degree', '')} {edu.get('school', '')}")
+    for cert in resume.get("certifications", []):
+        parts.append(f"{cert.get('name', '')} {cert.get('issuer', '')}")
+    for lang in resume.get("languages", []):
+        parts.append(lang.get("language", ""))
+    return "\n".join(part for part in parts if part)
+
+
+@dataclass
+class LocalAnalysis:
+    score: int
+    matched: List[str]
+    missing: List[str]
+    overused: List[str]
+    readability_score: int
+    readability_suggestions: List[str]
+    suggestions: List[str]
+    impact_opportunities: List[Tuple[str, str]] = field(default_factory=list)
+
+
+def _section_score(resume: dict) -> Tuple[float, List[str]]:
+    checks = [
+        (0.25, bool(resume.get("summary", "").strip()), "Add a professional summary tailored to the role"),
+        (0.35, any(exp.get("bullets") for exp in resume.get("experience", [])), "Describe your experience with achievement-focused bullet points"),
+        (0.25, bool(resume.get("skills")), "Add a skills section listing the tools and technologies you use"),
+        (0.15, bool(resume.get("education")), "Include your education"),
+    ]
+    score = sum(weight for weight, present, _ in checks if present)
+    return score, [tip for _, present, tip in checks if not present]
+
+
+def _overused(tokens: List[Tuple[str, str]]) -> List[str]:
+    surfaces: Dict[str, str] = {}
+    words = []
+    for term, _ in tokens:
+        if term in STOPWORDS or len(term) <= 2 or term.isdigit():
+            continue
+        key = stem(term)
+        surfaces.setdefault(key, term)
+        words.append(key)
+    if not words:
+        return []
+    counts = Counter(words)
+    weak = {stem(word) for word in WEAK_PHRASES}
+    overused = [
+        word for word, count in counts.items()
+        if (count >= 4 and count / len(words) >= 0.02) or (word in weak and count >= 3)
+    ]
+    overused.sort(key=lambda w: (-counts[w], w))
+    return [surfaces[word] for word in overused[:5]]
+
+
+def _readability(resume: dict) -> Tuple[int, List[str], List[Tuple[str, str]]]:
+    bullets = [b.strip() for exp in resume.get("experience", []) for b in exp.get("bullets", []) if b.strip()]
+    if not bullets:
+        return 60, ["Add bullet points under each role so recruiters can scan your achievements"], []
+
+    lengths = [len(b.split()) for b in bullets]
+    good_length = sum(1 for n in lengths if 8 <= n <= 30) / len(bullets)
+    action = sum(1 for b in bullets if b.split()[0].lower().strip(",.") in ACTION_VERBS) / len(bullets)
+    quantified = sum(1 for b in bullets if QUANTIFIED_RE.search(b)) / len(bullets)
+    score = round(100 * (0.4 * good_length + 0.3 * action + 0.3 * quantified))
+
+    suggestions = []
+    if action < 0.6:
+        suggestions.append("Start more bullet points with strong action verbs (e.g. Led, Delivered, Reduced)")
+    if quantified < 0.5:
+        suggestions.append("Quantify more achievements with numbers, percentages or amounts")
+    if sum(lengths) / len(lengths) > 30:
+        suggestions.append("Shorten long bullet points to one or two lines")
+    elif good_length < 0.5:
+        suggestions.append("Expand very short bullet points to show the outcome of your work")
+
+    impact = [
+        (b, "Quantify the outcome of this achievement (e.g. time saved, % improvement, revenue or team size)")
+        for b in bullets if not QUANTIFIED_RE.search(b)
+    ][:3]
+    return score, suggestions, impact
+
+
+def analyze(resume: dict, job_description: str, corpus: Corpus = CORPUS) -> LocalAnalysis:
+    """Score a ResumeData dict against a job description"""
+    keywords = extract_keywords(job_description, corpus)
+    runs = segments(resume_text(resume))
+    tokens = [token for run in runs for token in run]
+    terms = {term for run in runs for term, _, _ in ngrams(run)}
+    matched, missing, matched_weight, total_weight = match_keywords(keywords, terms.__contains__)
+
+    section, section_tips = _section_score(resume)
+    coverage = matched_weight / total_weight if total_weight else section
+    score = round(100 * (0.75 * coverage + 0.25 * section))
+
+    readability_score, readability_suggestions, impact = _readability(resume)
+    suggestions = [f"Add \"{term}\" to your skills or experience if it reflects your background" for term in missing[:5]]
+    suggestions.extend(section_tips)
+
+    return LocalAnalysis(
+        score=score,
+        matched=matched,
+        missing=missing,
+        overused=_overused(tokens),
+        readability_score=readability_score,
+        readability_suggestions=readability_suggestions,
+        suggestions=suggestions,
+        impact_opportunities=impact,
+    )
@@ -0,0 +1,125 @@
+"""Batch resume parsing behind /api/parse-resume/batch.
+
+``collect`` spools every file of a batch, unpacking ZIPs, within the batch
+limits. ``ndjson_results`` parses the files concurrently and streams one
+NDJSON line per file as it finishes, then a summary line. Spooled files
+are removed as soon as a limit is hit, the stream ends or the client goes
+away.
+"""
+import asyncio
+import json
+import logging
+import time
+import zipfile
+from typing import AsyncIterator, Awaitable, Callable, List, Optional, Tuple
+
+from fastapi import HTTPException, UploadFile
+
+import uploads
+from uploads import SpooledUpload
+
+logger = logging.getLogger(__name__)
+
+# (filename, spooled file), with None for files over the per-file limit
+Entry = Tuple[str, Optional[SpooledUpload]]
+
+
+def remove(entries: List[Entry]):
+    for _, upload in entries:
+        if upload is not None:
+            upload.remove()
+
+
+async def collect(files: List[UploadFile], spool_file: Callable[[UploadFile], Awaitable[SpooledUpload]],
+                  max_files: int, max_file_bytes: int, max_unpacked_bytes: int,
+                  directory: Optional[str] = None) -> List[Entry]:
+    """Spool uploads and the contents of uploaded ZIPs, in order.
+
+    Raises 413 past ``max_files`` files or ``max_unpacked_bytes`` unpacked,
+    400 for a corrupt ZIP or an empty batch, removing whatever was spooled.
+    """
+    entries: List[Entry] = []
+    too_many = HTTPException(status_code=413, detail=f"At most {max_files} files per batch")
+    unpacked_bytes = 0
+    try:
+        for file in files:
+            if len(entries) >= max_files:
+                raise too_many
+            upload = await spool_file(file)
+            if upload.kind == "zip":
+                try:
+                    # Entry count and unpacked size are checked before any entry is written
+                    unpacked = await asyncio.to_thread(
+                        uploads.unpack_zip, upload, max_file_bytes, directory,
+                        max_files - len(entries), max_unpacked_bytes - unpacked_bytes
+                    )
+                    entries.extend(unpacked)
+                    unpacked_bytes += sum(entry.size for _, entry in unpacked if entry is not None)
+                except zipfile.BadZipFile:
+                    raise HTTPException(status_code=400, detail="Invalid ZIP archive")
+                finally:
+                    upload.remove()
+            elif upload.size > max_file_bytes:
+                upload.remove()
+                entries.append((file.filename or '', None))
+            else:
+                entries.append((file.filename or '', upload))
+        if not entries:
+            raise HTTPException(status_code=400, detail="No files provided")
+    except BaseException:
+        remove(entries)
+        raise
+    return entries
+
+
+async def ndjson_results(entries: List[Entry], parse: Callable[[SpooledUpload, dict], Awaitable[dict]],
+                         concurrency: int) -> AsyncIterator[str]:
+    """NDJSON results in completion order, then a "done" summary.
+
+    ``parse`` returns the resume data for one file and may add timings.
+    Each line carries the file's index in the batch; a file that fails gets
+    an error line without affecting the others.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def parse_one(index: int, filename: str, upload: Optional[SpooledUpload]) -> dict:
+        result = {"index": index, "filename": filename}
+        timings = {}
+        started = time.perf_counter()
+        try:
+            if upload is None:
+                raise HTTPException(status_code=413, detail="File is too large")
+            async with semaphore:
+                timings['queuedMs'] = round((time.perf_counter() - started) * 1000, 1)
+                resume_data = await parse(upload, timings)
+            result.update(status="ok", resumeData=resume_data)
+        except HTTPException as e:
+            result.update(status="error", error=e.detail)
+        except Exception as e:
+            logger.error(f"Batch parse error for {filename}: {str(e)}")
+            result.update(status="error", error=str(e))
+        timings['totalMs'] = round((time.perf_counter() - started) * 1000, 1)
+        result['timings'] = timings
+        return result
+
+    started = time.perf_counter()
+    tasks = [asyncio.create_task(parse_one(i, name, upload)) for i, (name, upload) in enumerate(entries)]
+    succeeded = 0
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            result = await next_done
+            if result['status'] == "ok":
+                succeeded += 1
+            yield json.dumps(result) + "\n"
+        yield json.dumps({
+            "status": "done",
+            "total": len(tasks),
+            "succeeded": succeeded,
+            "failed": len(tasks) - succeeded,
+            "elapsedMs": round((time.perf_counter() - started) * 1000, 1)
+        }) + "\n"
+    finally:
+        # Client disconnected mid-stream: stop work nobody will read
+        for task in tasks:
+            task.cancel()
+        remove(entries)
@@ -0,0 +1,402 @@
+"""Load-test every /api route in-process, against fakes for MongoDB and the LLM.
+
+The real FastAPI app (middleware, worker pools, caches, search index) is
+driven through httpx's ASGI transport; only the database client and LlmChat
+are replaced (see benchmarks.fakes). Each route gets its own run of
+--requests requests at --concurrency, with request bodies prepared up front
+so that generating fixtures is not timed. Bodies vary per request, so the
+LLM and export caches do not turn the run into a cache benchmark.
+
+    cd backend
+    python -m benchmarks.bench_api --output api.json
+    python -m benchmarks.bench_api --routes "POST /api/parse-resume" --llm-latency 2 --concurrency 32
+"""
+import argparse
+import asyncio
+import logging
+import random
+import time
+from collections import Counter
+from typing import Awaitable, Callable, Dict, List, Tuple
+
+import httpx
+
+from benchmarks import fakes
+from benchmarks.corpus import WORDS, generate_docx_cv, generate_pdf_cv, sample_resume
+from benchmarks.report import peak_rss_mb, summarise, write_results
+
+JOB_DESCRIPTION = (
+    "We are hiring a Senior Platform Engineer to scale our data platform. You will own Kubernetes "
+    "clusters on AWS, build Python and Go services, run Kafka pipelines and mentor the team. "
+    "Experience with Terraform, PostgreSQL, observability and cross-functional delivery is essential."
+)
+
+TEMPLATES = ["professional", "modern", "minimal"]
+
+
+class Context:
+    """Shared state for the scenarios: the client and the resumes seeded into the fake database"""
+
+    def __init__(self, client: httpx.AsyncClient):
+        self.client = client
+        self.ids: List[str] = []
+        self.stamps: Dict[str, str] = {}
+        self.disposable: List[str] = []
+
+    async def create_resume(self, seed: int) -> Tuple[str, str]:
+        response = await self.client.post("/api/resumes", json={"resumeData": sample_resume(seed), "template": "professional"})
+        response.raise_for_status()
+        body = response.json()
+        return body["id"], body["updatedAt"]
+
+    async def seed(self, resumes: int, disposable: int):
+        for seed in range(resumes):
+            resume_id, updated_at = await self.create_resume(seed)
+            self.ids.append(resume_id)
+            self.stamps[resume_id] = updated_at
+        for seed in range(disposable):
+            self.disposable.append((await self.create_resume(resumes + seed))[0])
+
+
+# (method, route path) -> builder returning httpx request arguments for request i
+Builder = Callable[[Context, int], Awaitable[dict]]
+SCENARIOS: Dict[Tuple[str, str], Builder] = {}
+
+
+def scenario(method: str, path: str):
+    def register(builder: Builder) -> Builder:
+        SCENARIOS[(method, path)] = builder
+        return builder
+    return register
+
+
+def _upload(i: int) -> Tuple[str, bytes, str]:
+    if i % 2:
+        return f"cv{i}.docx", generate_docx_cv(sections=2 + i % 6, seed=i), \
+            "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+    return f"cv{i}.pdf", generate_pdf_cv(pages=1 + i % 3, seed=i), "application/pdf"
+
+
+@scenario("GET", "/api/")
+async def _root(ctx, i):
+    return {"method": "GET", "url": "/api/"}
+
+
+@scenario("POST", "/api/resumes")
+async def _create(ctx, i):
+    return {"method": "POST", "url": "/api/resumes",
+            "json": {"resumeData": sample_resume(100000 + i), "template": TEMPLATES[i % len(TEMPLATES)]}}
+
+
+@scenario("GET", "/api/resumes")
+async def _list(ctx, i):
+    params = {"limit": 20}
+    if i % 2:
+        params["fields"] = "name,email,resumeData.skills"
+    return {"method": "GET", "url": "/api/resumes", "params": params}
+
+
+@scenario("GET", "/api/resumes/search")
+async def _search(ctx, i):
+    rng = random.Random(i)
+    query = " ".join(rng.choice(WORDS) for _ in range(3))
+    return {"method": "GET", "url": "/api/resumes/search", "params": {"q": query, "limit": 10}}
+
+
+@scenario("GET", "/api/resumes/{resume_id}")
+async def _get(ctx, i):
+    url = f"/api/resumes/{ctx.ids[i % len(ctx.ids)]}"
+    if i % 2:
+        return {"method": "GET", "url": url}
+    # Half the requests are editor polls revalidating an unchanged resume
+    response = await ctx.client.get(url)
+    response.raise_for_status()
+    return {"method": "GET", "url": url, "headers": {"If-None-Match": response.headers["ETag"]}}
+
+
+@scenario("PATCH", "/api/resumes/{resume_id}")
+async def _patch(ctx, i):
+    resume_id = ctx.ids[i % len(ctx.ids)]
+    return {"method": "PATCH", "url": f"/api/resumes/{resume_id}",
+            "json": {"updatedAt": ctx.stamps[resume_id], "set": {"resumeData.summary": f"Updated summary {i}"},
+                     "push": {"resumeData.skills": f"skill-{i}"}}}
+
+
+@scenario("PUT", "/api/resumes/{resume_id}")
+async def _save(ctx, i):
+    resume = sample_resume(i)
+    resume["summary"] = f"Autosaved summary {i}"
+    return {"method": "PUT", "url": f"/api/resumes/{ctx.ids[i % len(ctx.ids)]}",
+            "json": {"resumeData": resume, "template": "professional"}}
+
+
+@scenario("GET", "/api/resumes/{resume_id}/versions")
+async def _versions(ctx, i):
+    return {"method": "GET", "url": f"/api/resumes/{ctx.ids[i % len(ctx.ids)]}/versions", "params": {"limit": 20}}
+
+
+@scenario("GET", "/api/resumes/{resume_id}/versions/diff")
+async def _versions_diff(ctx, i):
+    resume_id = ctx.ids[i % len(ctx.ids)]
+    # Save an edit first so there are two versions to compare
+    resume = sample_resume(i)
+    resume["summary"] = f"Edited summary {i}"
+    response = await ctx.client.put(f"/api/resumes/{resume_id}", json={"resumeData": resume, "template": "modern"})
+    response.raise_for_status()
+    return {"method": "GET", "url": f"/api/resumes/{resume_id}/versions/diff",
+            "params": {"from": 1, "to": response.json()["version"]}}
+
+
+@scenario("GET", "/api/resumes/{resume_id}/versions/{version}")
+async def _version(ctx, i):
+    return {"method": "GET", "url": f"/api/resumes/{ctx.ids[i % len(ctx.ids)]}/versions/1"}
+
+
+@scenario("DELETE", "/api/resumes/{resume_id}")
+async def _delete(ctx, i):
+    return {"method": "DELETE", "url": f"/api/resumes/{ctx.disposable[i % len(ctx.disposable)]}"}
+
+
+@scenario("GET", "/api/search-index/stats")
+async def _index_stats(ctx, i):
+    return {"method": "GET", "url": "/api/search-index/stats"}
+
+
+@scenario("POST", "/api/search-index/rebuild")
+async def _index_rebuild(ctx, i):
+    return {"method": "POST", "url": "/api/search-index/rebuild"}
+
+
+@scenario("POST", "/api/ai/analyze-ats")
+async def _analyze_ats(ctx, i):
+    return {"method": "POST", "url": "/api/ai/analyze-ats",
+            "json": {"resumeData": sample_resume(i), "jobDescription": f"{JOB_DESCRIPTION} Ref {i}.",
+                     "mode": ("hybrid", "local", "llm")[i % 3]}}
+
+
+@scenario("POST", "/api/ats/rank")
+async def _rank(ctx, i):
+    return {"method": "POST", "url": "/api/ats/rank", "json": {"jobDescription": f"{JOB_DESCRIPTION} Ref {i}.", "topK": 20}}
+
+
+@scenario("GET", "/api/ats/rank/cache/stats")
+async def _rank_stats(ctx, i):
+    return {"method": "GET", "url": "/api/ats/rank/cache/stats"}
+
+
+@scenario("POST", "/api/parse-resume")
+async def _parse(ctx, i):
+    return {"method": "POST", "url": "/api/parse-resume", "files": {"file": _upload(i)}}
+
+
+@scenario("POST", "/api/parse-resume/stream")
+async def _parse_stream(ctx, i):
+    return {"method": "POST", "url": "/api/parse-resume/stream", "files": {"file": _upload(10000 + i)}}
+
+
+@scenario("POST", "/api/parse-resume/batch")
+async def _parse_batch(ctx, i):
+    return {"method": "POST", "url": "/api/parse-resume/batch",
+            "files": [("files", _upload(20000 + i * 4 + n)) for n in range(4)]}
+
+
+def _cover_letter_body(i: int) -> dict:
+    return {"resumeData": sample_resume(i), "jobDescription": JOB_DESCRIPTION,
+            "companyName": f"Company {i}", "jobTitle": "Platform Engineer"}
+
+
+@scenario("POST", "/api/cover-letter/generate")
+async def _cover_letter(ctx, i):
+    return {"method": "POST", "url": "/api/cover-letter/generate", "json": _cover_letter_body(i)}
+
+
+@scenario("POST", "/api/cover-letter/generate/stream")
+async def _cover_letter_stream(ctx, i):
+    return {"method": "POST", "url": "/api/cover-letter/generate/stream", "json": _cover_letter_body(i)}
+
+
+@scenario("POST", "/api/jobs/parse-resume")
+async def _job_parse(ctx, i):
+    return {"method": "POST", "url": "/api/jobs/parse-resume", "files": {"file": _upload(40000 + i)}}
+
+
+@scenario("POST", "/api/jobs/cover-letter")
+async def _job_cover_letter(ctx, i):
+    return {"method": "POST", "url": "/api/jobs/cover-letter", "json": _cover_letter_body(40000 + i)}
+
+
+@scenario("POST", "/api/jobs/analyze-ats")
+async def _job_ats(ctx, i):
+    return {"method": "POST", "url": "/api/jobs/analyze-ats",
+            "json": {"resumeData": sample_resume(40000 + i), "jobDescription": JOB_DESCRIPTION, "mode": "llm"}}
+
+
+async def _submit_job(ctx, i) -> str:
+    response = await ctx.client.post("/api/jobs/cover-letter", json=_cover_letter_body(50000 + i))
+    response.raise_for_status()
+    return response.json()["id"]
+
+
+@scenario("GET", "/api/jobs/{job_id}")
+async def _job(ctx, i):
+    return {"method": "GET", "url": f"/api/jobs/{await _submit_job(ctx, i)}"}
+
+
+@scenario("GET", "/api/jobs/{job_id}/events")
+async def _job_events(ctx, i):
+    # The stream ends when the job finishes, so this times queueing plus the LLM call
+    return {"method": "GET", "url": f"/api/jobs/{await _submit_job(ctx, i)}/events"}
+
+
+@scenario("GET", "/api/jobs/stats")
+async def _job_stats(ctx, i):
+    return {"method": "GET", "url": "/api/jobs/stats"}
+
+
+@scenario("POST", "/api/cover-letter/export/pdf")
+async def _cover_letter_pdf(ctx, i):
+    resume = sample_resume(i)
+    return {"method": "POST", "url": "/api/cover-letter/export/pdf",
+            "json": {"personalInfo": resume["personalInfo"], "companyName": f"Company {i}",
+                     "jobTitle": "Platform Engineer", "content": resume["summary"] * 6}}
+
+
+@scenario("POST", "/api/skills/extract")
+async def _skills(ctx, i):
+    return {"method": "POST", "url": "/api/skills/extract",
+            "json": {"text": f"{JOB_DESCRIPTION} Temporal, Dagster and Pulumi {i} are a plus.", "existingSkills": ["Python"]}}
+
+
+@scenario("GET", "/api/llm-cache/stats")
+async def _llm_cache_stats(ctx, i):
+    return {"method": "GET", "url": "/api/llm-cache/stats"}
+
+
+@scenario("GET", "/api/llm/stats")
+async def _llm_stats(ctx, i):
+    return {"method": "GET", "url": "/api/llm/stats"}
+
+
+@scenario("GET", "/api/workers/stats")
+async def _worker_stats(ctx, i):
+    return {"method": "GET", "url": "/api/workers/stats"}
+
+
+@scenario("POST", "/api/export/pdf")
+async def _export_pdf(ctx, i):
+    return {"method": "POST", "url": "/api/export/pdf",
+            "json": {"resumeData": sample_resume(i), "template": TEMPLATES[i % len(TEMPLATES)]}}
+
+
+@scenario("POST", "/api/export/docx")
+async def _export_docx(ctx, i):
+    return {"method": "POST", "url": "/api/export/docx",
+            "json": {"resumeData": sample_resume(i), "template": TEMPLATES[i % len(TEMPLATES)]}}
+
+
+@scenario("GET", "/api/export/templates")
+async def _templates(ctx, i):
+    return {"method": "GET", "url": "/api/export/templates"}
+
+
+@scenario("GET", "/api/export/cache/stats")
+async def _export_stats(ctx, i):
+    return {"method": "GET", "url": "/api/export/cache/stats"}
+
+
+@scenario("GET", "/api/startup/stats")
+async def _startup_stats(ctx, i):
+    return {"method": "GET", "url": "/api/startup/stats"}
+
+
+async def run_route(ctx: Context, method: str, path: str, requests: int, concurrency: int) -> dict:
+    builder = SCENARIOS[(method, path)]
+    prepared = [await builder(ctx, i) for i in range(requests)]
+    pending = iter(prepared)
+    latencies: List[float] = []
+    statuses: Counter = Counter()
+
+    async def worker():
+        for request in pending:
+            started = time.perf_counter()
+            response = await ctx.client.request(**request)
+            latencies.append(time.perf_counter() - started)
+            statuses[response.status_code] += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    elapsed = time.perf_counter() - started
+    return {
+        "route": f"{method} {path}",
+        **summarise(latencies),
+        "rps": round(requests / elapsed, 1) if elapsed else 0.0,
+        "errors": sum(count for status, count in statuses.items() if status >= 400),
+        "statuses": {str(status): count for status, count in sorted(statuses.items())},
+        "peakRssMb": peak_rss_mb(),
+    }
+
+
+def api_routes(router) -> List[Tuple[str, str]]:
+    routes = []
+    for route in router.routes:
+        for method in sorted(getattr(route, "methods", None) or []):
+            if method != "HEAD":
+                routes.append((method, route.path))
+    return routes
+
+
+async def run(args) -> Tuple[List[dict], List[str]]:
+    fakes.install(llm_latency=args.llm_latency, llm_chars_per_second=args.llm_chars_per_second,
+                  mongo_latency=args.mongo_latency)
+    import server
+
+    logging.getLogger().setLevel(args.log_level)
+    routes = api_routes(server.api_router)
+    uncovered = [f"{method} {path}" for method, path in routes if (method, path) not in SCENARIOS]
+    if args.routes:
+        routes = [(method, path) for method, path in routes if f"{method} {path}" in args.routes]
+
+    await server.app.router.startup()
+    results = []
+    try:
+        transport = httpx.ASGITransport(app=server.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            ctx = Context(client)
+            await ctx.seed(max(args.resumes, args.requests), args.requests)
+            for method, path in routes:
+                if (method, path) not in SCENARIOS:
+                    continue
+                result = await run_route(ctx, method, path, args.requests, args.concurrency)
+                results.append(result)
+                print(f"{result['route']:<45}{result['p50Ms']:>10}{result['p95Ms']:>10}{result['p99Ms']:>10}"
+                      f"{result['rps']:>10}{result['errors']:>8}{result['peakRssMb']:>12}", flush=True)
+    finally:
+        await server.app.router.shutdown()
+    return results, uncovered
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=100, help="requests per route")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--resumes", type=int, default=500, help="resumes seeded before the run")
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="fixed seconds per fake LLM reply")
+    parser.add_argument("--llm-chars-per-second", type=float, default=2000.0, help="simulated generation speed")
+    parser.add_argument("--mongo-latency", type=float, default=0.0, help="seconds added to every fake database call")
+    parser.add_argument("--routes", nargs="+", help='only these routes, e.g. "GET /api/resumes"')
+    parser.add_argument("--log-level", default="WARNING")
+    parser.add_argument("--output", help="write results as JSON to this path")
+    args = parser.parse_args()
+
+    print(f"{'route':<45}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'rps':>10}{'errors':>8}{'peak RSS MB':>12}")
+    results, uncovered = asyncio.run(run(args))
+    for route in uncovered:
+        print(f"warning: no scenario for {route}")
+    print(f"peak RSS {peak_rss_mb()} MB (worker processes {peak_rss_mb(children=True)} MB)")
+    if args.output:
+        config = {key: value for key, value in vars(args).items() if key != "output"}
+        write_results(args.output, "api", {**config, "uncovered": uncovered}, results)
+
+
+if __name__ == "__main__":
+    main()
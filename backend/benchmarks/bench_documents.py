@@ -0,0 +1,77 @@
+"""Microbenchmark text extraction and export rendering on a fixture corpus.
+
+Times the functions behind /api/parse-resume (extract_text_from_pdf,
+extract_text_from_docx) and /api/export/pdf and /api/export/docx
+(render_resume_pdf, render_resume_docx) directly, without the worker pools
+or the export cache, so regressions in the document code itself show up.
+
+    cd backend
+    python -m benchmarks.bench_documents --output documents.json
+    python -m benchmarks.bench_documents --pdf-corpus ~/cvs --docx-corpus ~/cvs --repeat 5
+"""
+import argparse
+import time
+
+from benchmarks.corpus import load_corpus, sample_resume, synthetic_docx_corpus, synthetic_pdf_corpus
+from benchmarks.report import peak_rss_mb, summarise, write_results
+from export_templates import template_names
+from extraction import extract_text_from_docx, extract_text_from_pdf
+from renderers import render_resume_docx, render_resume_pdf
+
+
+def _time(name: str, func, inputs, repeat: int) -> dict:
+    timings = []
+    output_bytes = 0
+    for _ in range(repeat):
+        for args in inputs:
+            started = time.perf_counter()
+            output = func(*args)
+            timings.append(time.perf_counter() - started)
+            output_bytes += len(output)
+    return {
+        "function": name,
+        "inputs": len(inputs),
+        **summarise(timings),
+        "outputBytesPerRun": output_bytes // repeat,
+        "peakRssMb": peak_rss_mb(),
+    }
+
+
+def run(pdfs, docxs, resumes, repeat: int = 3):
+    templates = template_names()
+    exports = [(resume, templates[i % len(templates)]) for i, resume in enumerate(resumes)]
+    return [
+        _time("extract_text_from_pdf", extract_text_from_pdf, [(content,) for content in pdfs], repeat),
+        _time("extract_text_from_docx", extract_text_from_docx, [(content,) for content in docxs], repeat),
+        _time("render_resume_pdf", render_resume_pdf, exports, repeat),
+        _time("render_resume_docx", render_resume_docx, exports, repeat),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pdf-corpus", help="directory of sample PDF CVs")
+    parser.add_argument("--docx-corpus", help="directory of sample DOCX CVs")
+    parser.add_argument("--generate", type=int, default=24, help="synthetic CVs of each type when no corpus is given")
+    parser.add_argument("--resumes", type=int, default=30, help="resumes to render, cycling through every template")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", help="write results as JSON to this path")
+    args = parser.parse_args()
+
+    pdfs = load_corpus(args.pdf_corpus, ".pdf") if args.pdf_corpus else synthetic_pdf_corpus(args.generate)
+    docxs = load_corpus(args.docx_corpus, ".docx") if args.docx_corpus else synthetic_docx_corpus(args.generate)
+    if not pdfs or not docxs:
+        parser.error("corpus is empty")
+    resumes = [sample_resume(seed) for seed in range(args.resumes)]
+
+    results = run(pdfs, docxs, resumes, repeat=args.repeat)
+    print(f"{'function':<26}{'mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'peak RSS MB':>14}")
+    for row in results:
+        print(f"{row['function']:<26}{row['meanMs']:>10}{row['p50Ms']:>10}{row['p95Ms']:>10}{row['p99Ms']:>10}{row['peakRssMb']:>14}")
+    if args.output:
+        config = {key: value for key, value in vars(args).items() if key != "output"}
+        write_results(args.output, "documents", config, results)
+
+
+if __name__ == "__main__":
+    main()
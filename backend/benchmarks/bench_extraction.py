@@ -0,0 +1,78 @@
+"""Compare PDF extraction engines on a corpus of CVs.
+
+Each engine runs in its own fresh process so that peak RSS is measured per
+engine rather than for whichever ran first.
+
+    cd backend
+    python -m benchmarks.bench_extraction --corpus ~/cvs --output extraction.json
+    python -m benchmarks.bench_extraction --generate 40
+"""
+import argparse
+import json
+import multiprocessing
+import resource
+import statistics
+import time
+
+from benchmarks.corpus import load_corpus, synthetic_pdf_corpus
+from extraction import PDF_ENGINES, extract_text_from_pdf
+
+
+def _run_engine(engine: str, corpus, repeat: int, queue):
+    timings = []
+    chars = 0
+    for _ in range(repeat):
+        for content in corpus:
+            started = time.perf_counter()
+            chars += len(extract_text_from_pdf(content, engine=engine))
+            timings.append(time.perf_counter() - started)
+    timings.sort()
+    queue.put({
+        "engine": engine,
+        "files": len(corpus),
+        "runs": len(timings),
+        "totalSeconds": round(sum(timings), 4),
+        "meanMs": round(statistics.mean(timings) * 1000, 2),
+        "p95Ms": round(timings[int(len(timings) * 0.95) - 1] * 1000, 2) if timings else 0.0,
+        "charsPerRun": chars // repeat,
+        # ru_maxrss is reported in KiB on Linux
+        "peakRssMb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    })
+
+
+def run(corpus, engines=PDF_ENGINES, repeat: int = 1):
+    ctx = multiprocessing.get_context("spawn")
+    results = []
+    for engine in engines:
+        queue = ctx.Queue()
+        process = ctx.Process(target=_run_engine, args=(engine, corpus, repeat, queue))
+        process.start()
+        results.append(queue.get())
+        process.join()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", help="directory of sample PDF CVs")
+    parser.add_argument("--generate", type=int, default=24, help="synthetic CVs to generate when no corpus is given")
+    parser.add_argument("--engines", nargs="+", default=list(PDF_ENGINES), choices=PDF_ENGINES)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", help="write results as JSON to this path")
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.corpus, ".pdf") if args.corpus else synthetic_pdf_corpus(args.generate)
+    if not corpus:
+        parser.error("corpus is empty")
+
+    results = run(corpus, engines=args.engines, repeat=args.repeat)
+    print(f"{'engine':<12}{'mean ms':>10}{'p95 ms':>10}{'total s':>10}{'peak RSS MB':>14}")
+    for row in results:
+        print(f"{row['engine']:<12}{row['meanMs']:>10}{row['p95Ms']:>10}{row['totalSeconds']:>10}{row['peakRssMb']:>14}")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"benchmark": "extraction", "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
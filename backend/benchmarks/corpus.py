@@ -0,0 +1,103 @@
+"""Synthetic CV fixtures for the benchmarks.
+
+Real CVs cannot be checked into the repo, so when no corpus directory is
+given the benchmarks generate deterministic PDF and DOCX resumes of varying
+length instead.
+"""
+import io
+import random
+from pathlib import Path
+from typing import List
+
+from docx import Document
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, PageBreak
+
+WORDS = (
+    "led delivered designed built migrated scaled reduced improved automated launched "
+    "python react kubernetes postgres aws terraform kafka analytics stakeholders roadmap "
+    "customers revenue latency pipeline platform services team cross-functional agile "
+    "metrics dashboards compliance onboarding mentoring hiring budget strategy"
+).split()
+
+
+def _sentence(rng: random.Random, length: int = 14) -> str:
+    words = [rng.choice(WORDS) for _ in range(length)]
+    return " ".join(words).capitalize() + f", improving throughput by {rng.randint(5, 80)}%."
+
+
+def sample_resume(seed: int) -> dict:
+    """A complete ResumeData dict, different for every seed"""
+    rng = random.Random(seed)
+
+    def words(count: int) -> str:
+        return " ".join(rng.choice(WORDS) for _ in range(count)).capitalize()
+
+    return {
+        "personalInfo": {"fullName": f"Candidate {seed}", "email": f"candidate{seed}@example.com",
+                         "phone": f"+44 20 7946 {seed % 10000:04d}", "location": "London",
+                         "linkedin": "", "portfolio": "", "photo": ""},
+        "summary": words(30) + ".",
+        "experience": [
+            {"id": f"exp{i + 1}", "title": "Engineer", "company": f"Company {seed}-{i}", "location": "London",
+             "startDate": "01-01-2019", "endDate": "31-12-2021", "current": False,
+             "bullets": [words(14) + "." for _ in range(4)]}
+            for i in range(1 + seed % 4)
+        ],
+        "education": [{"id": "edu1", "degree": "BSc Computer Science", "school": "University of Leeds",
+                       "location": "Leeds", "graduationDate": "2014", "gpa": ""}],
+        "skills": sorted({rng.choice(WORDS) for _ in range(8)}),
+        "certifications": [],
+        "languages": [{"id": "lang1", "language": "English", "proficiency": "Native"}],
+    }
+
+
+def generate_pdf_cv(pages: int, seed: int = 0) -> bytes:
+    """Render a synthetic CV with roughly ``pages`` pages of experience"""
+    rng = random.Random(seed)
+    styles = getSampleStyleSheet()
+    buffer = io.BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=letter)
+    story = [
+        Paragraph(f"Candidate {seed}", styles['Heading1']),
+        Paragraph(f"candidate{seed}@example.com | +44 20 7946 {seed:04d} | London", styles['Normal']),
+        Spacer(1, 12),
+    ]
+    for page in range(pages):
+        story.append(Paragraph(f"Senior Engineer - Company {page}", styles['Heading2']))
+        for _ in range(22):
+            story.append(Paragraph(f"• {_sentence(rng)}", styles['Normal']))
+        if page < pages - 1:
+            story.append(PageBreak())
+    doc.build(story)
+    return buffer.getvalue()
+
+
+def generate_docx_cv(sections: int, seed: int = 0) -> bytes:
+    """Render a synthetic DOCX CV with ``sections`` experience entries"""
+    rng = random.Random(seed)
+    doc = Document()
+    doc.add_heading(f"Candidate {seed}", 0)
+    doc.add_paragraph(f"candidate{seed}@example.com | +44 20 7946 {seed:04d} | London")
+    for section in range(sections):
+        doc.add_heading(f"Senior Engineer - Company {section}", 1)
+        for _ in range(8):
+            doc.add_paragraph(_sentence(rng), style='List Bullet')
+    buffer = io.BytesIO()
+    doc.save(buffer)
+    return buffer.getvalue()
+
+
+def load_corpus(directory: str, suffix: str) -> List[bytes]:
+    """Read every ``*{suffix}`` file under ``directory``"""
+    return [path.read_bytes() for path in sorted(Path(directory).rglob(f"*{suffix}"))]
+
+
+def synthetic_pdf_corpus(count: int) -> List[bytes]:
+    """One- to eight-page CVs, cycling through lengths"""
+    return [generate_pdf_cv(pages=1 + i % 8, seed=i) for i in range(count)]
+
+
+def synthetic_docx_corpus(count: int) -> List[bytes]:
+    return [generate_docx_cv(sections=2 + i % 10, seed=i) for i in range(count)]
@@ -0,0 +1,482 @@
+"""In-process stand-ins for MongoDB and the LLM, for offline benchmarks.
+
+``install`` patches ``AsyncIOMotorClient`` and ``LlmChat`` before the server
+module is imported, so the real application code runs unchanged against an
+in-memory database and a deterministic model with configurable latency.
+Only the query and update operators the server actually uses are supported.
+"""
+import asyncio
+import copy
+import json
+import os
+import random
+import re
+import tempfile
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional
+
+
+def _bson(value: Any) -> Any:
+    """Deep copy as MongoDB would store it: naive UTC datetimes at millisecond precision"""
+    if isinstance(value, dict):
+        return {k: _bson(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_bson(v) for v in value]
+    if isinstance(value, datetime):
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        return value.replace(microsecond=value.microsecond // 1000 * 1000)
+    return value
+
+
+_MISSING = object()
+
+
+def _get(doc: dict, path: str) -> Any:
+    value: Any = doc
+    for key in path.split("."):
+        if isinstance(value, dict) and key in value:
+            value = value[key]
+        elif isinstance(value, list) and key.isdigit() and int(key) < len(value):
+            value = value[int(key)]
+        else:
+            return _MISSING
+    return value
+
+
+def _parent(doc: dict, path: str, create: bool = True):
+    keys = path.split(".")
+    target: Any = doc
+    for key in keys[:-1]:
+        if isinstance(target, list):
+            target = target[int(key)]
+        else:
+            if key not in target and create:
+                target[key] = {}
+            target = target.get(key)
+            if target is None:
+                return None, keys[-1]
+    return target, keys[-1]
+
+
+def _matches_value(value: Any, condition: Any) -> bool:
+    if isinstance(condition, dict) and condition and all(k.startswith("$") for k in condition):
+        for op, operand in condition.items():
+            if op == "$in":
+                if value is _MISSING or value not in operand:
+                    return False
+            elif op == "$nin":
+                if value is not _MISSING and value in operand:
+                    return False
+            elif op == "$ne":
+                if value == operand:
+                    return False
+            elif op == "$exists":
+                if (value is not _MISSING) != bool(operand):
+                    return False
+            elif op in ("$lt", "$lte", "$gt", "$gte"):
+                if value is _MISSING or value is None:
+                    return False
+                try:
+                    ok = {"$lt": value < operand, "$lte": value <= operand,
+                          "$gt": value > operand, "$gte": value >= operand}[op]
+                except TypeError:
+                    return False
+                if not ok:
+                    return False
+            else:
+                raise NotImplementedError(f"Query operator {op} is not supported by the fake")
+        return True
+    if isinstance(value, list) and not isinstance(condition, list):
+        # An array field matches a scalar it contains
+        return condition in value
+    return value is not _MISSING and value == condition
+
+
+def matches(doc: dict, query: dict) -> bool:
+    for key, condition in query.items():
+        if key == "$or":
+            if not any(matches(doc, clause) for clause in condition):
+                return False
+        elif key == "$and":
+            if not all(matches(doc, clause) for clause in condition):
+                return False
+        elif not _matches_value(_get(doc, key), condition):
+            return False
+    return True
+
+
+def project(doc: dict, projection: Optional[dict]) -> dict:
+    if not projection:
+        return copy.deepcopy(doc)
+    include = [path for path, flag in projection.items() if flag and path != "_id"]
+    if not include:
+        result = copy.deepcopy(doc)
+        for path, flag in projection.items():
+            if not flag:
+                parent, key = _parent(result, path, create=False)
+                if isinstance(parent, dict):
+                    parent.pop(key, None)
+        return result
+    result: dict = {}
+    if projection.get("_id", 1) and "_id" in doc:
+        result["_id"] = doc["_id"]
+    for path in include:
+        value = _get(doc, path)
+        if value is _MISSING:
+            continue
+        parent, key = _parent(result, path)
+        parent[key] = copy.deepcopy(value)
+    return result
+
+
+def apply_update(doc: dict, update: dict, inserting: bool = False):
+    if not any(key.startswith("$") for key in update):
+        # Replacement document
+        preserved = doc.get("_id")
+        doc.clear()
+        doc.update(_bson(update))
+        if preserved is not None:
+            doc.setdefault("_id", preserved)
+        return
+    for op, fields in update.items():
+        if op == "$setOnInsert" and not inserting:
+            continue
+        for path, value in fields.items():
+            parent, key = _parent(doc, path)
+            if op in ("$set", "$setOnInsert"):
+                if isinstance(parent, list):
+                    parent[int(key)] = _bson(value)
+                else:
+                    parent[key] = _bson(value)
+            elif op == "$unset":
+                if isinstance(parent, dict):
+                    parent.pop(key, None)
+            elif op == "$inc":
+                parent[key] = parent.get(key, 0) + value
+            elif op == "$push":
+                values = value["$each"] if isinstance(value, dict) and "$each" in value else [value]
+                parent.setdefault(key, []).extend(_bson(values))
+            elif op == "$addToSet":
+                values = parent.setdefault(key, [])
+                if _bson(value) not in values:
+                    values.append(_bson(value))
+            elif op == "$pull":
+                if isinstance(parent.get(key), list):
+                    parent[key] = [item for item in parent[key] if item != value]
+            else:
+                raise NotImplementedError(f"Update operator {op} is not supported by the fake")
+
+
+def _sort_key(value: Any):
+    # Missing values sort first, as in MongoDB
+    return (0, None) if value is _MISSING or value is None else (1, value)
+
+
+class FakeCursor:
+    def __init__(self, collection: "FakeCollection", query: dict, projection: Optional[dict]):
+        self._collection = collection
+        self._query = query
+        self._projection = projection
+        self._sort: List[tuple] = []
+        self._skip = 0
+        self._limit = 0
+        self._results: Optional[List[dict]] = None
+        self._position = 0
+
+    def sort(self, key, direction=None):
+        self._sort = list(key) if isinstance(key, list) else [(key, direction or 1)]
+        return self
+
+    def skip(self, count: int):
+        self._skip = count
+        return self
+
+    def limit(self, count: int):
+        self._limit = count
+        return self
+
+    def _materialise(self) -> List[dict]:
+        if self._results is None:
+            docs = [doc for doc in self._collection.docs if matches(doc, self._query)]
+            for field, direction in reversed(self._sort):
+                docs.sort(key=lambda doc: _sort_key(_get(doc, field)), reverse=direction < 0)
+            docs = docs[self._skip:]
+            if self._limit:
+                docs = docs[:self._limit]
+            self._results = [project(doc, self._projection) for doc in docs]
+        return self._results
+
+    async def to_list(self, length: Optional[int]) -> List[dict]:
+        await self._collection.io()
+        results = self._materialise()
+        end = len(results) if length is None else self._position + length
+        batch = results[self._position:end]
+        self._position += len(batch)
+        return batch
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> dict:
+        batch = await self.to_list(1)
+        if not batch:
+            raise StopAsyncIteration
+        return batch[0]
+
+
+class FakeCollection:
+    def __init__(self, database: "FakeDatabase", name: str):
+        self.database = database
+        self.name = name
+        self.docs: List[dict] = []
+
+    async def io(self):
+        if self.database.latency:
+            await asyncio.sleep(self.database.latency)
+        else:
+            await asyncio.sleep(0)
+
+    def _find_docs(self, query: dict) -> List[dict]:
+        return [doc for doc in self.docs if matches(doc, query)]
+
+    def find(self, query: Optional[dict] = None, projection: Optional[dict] = None, **kwargs) -> FakeCursor:
+        cursor = FakeCursor(self, query or {}, projection)
+        if kwargs.get("sort"):
+            cursor.sort(kwargs["sort"])
+        if kwargs.get("limit"):
+            cursor.limit(kwargs["limit"])
+        return cursor
+
+    async def find_one(self, query: Optional[dict] = None, projection: Optional[dict] = None, **kwargs) -> Optional[dict]:
+        docs = await self.find(query, projection, **kwargs).limit(1).to_list(1)
+        return docs[0] if docs else None
+
+    async def insert_one(self, document: dict):
+        await self.io()
+        doc = _bson(document)
+        doc.setdefault("_id", self.database.next_id())
+        document.setdefault("_id", doc["_id"])
+        self.docs.append(doc)
+        return SimpleNamespace(inserted_id=doc["_id"], acknowledged=True)
+
+    async def insert_many(self, documents: List[dict], ordered: bool = True):
+        ids = [(await self.insert_one(document)).inserted_id for document in documents]
+        return SimpleNamespace(inserted_ids=ids, acknowledged=True)
+
+    def _upsert_doc(self, query: dict) -> dict:
+        doc = {k: _bson(v) for k, v in query.items() if not k.startswith("$") and not isinstance(v, dict)}
+        doc.setdefault("_id", self.database.next_id())
+        self.docs.append(doc)
+        return doc
+
+    async def update_one(self, query: dict, update: dict, upsert: bool = False, **kwargs):
+        await self.io()
+        docs = self._find_docs(query)
+        if docs:
+            apply_update(docs[0], update)
+            return SimpleNamespace(matched_count=1, modified_count=1, upserted_id=None)
+        if upsert:
+            doc = self._upsert_doc(query)
+            apply_update(doc, update, inserting=True)
+            return SimpleNamespace(matched_count=0, modified_count=0, upserted_id=doc["_id"])
+        return SimpleNamespace(matched_count=0, modified_count=0, upserted_id=None)
+
+    async def update_many(self, query: dict, update: dict, **kwargs):
+        await self.io()
+        docs = self._find_docs(query)
+        for doc in docs:
+            apply_update(doc, update)
+        return SimpleNamespace(matched_count=len(docs), modified_count=len(docs), upserted_id=None)
+
+    async def replace_one(self, query: dict, replacement: dict, upsert: bool = False, **kwargs):
+        return await self.update_one(query, replacement, upsert=upsert)
+
+    async def find_one_and_update(self, query: dict, update: dict, projection: Optional[dict] = None,
+                                  sort=None, upsert: bool = False, return_document: bool = False, **kwargs):
+        await self.io()
+        docs = self._find_docs(query)
+        for field, direction in reversed(sort or []):
+            docs.sort(key=lambda doc: _sort_key(_get(doc, field)), reverse=direction < 0)
+        if not docs:
+            if not upsert:
+                return None
+            doc = self._upsert_doc(query)
+            apply_update(doc, update, inserting=True)
+            return project(doc, projection) if return_document else None
+        before = project(docs[0], projection)
+        apply_update(docs[0], update)
+        return project(docs[0], projection) if return_document else before
+
+    async def delete_one(self, query: dict):
+        await self.io()
+        docs = self._find_docs(query)
+        if docs:
+            self.docs.remove(docs[0])
+        return SimpleNamespace(deleted_count=len(docs[:1]))
+
+    async def delete_many(self, query: dict):
+        await self.io()
+        docs = self._find_docs(query)
+        self.docs = [doc for doc in self.docs if doc not in docs]
+        return SimpleNamespace(deleted_count=len(docs))
+
+    async def count_documents(self, query: dict, **kwargs) -> int:
+        await self.io()
+        return len(self._find_docs(query))
+
+    async def create_index(self, keys, **kwargs) -> str:
+        return keys if isinstance(keys, str) else "_".join(f"{k}_{d}" for k, d in keys)
+
+
+class FakeDatabase:
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self._collections: Dict[str, FakeCollection] = {}
+        self._ids = 0
+
+    def next_id(self) -> str:
+        self._ids += 1
+        return f"{self._ids:024x}"
+
+    def __getattr__(self, name: str) -> FakeCollection:
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return self[name]
+
+    def __getitem__(self, name: str) -> FakeCollection:
+        if name not in self._collections:
+            self._collections[name] = FakeCollection(self, name)
+        return self._collections[name]
+
+
+class FakeMotorClient:
+    """Accepts the AsyncIOMotorClient constructor; every database is in memory"""
+    latency = 0.0
+
+    def __init__(self, *args, **kwargs):
+        self._databases: Dict[str, FakeDatabase] = {}
+
+    def __getitem__(self, name: str) -> FakeDatabase:
+        if name not in self._databases:
+            self._databases[name] = FakeDatabase(self.latency)
+        return self._databases[name]
+
+    def close(self):
+        pass
+
+
+# Canned replies, chosen by what the prompt asks for
+_PERSONAL_INFO = {
+    "fullName": "Alex Morgan", "email": "alex@example.com", "phone": "+44 20 7946 0000",
+    "location": "London", "linkedin": "", "portfolio": "", "photo": "",
+}
+_EXPERIENCE = [
+    {"id": f"exp{i + 1}", "title": "Senior Engineer", "company": f"Company {i}", "location": "London",
+     "startDate": "01-01-2018", "endDate": "Present" if i == 0 else "31-12-2017", "current": i == 0,
+     "bullets": ["Led a migration to Kubernetes, cutting costs by 30%", "Built data pipelines in Python"]}
+    for i in range(3)
+]
+_EDUCATION = [{"id": "edu1", "degree": "BSc Computer Science", "school": "University of Leeds",
+               "location": "Leeds", "graduationDate": "2014", "gpa": ""}]
+_SKILLS = ["Python", "Kubernetes", "PostgreSQL", "Terraform"]
+_CERTIFICATIONS = [{"id": "cert1", "name": "AWS Solutions Architect", "issuer": "Amazon", "date": "2021"}]
+_LANGUAGES = [{"id": "lang1", "language": "English", "proficiency": "Native"}]
+
+SECTION_REPLIES = {
+    "personalInfo": {"personalInfo": _PERSONAL_INFO, "summary": "Engineer with ten years of platform experience."},
+    "experience": {"experience": _EXPERIENCE},
+    "education": {"education": _EDUCATION},
+    "skills": {"skills": _SKILLS},
+    "certifications": {"certifications": _CERTIFICATIONS},
+    "languages": {"languages": _LANGUAGES},
+}
+
+
+def fake_reply(system_message: str, prompt: str) -> str:
+    """A valid reply for whichever server prompt this is"""
+    if "Parse this resume text" in prompt:
+        reply = {}
+        for section in SECTION_REPLIES.values():
+            reply.update(section)
+        return json.dumps(reply)
+    if "This is one section of a resume" in prompt:
+        match = re.search(r'Required JSON structure:\s*\{\s*"(\w+)"', prompt)
+        return json.dumps(SECTION_REPLIES.get(match.group(1) if match else "", {}))
+    if "ATS (Applicant Tracking System) analyzer" in prompt:
+        return json.dumps({
+            "score": 78, "matched_keywords": ["python", "kubernetes"], "missing_keywords": ["go"],
+            "suggestions": ["Mention Go experience"],
+            "impact_opportunities": [{"original": "Built pipelines", "improved": "Built pipelines serving 2M events/day"}],
+            "readability_score": 88, "readability_suggestions": ["Shorten long bullets"],
+        })
+    if "expert resume coach" in prompt:
+        return json.dumps({
+            "suggestions": ["Quantify the migration outcome"],
+            "impact_opportunities": [{"original": "Built pipelines", "improved": "Built pipelines serving 2M events/day"}],
+        })
+    if "---SUGGESTIONS---" in prompt:
+        letter = "Dear Hiring Manager,\n\nI am writing to apply for the role.\n\nYours sincerely,\nAlex Morgan"
+        return f'{letter}\n---SUGGESTIONS---\n["Name the hiring manager", "Mention a recent project"]'
+    if "cover letter" in prompt.lower():
+        return json.dumps({
+            "content": "Dear Hiring Manager,\n\nI am writing to apply for the role.\n\nYours sincerely,\nAlex Morgan",
+            "suggestions": ["Name the hiring manager", "Mention a recent project"],
+        })
+    if "Phrases:" in prompt:
+        phrases = json.loads(prompt.split("Phrases:", 1)[1].split("Return JSON:", 1)[0])
+        return json.dumps({"skills": [{"name": phrase, "category": "Tools"} for phrase in phrases[:5]]})
+    return "{}"
+
+
+class FakeUserMessage:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class FakeLlmChat:
+    """Drop-in for emergentintegrations' LlmChat with a simulated generation time.
+
+    Each reply takes ``latency`` seconds plus its length at
+    ``chars_per_second``, with a seeded jitter of +/- ``jitter`` of the total.
+    """
+    latency = 0.5
+    chars_per_second = 2000.0
+    jitter = 0.1
+    _random = random.Random(0)
+    calls = 0
+
+    def __init__(self, api_key=None, session_id=None, system_message: str = ""):
+        self.system_message = system_message
+
+    def with_model(self, provider: str, model: str) -> "FakeLlmChat":
+        return self
+
+    async def send_message(self, message) -> str:
+        FakeLlmChat.calls += 1
+        reply = fake_reply(self.system_message, message.text)
+        delay = self.latency + len(reply) / self.chars_per_second
+        delay *= 1 + self._random.uniform(-self.jitter, self.jitter)
+        await asyncio.sleep(max(0.0, delay))
+        return reply
+
+
+def install(llm_latency: float = 0.5, llm_chars_per_second: float = 2000.0, mongo_latency: float = 0.0):
+    """Patch the database and LLM clients; call before importing ``server``"""
+    import motor.motor_asyncio
+    import emergentintegrations.llm.chat
+
+    FakeMotorClient.latency = mongo_latency
+    FakeLlmChat.latency = llm_latency
+    FakeLlmChat.chars_per_second = llm_chars_per_second
+    motor.motor_asyncio.AsyncIOMotorClient = FakeMotorClient
+    emergentintegrations.llm.chat.LlmChat = FakeLlmChat
+    emergentintegrations.llm.chat.UserMessage = FakeUserMessage
+
+    os.environ["MONGO_URL"] = "mongodb://benchmark"
+    os.environ["DB_NAME"] = "benchmark"
+    # The gateway prefers the OpenAI client when a key is present; an empty
+    # value also stops load_dotenv filling one in from .env
+    os.environ["OPENAI_API_KEY"] = ""
+    os.environ.setdefault("SEARCH_INDEX_DIR", tempfile.mkdtemp(prefix="bench_search_index_"))
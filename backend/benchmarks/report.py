@@ -0,0 +1,55 @@
+"""Latency summaries and JSON result files shared by the benchmarks"""
+import json
+import platform
+import resource
+import subprocess
+import time
+from typing import List, Optional
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of already sorted values"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+def summarise(timings: List[float]) -> dict:
+    """Latency summary in milliseconds for a list of durations in seconds"""
+    values = sorted(timings)
+    total = sum(values)
+    return {
+        "count": len(values),
+        "meanMs": round(total / len(values) * 1000, 2) if values else 0.0,
+        "p50Ms": round(percentile(values, 0.50) * 1000, 2),
+        "p95Ms": round(percentile(values, 0.95) * 1000, 2),
+        "p99Ms": round(percentile(values, 0.99) * 1000, 2),
+        "maxMs": round(values[-1] * 1000, 2) if values else 0.0,
+    }
+
+
+def peak_rss_mb(children: bool = False) -> float:
+    # ru_maxrss is reported in KiB on Linux
+    who = resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF
+    return round(resource.getrusage(who).ru_maxrss / 1024, 1)
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def write_results(path: str, benchmark: str, config: dict, results: list):
+    """Save results with enough context to compare runs across commits"""
+    with open(path, "w") as f:
+        json.dump({
+            "benchmark": benchmark,
+            "commit": _git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "python": platform.python_version(),
+            "config": config,
+            "results": results,
+        }, f, indent=2)
@@ -0,0 +1,190 @@
+"""Declarative export templates, compiled once per process.
+
+Each template the frontend offers is described by a ``TemplateDefinition``.
+At import time every definition is validated and compiled into an immutable
+set of ReportLab paragraph styles and a DOCX style map, so export requests
+only look templates up instead of building styles from scratch. Render
+workers import this module too, which compiles the registry once per worker.
+"""
+import hashlib
+import logging
+import re
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Dict, Mapping, Tuple
+
+from docx.enum.text import WD_PARAGRAPH_ALIGNMENT
+from docx.shared import Pt, RGBColor
+from reportlab.lib import colors
+from reportlab.lib.enums import TA_CENTER, TA_LEFT
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TEMPLATE = "professional"
+
+SECTIONS = ("summary", "experience", "education", "skills", "certifications", "languages")
+
+# ReportLab built-in font families and the DOCX font each maps to
+FONT_FAMILIES = {
+    "Helvetica": ("Helvetica", "Helvetica-Bold", "Calibri"),
+    "Times": ("Times-Roman", "Times-Bold", "Times New Roman"),
+    "Courier": ("Courier", "Courier-Bold", "Consolas"),
+}
+
+SECTION_TITLES = {
+    "summary": "Professional Summary",
+    "experience": "Work Experience",
+    "education": "Education",
+    "skills": "Skills",
+    "certifications": "Certifications",
+    "languages": "Languages",
+}
+
+
+class TemplateError(ValueError):
+    """Raised when a template definition is invalid"""
+
+
+@dataclass(frozen=True)
+class TemplateDefinition:
+    name: str
+    accent: str = "#0f172a"
+    font: str = "Helvetica"
+    name_size: int = 24
+    heading_size: int = 14
+    body_size: int = 10
+    leading: float = 12
+    centered_header: bool = False
+    uppercase_headings: bool = True
+    bullet: str = "•"
+    sections: Tuple[str, ...] = SECTIONS
+
+
+@dataclass(frozen=True)
+class CompiledTemplate:
+    definition: TemplateDefinition
+    pdf_styles: Mapping[str, ParagraphStyle]
+    docx_styles: Mapping[str, Mapping]
+    docx_header_alignment: WD_PARAGRAPH_ALIGNMENT
+    section_titles: Mapping[str, str]
+    # Hash of the definition, so cached exports change with the template
+    fingerprint: str
+
+    @property
+    def name(self) -> str:
+        return self.definition.name
+
+
+def _validate(definition: TemplateDefinition):
+    if not re.fullmatch(r"[a-z0-9-]+", definition.name):
+        raise TemplateError(f"Invalid template name: {definition.name!r}")
+    if not re.fullmatch(r"#[0-9a-fA-F]{6}", definition.accent):
+        raise TemplateError(f"{definition.name}: accent must be a #rrggbb colour")
+    if definition.font not in FONT_FAMILIES:
+        raise TemplateError(f"{definition.name}: unknown font {definition.font!r}")
+    unknown = set(definition.sections) - set(SECTIONS)
+    if unknown or len(set(definition.sections)) != len(definition.sections):
+        raise TemplateError(f"{definition.name}: invalid section order {definition.sections}")
+    if not 6 <= definition.body_size <= definition.heading_size <= definition.name_size <= 40:
+        raise TemplateError(f"{definition.name}: font sizes must satisfy body <= heading <= name")
+
+
+def compile_template(definition: TemplateDefinition) -> CompiledTemplate:
+    """Validate a definition and build its immutable style sets"""
+    _validate(definition)
+    regular, bold, docx_font = FONT_FAMILIES[definition.font]
+    accent = colors.HexColor(definition.accent)
+    base = getSampleStyleSheet()['Normal']
+    alignment = TA_CENTER if definition.centered_header else TA_LEFT
+
+    def style(key, **kwargs):
+        options = dict(parent=base, fontName=regular, fontSize=definition.body_size, leading=definition.leading)
+        options.update(kwargs)
+        return ParagraphStyle(f"{definition.name}-{key}", **options)
+
+    pdf_styles = {
+        "name": style("name", fontName=bold, fontSize=definition.name_size, leading=definition.name_size * 1.2,
+                      textColor=accent, alignment=alignment, spaceAfter=12),
+        "contact": style("contact", alignment=alignment),
+        "heading": style("heading", fontName=bold, fontSize=definition.heading_size,
+                         leading=definition.heading_size * 1.2, textColor=accent, spaceBefore=12, spaceAfter=6),
+        "body": style("body"),
+        "bullet": style("bullet", leftIndent=10),
+    }
+
+    rgb = RGBColor.from_string(definition.accent[1:].upper())
+    docx_styles = {
+        "Normal": MappingProxyType({"font": docx_font, "size": Pt(definition.body_size), "color": None}),
+        "Title": MappingProxyType({"font": docx_font, "size": Pt(definition.name_size), "color": rgb}),
+        "Heading 1": MappingProxyType({"font": docx_font, "size": Pt(definition.heading_size), "color": rgb}),
+    }
+
+    titles = {
+        section: title.upper() if definition.uppercase_headings else title
+        for section, title in SECTION_TITLES.items()
+    }
+    return CompiledTemplate(
+        definition=definition,
+        pdf_styles=MappingProxyType(pdf_styles),
+        docx_styles=MappingProxyType(docx_styles),
+        docx_header_alignment=WD_PARAGRAPH_ALIGNMENT.CENTER if definition.centered_header else WD_PARAGRAPH_ALIGNMENT.LEFT,
+        section_titles=MappingProxyType(titles),
+        fingerprint=hashlib.sha256(repr(definition).encode("utf-8")).hexdigest()[:16],
+    )
+
+
+def _compile_cover_letter_styles() -> Mapping[str, ParagraphStyle]:
+    normal = getSampleStyleSheet()['Normal']
+    return MappingProxyType({
+        'Normal': normal,
+        'Name': ParagraphStyle('Name', parent=normal, fontSize=12, fontName='Helvetica-Bold'),
+        'Body': ParagraphStyle('Body', parent=normal, fontSize=11, leading=16),
+    })
+
+
+COVER_LETTER_STYLES = _compile_cover_letter_styles()
+
+_registry: Dict[str, CompiledTemplate] = {}
+
+
+def register(definition: TemplateDefinition) -> CompiledTemplate:
+    if definition.name in _registry:
+        raise TemplateError(f"Template already registered: {definition.name}")
+    compiled = compile_template(definition)
+    _registry[definition.name] = compiled
+    return compiled
+
+
+def get_template(name: str) -> CompiledTemplate:
+    """Compiled template by name, falling back to the default for unknown names"""
+    compiled = _registry.get(name)
+    if compiled is None:
+        logger.warning(f"Unknown export template {name!r}, using {DEFAULT_TEMPLATE}")
+        compiled = _registry[DEFAULT_TEMPLATE]
+    return compiled
+
+
+def template_names() -> Tuple[str, ...]:
+    return tuple(_registry)
+
+
+# Mirrors the templates offered in frontend/src/components/TemplateSelector.js
+for _definition in (
+    TemplateDefinition("professional"),
+    TemplateDefinition("two-column-sidebar", accent="#2563eb", sections=("summary", "skills", "experience", "education", "certifications", "languages")),
+    TemplateDefinition("modern-creative", accent="#8b5cf6", name_size=26, centered_header=True, uppercase_headings=False, bullet="›"),
+    TemplateDefinition("minimalist", accent="#6b7280", name_size=20, heading_size=12, uppercase_headings=False, bullet="–"),
+    TemplateDefinition("modern", accent="#1e40af"),
+    TemplateDefinition("minimal", accent="#64748b", name_size=20, heading_size=12, uppercase_headings=False, bullet="–"),
+    TemplateDefinition("creative", accent="#7c3aed", name_size=26, centered_header=True, uppercase_headings=False, bullet="›"),
+    TemplateDefinition("tech", accent="#059669", font="Courier", name_size=22, heading_size=13, sections=("summary", "skills", "experience", "education", "certifications", "languages")),
+    TemplateDefinition("elegant", accent="#991b1b", font="Times", body_size=11, leading=14, centered_header=True, uppercase_headings=False),
+    TemplateDefinition("healthcare", accent="#0284c7", sections=("summary", "certifications", "experience", "education", "skills", "languages")),
+    TemplateDefinition("academic", accent="#4f46e5", font="Times", body_size=11, leading=14, centered_header=True, sections=("summary", "education", "experience", "certifications", "skills", "languages")),
+    TemplateDefinition("marketing", accent="#dc2626", name_size=26, uppercase_headings=False, bullet="›"),
+    TemplateDefinition("finance", accent="#15803d", font="Times", body_size=11, leading=14),
+    TemplateDefinition("startup", accent="#ea580c", name_size=26, uppercase_headings=False, bullet="›", sections=("summary", "experience", "skills", "education", "certifications", "languages")),
+    TemplateDefinition("executive", accent="#1e293b", font="Times", name_size=26, heading_size=15, body_size=11, leading=14, centered_header=True),
+):
+    register(_definition)
@@ -0,0 +1,138 @@
+"""Text extraction for uploaded resumes.
+
+These functions run inside worker processes (see worker_pool.py), so this
+module must stay importable without the FastAPI app or database.
+
+PDFs are read one page at a time. PyPDF2 is tried first because it is much
+cheaper than pdfplumber; pdfplumber is only opened for pages whose PyPDF2
+output looks degraded. Extraction stops after ``max_pages`` pages or once
+``max_chars`` characters have been collected, which is more than the parser
+prompt ever needs.
+
+Uploads are passed in as the path of their spooled file, which is mapped
+into memory rather than read, so the worker never holds its own copy of the
+document. Bytes are accepted too, for callers that already have them.
+"""
+import io
+import logging
+import mmap
+import os
+from contextlib import ExitStack, closing, contextmanager
+from typing import BinaryIO, Iterator, Union
+
+import pdfplumber
+import PyPDF2
+from docx import Document as DocxReader
+
+logger = logging.getLogger(__name__)
+
+MAX_PAGES = int(os.environ.get('EXTRACTION_MAX_PAGES', '30'))
+MAX_CHARS = int(os.environ.get('EXTRACTION_MAX_CHARS', '60000'))
+
+PDF_ENGINES = ("auto", "pypdf2", "pdfplumber")
+
+
+class ExtractionError(Exception):
+    """Raised when a document cannot be read"""
+
+
+Source = Union[bytes, str]
+
+
+@contextmanager
+def open_document(source: Source) -> Iterator[BinaryIO]:
+    """File-like view of a document given as bytes or as a path to map"""
+    if isinstance(source, (bytes, bytearray)):
+        yield io.BytesIO(source)
+        return
+    with open(source, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            # Empty files cannot be mapped; let the parser reject them
+            yield io.BytesIO(b"")
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            yield mapped
+
+
+def looks_degraded(text: str) -> bool:
+    """Heuristic for PyPDF2 output that pdfplumber is likely to do better on"""
+    stripped = text.strip()
+    if len(stripped) < 20:
+        return True
+    # Undecodable glyphs from custom font encodings
+    bad = sum(1 for ch in stripped if ch == '\ufffd' or not (ch.isprintable() or ch.isspace()))
+    if bad / len(stripped) > 0.02:
+        return True
+    # Words run together because inter-word gaps were not turned into spaces
+    gaps = sum(1 for ch in stripped if ch.isspace())
+    if gaps / len(stripped) < 0.08:
+        return True
+    # One glyph per line, typical of rotated or absolutely-positioned text
+    lines = [line for line in stripped.splitlines() if line.strip()]
+    if len(lines) > 10 and sum(1 for line in lines if len(line.strip()) <= 2) / len(lines) > 0.5:
+        return True
+    return False
+
+
+def iter_pdf_pages(source: Source, max_pages: int = MAX_PAGES, engine: str = "auto") -> Iterator[str]:
+    """Yield the text of each PDF page in order, up to ``max_pages`` pages"""
+    if engine not in PDF_ENGINES:
+        raise ValueError(f"Unknown PDF engine: {engine}")
+
+    if engine == "pdfplumber":
+        with open_document(source) as document, pdfplumber.open(document) as pdf:
+            for page in pdf.pages[:max_pages]:
+                yield page.extract_text() or ""
+                # Drop the page's cached layout objects before moving on
+                page.close()
+        return
+
+    with ExitStack() as stack:
+        reader = PyPDF2.PdfReader(stack.enter_context(open_document(source)))
+        plumber = None
+        for index, page in enumerate(reader.pages):
+            if index >= max_pages:
+                break
+            text = page.extract_text() or ""
+            if engine == "auto" and looks_degraded(text):
+                if plumber is None:
+                    # A separate view of the file, so the two readers never share a position
+                    plumber = stack.enter_context(pdfplumber.open(stack.enter_context(open_document(source))))
+                plumber_page = plumber.pages[index]
+                fallback = plumber_page.extract_text() or ""
+                plumber_page.close()
+                if len(fallback.strip()) >= len(text.strip()):
+                    text = fallback
+            yield text
+
+
+def extract_text_from_pdf(source: Source, max_pages: int = MAX_PAGES,
+                          max_chars: int = MAX_CHARS, engine: str = "auto") -> str:
+    """Extract text from PDF file"""
+    try:
+        parts = []
+        collected = 0
+        # closing() releases the pdfplumber document as soon as we stop early
+        with closing(iter_pdf_pages(source, max_pages=max_pages, engine=engine)) as pages:
+            for text in pages:
+                parts.append(text)
+                parts.append("\n")
+                collected += len(text) + 1
+                if collected >= max_chars:
+                    break
+        return "".join(parts)[:max_chars]
+    except Exception as e:
+        logger.error(f"PDF extraction error: {str(e)}")
+        raise ExtractionError("Failed to extract text from PDF")
+
+
+def extract_text_from_docx(source: Source, max_chars: int = MAX_CHARS) -> str:
+    """Extract text from DOCX file"""
+    try:
+        with open_document(source) as docx_file:
+            doc = DocxReader(docx_file)
+            text = "".join(para.text + "\n" for para in doc.paragraphs)
+        return text[:max_chars]
+    except Exception as e:
+        logger.error(f"DOCX extraction error: {str(e)}")
+        raise ExtractionError("Failed to extract text from DOCX")
@@ -0,0 +1,194 @@
+"""HTTP validators, cache policies and response compression.
+
+Read routes tag their responses with an ETag and answer a matching
+``If-None-Match`` with 304 before doing the expensive part of the request,
+so a client polling an unchanged resume gets an empty response instead of
+the whole document (other methods get 412, as RFC 9110 requires). ``CompressionMiddleware`` gzip- or brotli-encodes
+complete JSON responses above a size threshold for clients that accept it.
+A compressed response is a different representation, so its ETag gets a
+``-br`` or ``-gzip`` suffix, which ``etag_matches`` ignores when comparing.
+"""
+import asyncio
+import gzip
+from typing import Dict, Iterable, Optional
+
+from fastapi.responses import Response
+
+from artifact_cache import artifact_key
+
+try:
+    import brotli
+except ImportError:  # gzip only
+    brotli = None
+
+# Cache-Control policies
+REVALIDATE = "private, no-cache"
+IMMUTABLE = "private, max-age=31536000, immutable"
+STATIC = "public, max-age=3600"
+NO_STORE = "private, no-store"
+
+SAFE_METHODS = frozenset(["GET", "HEAD"])
+
+CODING_SUFFIXES = ("-br", "-gzip")
+
+
+def strong_etag(*parts) -> str:
+    """ETag from a canonical hash of JSON-serialisable parts"""
+    return f'"{artifact_key(*parts)[:32]}"'
+
+
+def weak_etag(*parts) -> str:
+    """For output that is equivalent but not byte-identical across renders"""
+    return "W/" + strong_etag(*parts)
+
+
+def _opaque(tag: str) -> str:
+    tag = tag.strip()
+    if tag.startswith("W/"):
+        tag = tag[2:]
+    for suffix in CODING_SUFFIXES:
+        if tag.endswith(suffix + '"'):
+            return tag[:-len(suffix) - 1] + '"'
+    return tag
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison, as If-None-Match uses, ignoring content-coding suffixes"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    target = _opaque(etag)
+    return any(_opaque(candidate) == target for candidate in if_none_match.split(","))
+
+
+def set_validators(response: Response, etag: str, cache_control: str):
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = cache_control
+
+
+def not_modified(etag: str, cache_control: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": cache_control})
+
+
+def evaluate_if_none_match(method: str, if_none_match: Optional[str], etag: str,
+                           cache_control: str) -> Optional[Response]:
+    """The response a matching If-None-Match calls for, or None to carry on:
+    304 for GET and HEAD, 412 Precondition Failed for any other method"""
+    if not etag_matches(if_none_match, etag):
+        return None
+    if method.upper() in SAFE_METHODS:
+        return not_modified(etag, cache_control)
+    return Response(status_code=412, headers={"ETag": etag})
+
+
+def _accepted(accept_encoding: str) -> Dict[str, float]:
+    qualities = {}
+    for item in accept_encoding.split(","):
+        coding, _, params = item.strip().partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        qualities[coding] = quality
+    return qualities
+
+
+def choose_coding(accept_encoding: str) -> Optional[str]:
+    """"br" or "gzip", whichever the client prefers (br on a tie), or None"""
+    qualities = _accepted(accept_encoding)
+    fallback = qualities.get("*", 0.0)
+    best, best_quality = None, 0.0
+    for coding in ("br", "gzip"):
+        if coding == "br" and brotli is None:
+            continue
+        quality = qualities.get(coding, fallback)
+        if quality > best_quality:
+            best, best_quality = coding, quality
+    return best
+
+
+class CompressionMiddleware:
+    """ASGI middleware compressing complete responses of the given media types.
+
+    Streamed responses (SSE, NDJSON, anything sent in more than one body
+    message) pass through untouched, so events are never held back.
+    """
+
+    def __init__(self, app, minimum_size: int = 1024, media_types: Iterable[str] = ("application/json",),
+                 gzip_level: int = 6, brotli_quality: int = 4, thread_above: int = 256 * 1024):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.media_types = tuple(media_types)
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        # Compress bodies larger than this in a thread, off the event loop
+        self.thread_above = thread_above
+
+    def compress(self, coding: str, body: bytes) -> bytes:
+        if coding == "br":
+            return brotli.compress(body, quality=self.brotli_quality)
+        return gzip.compress(body, compresslevel=self.gzip_level)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        headers = dict(scope["headers"])
+        coding = choose_coding(headers.get(b"accept-encoding", b"").decode("latin-1"))
+        start = None
+        passthrough = False
+
+        async def send_wrapper(message):
+            nonlocal start, passthrough
+            if passthrough:
+                await send(message)
+                return
+            if message["type"] == "http.response.start":
+                response_headers = dict(message.get("headers", []))
+                media_type = response_headers.get(b"content-type", b"").split(b";")[0].decode("latin-1").strip()
+                if media_type not in self.media_types:
+                    passthrough = True
+                    await send(message)
+                    return
+                # The body may vary by Accept-Encoding even when this one is not compressed
+                message = {**message, "headers": [*message.get("headers", []), (b"vary", b"Accept-Encoding")]}
+                if coding is None or b"content-encoding" in response_headers:
+                    passthrough = True
+                    await send(message)
+                    return
+                start = message
+                return
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            if message.get("more_body", False) or len(body) < self.minimum_size:
+                passthrough = True
+                await send(start)
+                await send(message)
+                return
+            if len(body) > self.thread_above:
+                compressed = await asyncio.to_thread(self.compress, coding, body)
+            else:
+                compressed = self.compress(coding, body)
+            response_headers = []
+            for name, value in start.get("headers", []):
+                if name == b"content-length":
+                    continue
+                if name == b"etag" and value.endswith(b'"'):
+                    value = value[:-1] + f'-{coding}"'.encode("latin-1")
+                response_headers.append((name, value))
+            response_headers.append((b"content-encoding", coding.encode("latin-1")))
+            response_headers.append((b"content-length", str(len(compressed)).encode("latin-1")))
+            await send({**start, "headers": response_headers})
+            await send({"type": "http.response.body", "body": compressed})
+
+        await self.app(scope, receive, send_wrapper)
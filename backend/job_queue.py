@@ -0,0 +1,389 @@
+"""Durable queue for long-running AI operations.
+
+Clients submit a job and get its id straight away; a pool of asyncio workers
+claims jobs from a store, runs the registered handler and records the result
+on the job, which clients poll or watch. Several server processes can share
+one MongoDB store:
+
+* a claimed job carries a lease that the worker renews while it runs; when a
+  process dies its leases expire and another worker picks the job up again
+* failures are retried with exponential backoff up to ``max_attempts``, after
+  which the job is dead-lettered (status "dead") with its error history
+* errors the handler marks as permanent fail the job without retrying
+* a finished job keeps its result for ``result_ttl`` but drops its payload,
+  which can hold a whole upload and is never needed again
+
+``MemoryJobStore`` keeps the same semantics in one process, for tests and
+single-process deployments.
+"""
+import asyncio
+import copy
+import logging
+import random
+import uuid
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+from pymongo import ReturnDocument
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+DEAD = "dead"
+FINISHED = (SUCCEEDED, FAILED, DEAD)
+
+# Job fields clients see; payloads can hold whole uploads and stay internal
+PUBLIC_PROJECTION = {"_id": 0, "payload": 0, "leaseOwner": 0, "leaseExpiresAt": 0, "expireAt": 0}
+
+
+def _now() -> datetime:
+    return datetime.utcnow()
+
+
+def public_job(job: dict) -> dict:
+    return {key: value for key, value in job.items() if PUBLIC_PROJECTION.get(key, 1)}
+
+
+class MongoJobStore:
+    """Jobs as documents in one collection; finished jobs expire via a TTL index"""
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    async def ensure_indexes(self):
+        await self.collection.create_index("id", unique=True)
+        await self.collection.create_index([("status", 1), ("availableAt", 1)])
+        await self.collection.create_index([("status", 1), ("leaseExpiresAt", 1)])
+        await self.collection.create_index("expireAt", expireAfterSeconds=0)
+
+    async def insert(self, job: dict):
+        await self.collection.insert_one(dict(job))
+
+    async def get(self, job_id: str) -> Optional[dict]:
+        return await self.collection.find_one({"id": job_id}, PUBLIC_PROJECTION)
+
+    async def claim(self, owner: str, lease_until: datetime) -> Optional[dict]:
+        """Lease the oldest runnable job: queued and due, or running with an expired lease"""
+        now = _now()
+        return await self.collection.find_one_and_update(
+            {"$or": [
+                {"status": QUEUED, "availableAt": {"$lte": now}},
+                {"status": RUNNING, "leaseExpiresAt": {"$lt": now}},
+            ]},
+            {"$set": {"status": RUNNING, "leaseOwner": owner, "leaseExpiresAt": lease_until, "startedAt": now, "updatedAt": now},
+             "$inc": {"attempts": 1}},
+            projection={"_id": 0},
+            sort=[("availableAt", 1)],
+            return_document=ReturnDocument.AFTER,
+        )
+
+    async def update(self, job_id: str, owner: str, fields: dict, error: Optional[dict] = None) -> bool:
+        """Update a job only while ``owner`` still holds its lease"""
+        update: Dict[str, Any] = {"$set": {**fields, "updatedAt": _now()}}
+        if error is not None:
+            update["$push"] = {"errors": error}
+        result = await self.collection.update_one(
+            {"id": job_id, "status": RUNNING, "leaseOwner": owner}, update
+        )
+        return result.matched_count == 1
+
+    async def counts(self) -> Dict[str, int]:
+        return {status: await self.collection.count_documents({"status": status})
+                for status in (QUEUED, RUNNING, *FINISHED)}
+
+
+class MemoryJobStore:
+    """In-process store with the same semantics as ``MongoJobStore``"""
+
+    def __init__(self):
+        self.jobs: Dict[str, dict] = {}
+
+    async def ensure_indexes(self):
+        pass
+
+    def _prune(self):
+        now = _now()
+        for job_id in [job_id for job_id, job in self.jobs.items() if job.get("expireAt") and job["expireAt"] <= now]:
+            del self.jobs[job_id]
+
+    async def insert(self, job: dict):
+        self._prune()
+        self.jobs[job["id"]] = copy.deepcopy(job)
+
+    async def get(self, job_id: str) -> Optional[dict]:
+        job = self.jobs.get(job_id)
+        return public_job(copy.deepcopy(job)) if job is not None else None
+
+    async def claim(self, owner: str, lease_until: datetime) -> Optional[dict]:
+        now = _now()
+        runnable = [
+            job for job in self.jobs.values()
+            if (job["status"] == QUEUED and job["availableAt"] <= now)
+            or (job["status"] == RUNNING and job["leaseExpiresAt"] < now)
+        ]
+        if not runnable:
+            return None
+        job = min(runnable, key=lambda job: job["availableAt"])
+        job.update(status=RUNNING, leaseOwner=owner, leaseExpiresAt=lease_until, startedAt=now, updatedAt=now)
+        job["attempts"] += 1
+        return copy.deepcopy(job)
+
+    async def update(self, job_id: str, owner: str, fields: dict, error: Optional[dict] = None) -> bool:
+        job = self.jobs.get(job_id)
+        if job is None or job["status"] != RUNNING or job.get("leaseOwner") != owner:
+            return False
+        job.update(copy.deepcopy(fields), updatedAt=_now())
+        if error is not None:
+            job["errors"].append(error)
+        return True
+
+    async def counts(self) -> Dict[str, int]:
+        counts = {status: 0 for status in (QUEUED, RUNNING, *FINISHED)}
+        for job in self.jobs.values():
+            counts[job["status"]] += 1
+        return counts
+
+
+class PermanentJobError(Exception):
+    """Raised by handlers for failures that retrying cannot fix"""
+
+
+Handler = Callable[[dict], Awaitable[Any]]
+
+
+class JobQueue:
+    """Runs registered handlers for queued jobs on ``workers`` asyncio tasks.
+
+    ``is_permanent`` lets the caller mark further exception types as not
+    worth retrying, besides ``PermanentJobError``.
+    """
+
+    def __init__(self, store, workers: int = 4, lease_seconds: float = 60.0, max_attempts: int = 3,
+                 retry_base_delay: float = 5.0, retry_max_delay: float = 300.0, job_timeout: float = 300.0,
+                 poll_interval: float = 1.0, result_ttl: float = 86400.0,
+                 is_permanent: Optional[Callable[[Exception], bool]] = None):
+        self.store = store
+        self.workers = workers
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.retry_base_delay = retry_base_delay
+        self.retry_max_delay = retry_max_delay
+        self.job_timeout = job_timeout
+        self.poll_interval = poll_interval
+        self.result_ttl = result_ttl
+        self.is_permanent = is_permanent
+        self.instance = uuid.uuid4().hex[:8]
+        self._handlers: Dict[str, Handler] = {}
+        self._tasks: List[asyncio.Task] = []
+        self._wake = asyncio.Event()
+        self._watchers: Dict[str, List[asyncio.Event]] = defaultdict(list)
+        self.running = 0
+        self.submitted: Dict[str, int] = defaultdict(int)
+        self.succeeded: Dict[str, int] = defaultdict(int)
+        self.failed: Dict[str, int] = defaultdict(int)
+        self.retried: Dict[str, int] = defaultdict(int)
+        self.dead: Dict[str, int] = defaultdict(int)
+
+    def register(self, kind: str, handler: Handler):
+        self._handlers[kind] = handler
+
+    async def submit(self, kind: str, payload: dict) -> dict:
+        """Queue a job and return its public view"""
+        if kind not in self._handlers:
+            raise ValueError(f"No handler registered for job kind {kind}")
+        now = _now()
+        job = {
+            "id": str(uuid.uuid4()),
+            "kind": kind,
+            "status": QUEUED,
+            "payload": payload,
+            "result": None,
+            "errors": [],
+            "attempts": 0,
+            "maxAttempts": self.max_attempts,
+            "availableAt": now,
+            "createdAt": now,
+            "updatedAt": now,
+        }
+        await self.store.insert(job)
+        self.submitted[kind] += 1
+        self._wake.set()
+        return public_job(job)
+
+    async def get(self, job_id: str) -> Optional[dict]:
+        return await self.store.get(job_id)
+
+    async def watch(self, job_id: str) -> AsyncIterator[dict]:
+        """Yield the job each time its status changes, until it finishes.
+
+        Jobs run in this process wake watchers straight away; others are
+        picked up at the next poll.
+        """
+        last_status = None
+        while True:
+            job = await self.store.get(job_id)
+            if job is None:
+                return
+            if job["status"] != last_status:
+                last_status = job["status"]
+                yield job
+            if job["status"] in FINISHED:
+                return
+            changed = asyncio.Event()
+            self._watchers[job_id].append(changed)
+            try:
+                await asyncio.wait_for(changed.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            finally:
+                self._watchers[job_id].remove(changed)
+                if not self._watchers[job_id]:
+                    del self._watchers[job_id]
+
+    def _notify(self, job_id: str):
+        for changed in self._watchers.get(job_id, ()):
+            changed.set()
+
+    def start(self):
+        if not self._tasks:
+            self._tasks = [asyncio.create_task(self._work(f"{self.instance}:{n}")) for n in range(self.workers)]
+
+    async def stop(self):
+        """Stop the workers. Jobs they were running are picked up again once their lease expires"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _work(self, owner: str):
+        while True:
+            try:
+                job = await self.store.claim(owner, _now() + timedelta(seconds=self.lease_seconds))
+            except Exception as e:
+                logger.error(f"Job worker {owner} could not claim a job: {str(e)}")
+                job = None
+            if job is None:
+                self._wake.clear()
+                try:
+                    await asyncio.wait_for(self._wake.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            self.running += 1
+            try:
+                await self._run(owner, job)
+            except Exception as e:
+                # Store errors while recording the outcome; the lease expiring puts the job back
+                logger.error(f"Job {job['id']} could not be updated: {str(e)}")
+            finally:
+                self.running -= 1
+                self._notify(job["id"])
+
+    async def _heartbeat(self, owner: str, job_id: str, work: asyncio.Task):
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            lease_until = _now() + timedelta(seconds=self.lease_seconds)
+            try:
+                renewed = await self.store.update(job_id, owner, {"leaseExpiresAt": lease_until})
+            except Exception as e:
+                logger.warning(f"Could not renew the lease on job {job_id}: {str(e)}")
+                continue
+            if not renewed:
+                work.cancel()
+                return
+
+    async def _run(self, owner: str, job: dict):
+        kind = job["kind"]
+        self._notify(job["id"])
+        # Attempts are counted on claim, so a job whose lease kept expiring
+        # (say it crashes the process) also ends up dead-lettered
+        if job["attempts"] > job["maxAttempts"]:
+            await self._finish(owner, job, DEAD, {"message": "Lease expired on every attempt", "attempt": job["attempts"]})
+            return
+
+        handler = self._handlers.get(kind)
+        if handler is None:
+            await self._finish(owner, job, FAILED, {"message": f"Unknown job kind {kind}", "attempt": job["attempts"]})
+            return
+
+        work = asyncio.ensure_future(asyncio.wait_for(handler(job["payload"]), self.job_timeout))
+        heartbeat = asyncio.create_task(self._heartbeat(owner, job["id"], work))
+        failure = None
+        try:
+            result = await work
+        except asyncio.CancelledError:
+            if not heartbeat.done():
+                # The worker itself is being stopped
+                work.cancel()
+                raise
+            logger.warning(f"Lost the lease on job {job['id']}, abandoning it")
+            return
+        except Exception as e:
+            failure = e
+        finally:
+            heartbeat.cancel()
+        if failure is None:
+            await self._finish(owner, job, SUCCEEDED, result=result)
+        else:
+            await self._fail(owner, job, failure)
+
+    async def _fail(self, owner: str, job: dict, failure: Exception):
+        kind = job["kind"]
+        error = {"message": str(failure) or type(failure).__name__, "type": type(failure).__name__,
+                 "attempt": job["attempts"], "at": _now()}
+        if isinstance(failure, PermanentJobError) or (self.is_permanent and self.is_permanent(failure)):
+            await self._finish(owner, job, FAILED, error)
+        elif job["attempts"] >= job["maxAttempts"]:
+            logger.error(f"Job {job['id']} ({kind}) failed {job['attempts']} times, dead-lettering: {error['message']}")
+            await self._finish(owner, job, DEAD, error)
+        else:
+            delay = min(self.retry_max_delay, self.retry_base_delay * 2 ** (job["attempts"] - 1))
+            delay *= random.uniform(0.8, 1.2)
+            self.retried[kind] += 1
+            logger.warning(f"Job {job['id']} ({kind}) attempt {job['attempts']} failed, retrying in {delay:.1f}s: {error['message']}")
+            await self.store.update(job["id"], owner, {
+                "status": QUEUED,
+                "availableAt": _now() + timedelta(seconds=delay),
+                "leaseOwner": None,
+                "leaseExpiresAt": None,
+            }, error)
+
+    async def _finish(self, owner: str, job: dict, status: str, error: Optional[dict] = None, result: Any = None):
+        now = _now()
+        fields = {
+            "status": status,
+            "payload": None,
+            "result": result,
+            "finishedAt": now,
+            "leaseOwner": None,
+            "leaseExpiresAt": None,
+            "expireAt": now + timedelta(seconds=self.result_ttl),
+        }
+        if error is not None:
+            error.setdefault("at", now)
+        if not await self.store.update(job["id"], owner, fields, error):
+            logger.warning(f"Job {job['id']} finished after its lease was lost; result discarded")
+            return
+        {SUCCEEDED: self.succeeded, FAILED: self.failed, DEAD: self.dead}[status][job["kind"]] += 1
+
+    async def stats(self) -> dict:
+        kinds = set(self.submitted) | set(self.succeeded) | set(self.failed) | set(self.dead)
+        return {
+            "workers": self.workers,
+            "running": self.running,
+            "jobs": await self.store.counts(),
+            "kinds": {
+                kind: {
+                    "submitted": self.submitted[kind],
+                    "succeeded": self.succeeded[kind],
+                    "failed": self.failed[kind],
+                    "retried": self.retried[kind],
+                    "dead": self.dead[kind],
+                }
+                for kind in sorted(kinds | set(self.retried))
+            },
+        }
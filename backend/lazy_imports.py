@@ -0,0 +1,170 @@
+"""Deferred imports and per-module import timing.
+
+PDF parsing, export rendering and the LLM client libraries account for most
+of the server's import time but are only needed once a request uses them.
+The server imports them on first use with ``load``, which runs the import in
+a thread so the event loop keeps serving, and ``WarmUp`` loads them in the
+background shortly after startup so the first such request rarely waits.
+
+``ImportTimer`` sits at the front of ``sys.meta_path`` and records how long
+each module took to import, both in total and excluding the modules it
+imported in turn.
+"""
+import asyncio
+import importlib
+import logging
+import sys
+import threading
+import time
+from types import ModuleType
+from typing import Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+STARTED = time.perf_counter()
+
+
+def since_start() -> float:
+    """Seconds since this module was imported, i.e. since server startup began"""
+    return time.perf_counter() - STARTED
+
+
+class _TimedLoader:
+    """Wraps a module's loader for the duration of its import"""
+
+    def __init__(self, loader, timer: "ImportTimer"):
+        self.loader = loader
+        self.timer = timer
+
+    def __getattr__(self, name):
+        return getattr(self.loader, name)
+
+    def create_module(self, spec):
+        return self.loader.create_module(spec)
+
+    def exec_module(self, module: ModuleType):
+        # Put the real loader back before the module's code can look at it
+        module.__loader__ = self.loader
+        if module.__spec__ is not None:
+            module.__spec__.loader = self.loader
+        self.timer.time_exec(self.loader, module)
+
+
+class ImportTimer:
+    """Meta path finder recording import time per module"""
+
+    def __init__(self):
+        # module name -> (seconds including nested imports, seconds excluding them)
+        self.modules: Dict[str, Tuple[float, float]] = {}
+        self._local = threading.local()
+
+    def install(self):
+        if self not in sys.meta_path:
+            sys.meta_path.insert(0, self)
+
+    def find_spec(self, fullname, path, target=None):
+        for finder in sys.meta_path:
+            if finder is self:
+                continue
+            find_spec = getattr(finder, "find_spec", None)
+            if find_spec is None:
+                continue
+            spec = find_spec(fullname, path, target)
+            if spec is not None:
+                break
+        else:
+            return None
+        if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+            spec.loader = _TimedLoader(spec.loader, self)
+        return spec
+
+    def time_exec(self, loader, module: ModuleType):
+        # Imports run on whichever thread asked for them, so nesting is tracked per thread
+        stack: List[float] = self._local.__dict__.setdefault("stack", [])
+        stack.append(0.0)
+        started = time.perf_counter()
+        try:
+            loader.exec_module(module)
+        finally:
+            elapsed = time.perf_counter() - started
+            nested = stack.pop()
+            if stack:
+                stack[-1] += elapsed
+            self.modules[module.__name__] = (elapsed, elapsed - nested)
+
+    def slowest(self, limit: int = 20) -> List[dict]:
+        """Modules with the largest import time of their own"""
+        rows = sorted(self.modules.items(), key=lambda item: item[1][1], reverse=True)[:limit]
+        return [
+            {"module": name, "selfMs": round(own * 1000, 2), "cumulativeMs": round(total * 1000, 2)}
+            for name, (total, own) in rows
+        ]
+
+    def stats(self, limit: int = 20) -> dict:
+        return {
+            "modules": len(self.modules),
+            "totalMs": round(sum(own for _, own in self.modules.values()) * 1000, 2),
+            "slowest": self.slowest(limit),
+        }
+
+
+import_timer = ImportTimer()
+
+
+def _loaded(module: Optional[ModuleType]) -> bool:
+    # A module is in sys.modules from the moment its code starts running
+    return module is not None and not getattr(getattr(module, "__spec__", None), "_initializing", False)
+
+
+async def load(name: str) -> ModuleType:
+    """Import a module without blocking the event loop.
+
+    A module another thread is still importing (e.g. during warm-up) is
+    waited for in a thread, on the import system's per-module lock, rather
+    than returned half-initialised.
+    """
+    module = sys.modules.get(name)
+    if _loaded(module):
+        return module
+    return await asyncio.to_thread(importlib.import_module, name)
+
+
+class WarmUp:
+    """Imports heavy modules in the background once the server is up"""
+
+    def __init__(self, names: Sequence[str], delay: float = 1.0):
+        self.names = list(names)
+        self.delay = delay
+        self.seconds: Dict[str, float] = {}
+        self.failed: List[str] = []
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self._task is None and self.names:
+            self._task = asyncio.create_task(self._run())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+
+    async def _run(self):
+        # Give the server a moment to start accepting connections first
+        await asyncio.sleep(self.delay)
+        for name in self.names:
+            started = time.perf_counter()
+            try:
+                await load(name)
+            except Exception as e:
+                logger.warning(f"Warm-up import of {name} failed: {str(e)}")
+                self.failed.append(name)
+                continue
+            self.seconds[name] = time.perf_counter() - started
+        total = sum(self.seconds.values())
+        logger.info(f"Warmed up {len(self.seconds)} modules in {total:.2f}s")
+
+    def stats(self) -> dict:
+        return {
+            "done": self._task is not None and self._task.done(),
+            "modulesMs": {name: round(seconds * 1000, 2) for name, seconds in self.seconds.items()},
+            "failed": self.failed,
+        }
@@ -0,0 +1,138 @@
+import hashlib
+import logging
+import os
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Default time-to-live per AI endpoint, in seconds. Cover letters are
+# creative output, so repeats are only served for a short while.
+DEFAULT_TTLS = {
+    "ats_analysis": 24 * 3600,
+    "skills_extract": 7 * 24 * 3600,
+    "resume_parse": 7 * 24 * 3600,
+    "resume_parse_section": 7 * 24 * 3600,
+    "cover_letter": 15 * 60,
+}
+
+
+# X-Cache-Bypass values that skip the cache; anything else, "0" and "false" included, uses it
+BYPASS_VALUES = frozenset(["1", "true", "yes", "on"])
+
+
+def cache_enabled(x_cache_bypass: Optional[str]) -> bool:
+    """Whether a request with this X-Cache-Bypass header may use the LLM cache"""
+    return (x_cache_bypass or "").strip().lower() not in BYPASS_VALUES
+
+
+def ttl_for(endpoint: str) -> int:
+    """TTL in seconds for an endpoint, overridable via LLM_CACHE_TTL_<ENDPOINT>"""
+    override = os.environ.get(f"LLM_CACHE_TTL_{endpoint.upper()}")
+    if override:
+        return int(override)
+    return DEFAULT_TTLS.get(endpoint, 3600)
+
+
+class LlmCache:
+    """Content-addressed cache for LLM responses.
+
+    Lookups go to an in-process LRU first and then to a MongoDB collection
+    whose documents expire through a TTL index on ``expiresAt``.
+    """
+
+    def __init__(self, collection, max_entries: int = 512):
+        self.collection = collection
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self.hits: Dict[str, int] = {}
+        self.misses: Dict[str, int] = {}
+
+    @staticmethod
+    def make_key(model: str, system_message: str, prompt: str) -> str:
+        digest = hashlib.sha256()
+        for part in (model, system_message, prompt):
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\x00")
+        return digest.hexdigest()
+
+    async def ensure_indexes(self):
+        await self.collection.create_index("expiresAt", expireAfterSeconds=0)
+
+    async def get(self, endpoint: str, key: str) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            response, expires_at = entry
+            if expires_at > time.time():
+                self._entries.move_to_end(key)
+                self._count(self.hits, endpoint)
+                return response
+            del self._entries[key]
+
+        try:
+            doc = await self.collection.find_one({"_id": key})
+        except Exception as e:
+            logger.warning(f"LLM cache lookup failed: {str(e)}")
+            doc = None
+
+        # MongoDB only sweeps expired documents periodically, so check here too
+        if doc and doc["expiresAt"] > datetime.utcnow():
+            expires_at = time.time() + (doc["expiresAt"] - datetime.utcnow()).total_seconds()
+            self._remember(key, doc["response"], expires_at)
+            self._count(self.hits, endpoint)
+            return doc["response"]
+
+        self._count(self.misses, endpoint)
+        return None
+
+    async def set(self, endpoint: str, key: str, response: str):
+        ttl = ttl_for(endpoint)
+        if ttl <= 0:
+            return
+        self._remember(key, response, time.time() + ttl)
+        now = datetime.utcnow()
+        try:
+            await self.collection.replace_one(
+                {"_id": key},
+                {
+                    "_id": key,
+                    "endpoint": endpoint,
+                    "response": response,
+                    "createdAt": now,
+                    "expiresAt": now + timedelta(seconds=ttl),
+                },
+                upsert=True,
+            )
+        except Exception as e:
+            logger.warning(f"LLM cache write failed: {str(e)}")
+
+    async def delete(self, key: str):
+        """Drop an entry from both tiers, e.g. one that no longer decodes"""
+        self._entries.pop(key, None)
+        try:
+            await self.collection.delete_one({"_id": key})
+        except Exception as e:
+            logger.warning(f"LLM cache delete failed: {str(e)}")
+
+    def stats(self) -> dict:
+        endpoints = sorted(set(self.hits) | set(self.misses))
+        return {
+            "entries": len(self._entries),
+            "maxEntries": self.max_entries,
+            "endpoints": {
+                name: {"hits": self.hits.get(name, 0), "misses": self.misses.get(name, 0)}
+                for name in endpoints
+            },
+        }
+
+    def _remember(self, key: str, response: str, expires_at: float):
+        self._entries[key] = (response, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    @staticmethod
+    def _count(counter: Dict[str, int], endpoint: str):
+        counter[endpoint] = counter.get(endpoint, 0) + 1
@@ -0,0 +1,478 @@
+"""Single entry point for every LLM call the API makes.
+
+The gateway owns the provider clients, the response cache and the limits
+that keep bursts from tripping provider rate limits:
+
+* one OpenAI client (and its HTTP connection pool) is shared by all calls
+  when OPENAI_API_KEY is set; otherwise each call goes through an
+  ``LlmChat``, which keeps per-session history and so cannot be reused.
+  Either client library is imported on the first call, not at startup
+* a global concurrency limit plus a limit per endpoint, both served in
+  priority order so interactive requests overtake queued batch work
+* exponential backoff with jitter on 429/5xx/connection errors, never
+  sleeping past the caller's deadline
+* ``decode_json`` as the one place replies are unwrapped and decoded
+"""
+import asyncio
+import heapq
+import itertools
+import json
+import logging
+import os
+import random
+import sys
+import time
+import uuid
+from collections import defaultdict
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+import lazy_imports
+import metrics
+from llm_cache import LlmCache
+
+logger = logging.getLogger(__name__)
+
+# Priority lanes; lower values are served first
+INTERACTIVE = 0
+BATCH = 1
+
+DEFAULT_ENDPOINT_CONCURRENCY = {
+    "ats_analysis": 4,
+    "cover_letter": 4,
+    "resume_parse": 4,
+    "resume_parse_section": 12,
+    "skills_extract": 4,
+}
+
+RETRYABLE_STATUS = frozenset([408, 409, 429, 500, 502, 503, 504])
+
+
+class LlmResponseError(ValueError):
+    """Raised when an LLM reply is not the JSON the caller asked for"""
+
+
+class LlmDeadlineExceeded(asyncio.TimeoutError):
+    """Raised when a call cannot finish before its deadline"""
+
+
+def decode_json(response: str) -> Any:
+    """Decode an LLM reply as JSON, removing a markdown code fence if present"""
+    text = response.strip()
+    if text.startswith('```'):
+        lines = text.split('\n')
+        text = '\n'.join(lines[1:-1]) if len(lines) > 2 else text
+        if text.startswith('json'):
+            text = text[4:].strip()
+    try:
+        return json.loads(text)
+    except ValueError as e:
+        raise LlmResponseError(f"LLM reply is not valid JSON: {e}") from e
+
+
+def endpoint_concurrency(endpoint: str) -> int:
+    """Concurrency limit for an endpoint, overridable with LLM_CONCURRENCY_<ENDPOINT>"""
+    override = os.environ.get(f"LLM_CONCURRENCY_{endpoint.upper()}")
+    if override:
+        return int(override)
+    return DEFAULT_ENDPOINT_CONCURRENCY.get(endpoint, 4)
+
+
+class PriorityLimiter:
+    """Semaphore that hands free slots to the highest-priority waiter first.
+
+    ``lane_limits`` optionally caps how many slots a lower-priority lane may
+    hold at once, so batch work always leaves room for interactive calls.
+    """
+
+    def __init__(self, limit: int, lane_limits: Optional[Dict[int, int]] = None):
+        self.limit = limit
+        self.lane_limits = lane_limits or {}
+        self.active = 0
+        self._active_by_lane: Dict[int, int] = defaultdict(int)
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._sequence = itertools.count()
+
+    def _can_enter(self, lane: int) -> bool:
+        lane_limit = self.lane_limits.get(lane)
+        return self.active < self.limit and (lane_limit is None or self._active_by_lane[lane] < lane_limit)
+
+    def _enter(self, lane: int):
+        self.active += 1
+        self._active_by_lane[lane] += 1
+
+    @property
+    def waiting(self) -> int:
+        return sum(1 for _, _, future in self._waiters if not future.done())
+
+    async def acquire(self, lane: int):
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (lane, next(self._sequence), future))
+        # Admits this caller at once if a slot is free, unless a higher-priority waiter takes it first
+        self._wake()
+        try:
+            await future
+        except asyncio.CancelledError:
+            # A slot granted just as the waiter was cancelled must be passed on
+            if future.done() and not future.cancelled():
+                self.release(lane)
+            raise
+
+    def release(self, lane: int):
+        self.active -= 1
+        self._active_by_lane[lane] -= 1
+        self._wake()
+
+    def _wake(self):
+        # Admit waiters in priority order, passing over any whose lane is at
+        # its cap so a capped batch lane never holds up other lanes
+        blocked = []
+        while self._waiters and self.active < self.limit:
+            entry = heapq.heappop(self._waiters)
+            lane, _, future = entry
+            if future.done():
+                continue
+            if self._can_enter(lane):
+                self._enter(lane)
+                future.set_result(None)
+            else:
+                blocked.append(entry)
+        for entry in blocked:
+            heapq.heappush(self._waiters, entry)
+
+
+def _status_code(error: Exception) -> Optional[int]:
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    return status if isinstance(status, int) else None
+
+
+def _retryable(error: Exception) -> bool:
+    if isinstance(error, asyncio.TimeoutError):
+        return True
+    # An OpenAI error can only have been raised once the library was imported
+    openai = sys.modules.get("openai")
+    if openai is not None and isinstance(error, openai.APIConnectionError):
+        return True
+    status = _status_code(error)
+    if status is not None:
+        return status in RETRYABLE_STATUS
+    # LlmChat wraps provider errors; fall back to the message it carries
+    message = str(error).lower()
+    return "rate limit" in message or "429" in message or "overloaded" in message
+
+
+def _retry_after(error: Exception) -> Optional[float]:
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+class LlmGateway:
+    def __init__(
+        self,
+        cache: LlmCache,
+        provider: str,
+        model: str,
+        max_concurrency: int,
+        batch_concurrency: int,
+        max_retries: int,
+        retry_base_delay: float,
+        retry_max_delay: float,
+        default_timeout: float
+    ):
+        self.cache = cache
+        self.provider = provider
+        self.model = model
+        self.max_retries = max_retries
+        self.retry_base_delay = retry_base_delay
+        self.retry_max_delay = retry_max_delay
+        self.default_timeout = default_timeout
+        self._limiter = PriorityLimiter(max_concurrency, {BATCH: batch_concurrency})
+        self._endpoint_limiters: Dict[str, PriorityLimiter] = {}
+        self.use_openai = bool(os.environ.get('OPENAI_API_KEY'))
+        self._openai = None
+        self.calls: Dict[str, int] = defaultdict(int)
+        self.retries: Dict[str, int] = defaultdict(int)
+        self.failures: Dict[str, int] = defaultdict(int)
+
+    def _endpoint_limiter(self, endpoint: str) -> PriorityLimiter:
+        limiter = self._endpoint_limiters.get(endpoint)
+        if limiter is None:
+            limit = endpoint_concurrency(endpoint)
+            # Batch calls queue for a global slot while holding an endpoint slot,
+            # so keep one endpoint slot free for interactive calls to get past them
+            limiter = PriorityLimiter(limit, {BATCH: max(1, limit - 1)})
+            self._endpoint_limiters[endpoint] = limiter
+        return limiter
+
+    def _deadline(self, deadline: Optional[float]) -> float:
+        return deadline if deadline is not None else time.monotonic() + self.default_timeout
+
+    async def _acquire(self, endpoint: str, lane: int, deadline: float):
+        # Endpoint slot first, so a saturated endpoint never sits on global slots
+        endpoint_limiter = self._endpoint_limiter(endpoint)
+        await self._wait(endpoint_limiter.acquire(lane), deadline)
+        try:
+            await self._wait(self._limiter.acquire(lane), deadline)
+        except BaseException:
+            endpoint_limiter.release(lane)
+            raise
+
+    def _release(self, endpoint: str, lane: int):
+        self._limiter.release(lane)
+        self._endpoint_limiter(endpoint).release(lane)
+
+    @staticmethod
+    async def _wait(awaitable, deadline: float):
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            if asyncio.iscoroutine(awaitable):
+                awaitable.close()
+            raise LlmDeadlineExceeded("LLM deadline passed before the call started")
+        try:
+            return await asyncio.wait_for(awaitable, remaining)
+        except asyncio.TimeoutError as e:
+            raise LlmDeadlineExceeded("LLM call did not finish before its deadline") from e
+
+    @property
+    def client_module(self) -> str:
+        """The client library calls go through, for warming it up ahead of the first call"""
+        return "openai" if self.use_openai else "emergentintegrations.llm.chat"
+
+    async def _openai_client(self):
+        if self._openai is None:
+            openai = await lazy_imports.load("openai")
+            # Retries are handled here so they can respect deadlines and lanes
+            self._openai = openai.AsyncOpenAI(api_key=os.environ['OPENAI_API_KEY'], max_retries=0)
+        return self._openai
+
+    async def _chat_send(self, endpoint: str, system_message: str, prompt: str) -> str:
+        chat = await lazy_imports.load("emergentintegrations.llm.chat")
+        session = chat.LlmChat(
+            api_key=os.environ.get('EMERGENT_LLM_KEY'),
+            session_id=f"{endpoint}_{uuid.uuid4().hex[:8]}",
+            system_message=system_message
+        ).with_model(self.provider, self.model)
+        return await session.send_message(chat.UserMessage(text=prompt))
+
+    def _messages(self, system_message: str, prompt: str) -> list:
+        return [{"role": "system", "content": system_message}, {"role": "user", "content": prompt}]
+
+    async def _send(self, endpoint: str, system_message: str, prompt: str) -> str:
+        if not self.use_openai:
+            response = await self._chat_send(endpoint, system_message, prompt)
+            metrics.record_llm_call(endpoint, system_message + prompt, response)
+            return response
+        client = await self._openai_client()
+        completion = await client.chat.completions.create(
+            model=self.model, messages=self._messages(system_message, prompt)
+        )
+        response = completion.choices[0].message.content or ""
+        usage = completion.usage
+        metrics.record_llm_call(
+            endpoint, system_message + prompt, response,
+            usage.prompt_tokens if usage else None, usage.completion_tokens if usage else None
+        )
+        return response
+
+    async def _backoff(self, endpoint: str, attempt: int, error: Exception, deadline: float):
+        """Sleep before the next attempt, or re-raise if retrying is pointless"""
+        if attempt >= self.max_retries or not _retryable(error):
+            raise error
+        delay = _retry_after(error)
+        if delay is None:
+            delay = min(self.retry_max_delay, self.retry_base_delay * 2 ** attempt) * random.uniform(0.5, 1.0)
+        if time.monotonic() + delay >= deadline:
+            raise error
+        self.retries[endpoint] += 1
+        logger.warning(f"LLM call for {endpoint} failed ({error}), retrying in {delay:.1f}s")
+        await asyncio.sleep(delay)
+
+    async def complete(
+        self,
+        endpoint: str,
+        system_message: str,
+        prompt: str,
+        use_cache: bool = True,
+        lane: int = INTERACTIVE,
+        deadline: Optional[float] = None
+    ) -> str:
+        """Reply text for a prompt, from the cache or the provider.
+
+        ``use_cache=False`` neither reads nor writes the cache.
+        """
+        return (await self._complete(endpoint, system_message, prompt, use_cache, lane, deadline, decode=False))[0]
+
+    async def complete_json(
+        self,
+        endpoint: str,
+        system_message: str,
+        prompt: str,
+        use_cache: bool = True,
+        lane: int = INTERACTIVE,
+        deadline: Optional[float] = None
+    ) -> Any:
+        """Decoded JSON reply for a prompt; only replies that decode are cached"""
+        return (await self._complete(endpoint, system_message, prompt, use_cache, lane, deadline, decode=True))[1]
+
+    async def _complete(self, endpoint, system_message, prompt, use_cache, lane, deadline, decode) -> Tuple[str, Any]:
+        cache_key = LlmCache.make_key(self.model, system_message, prompt)
+        if use_cache:
+            hit = await self._cached(endpoint, cache_key, self._decode if decode else None)
+            if hit is not None:
+                return hit
+
+        deadline = self._deadline(deadline)
+        with metrics.stage("llm_queue"):
+            await self._acquire(endpoint, lane, deadline)
+        try:
+            with metrics.stage("llm"):
+                attempt = 0
+                while True:
+                    self.calls[endpoint] += 1
+                    try:
+                        response = await self._wait(self._send(endpoint, system_message, prompt), deadline)
+                        break
+                    except Exception as e:
+                        await self._backoff(endpoint, attempt, e, deadline)
+                        attempt += 1
+        except Exception:
+            self.failures[endpoint] += 1
+            raise
+        finally:
+            self._release(endpoint, lane)
+
+        result = self._decode(response) if decode else None
+        if use_cache:
+            await self.cache.set(endpoint, cache_key, response)
+        return response, result
+
+    async def _cached(self, endpoint: str, cache_key: str, check) -> Optional[Tuple[str, Any]]:
+        """(reply, check(reply)) for a cached reply, or None on a miss.
+
+        A cached reply that ``check`` rejects is deleted and treated as a
+        miss, so one bad entry costs a fresh call rather than failing every
+        request for it until it expires.
+        """
+        cached = await self.cache.get(endpoint, cache_key)
+        if cached is None:
+            return None
+        try:
+            result = check(cached) if check is not None else None
+        except Exception as e:
+            logger.warning(f"Discarding cached {endpoint} reply that does not validate: {str(e)}")
+            await self.cache.delete(cache_key)
+            return None
+        logger.info(f"LLM cache hit for {endpoint}")
+        return cached, result
+
+    @staticmethod
+    def _decode(response: str) -> Any:
+        with metrics.stage("json_decode"):
+            return decode_json(response)
+
+    async def stream(
+        self,
+        endpoint: str,
+        system_message: str,
+        prompt: str,
+        use_cache: bool = True,
+        lane: int = INTERACTIVE,
+        deadline: Optional[float] = None,
+        validate: Optional[Callable[[str], Any]] = None
+    ) -> AsyncIterator[str]:
+        """Yield the reply as it is generated.
+
+        Streams from the OpenAI API when OPENAI_API_KEY is set; otherwise the
+        complete reply is yielded as a single chunk. Failures are retried only
+        until the first chunk has been sent.
+
+        A streamed reply may be cut short or malformed, so it is cached only
+        when ``validate`` accepts the whole of it (returns without raising),
+        and never without a ``validate``. Cached replies are checked the same
+        way before they are replayed.
+        """
+        cache_key = LlmCache.make_key(self.model, system_message, prompt)
+        if use_cache and validate is not None:
+            hit = await self._cached(endpoint, cache_key, validate)
+            if hit is not None:
+                yield hit[0]
+                return
+
+        if not self.use_openai:
+            response, _ = await self._complete(endpoint, system_message, prompt, False, lane, deadline, decode=False)
+            yield response
+            await self._cache_validated(endpoint, cache_key, response, use_cache, validate)
+            return
+
+        deadline = self._deadline(deadline)
+        client = await self._openai_client()
+        chunks: List[str] = []
+        with metrics.stage("llm_queue"):
+            await self._acquire(endpoint, lane, deadline)
+        started = time.perf_counter()
+        try:
+            attempt = 0
+            while True:
+                self.calls[endpoint] += 1
+                try:
+                    stream = await self._wait(client.chat.completions.create(
+                        model=self.model, messages=self._messages(system_message, prompt), stream=True
+                    ), deadline)
+                    break
+                except Exception as e:
+                    await self._backoff(endpoint, attempt, e, deadline)
+                    attempt += 1
+            try:
+                async for chunk in stream:
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        chunks.append(chunk.choices[0].delta.content)
+                        yield chunk.choices[0].delta.content
+            finally:
+                await stream.close()
+        except Exception:
+            self.failures[endpoint] += 1
+            raise
+        finally:
+            self._release(endpoint, lane)
+            metrics.record_stage("llm", time.perf_counter() - started)
+
+        # Only complete replies reach this point; abandoned streams are never cached
+        response = "".join(chunks)
+        metrics.record_llm_call(endpoint, system_message + prompt, response)
+        await self._cache_validated(endpoint, cache_key, response, use_cache, validate)
+
+    async def _cache_validated(self, endpoint: str, cache_key: str, response: str, use_cache: bool,
+                               validate: Optional[Callable[[str], Any]]):
+        if not use_cache or validate is None:
+            return
+        try:
+            validate(response)
+        except Exception as e:
+            logger.warning(f"Not caching streamed {endpoint} reply that does not validate: {str(e)}")
+            return
+        await self.cache.set(endpoint, cache_key, response)
+
+    def stats(self) -> dict:
+        endpoints = set(self.calls) | set(self._endpoint_limiters)
+        return {
+            "backend": "openai" if self.use_openai else "llmchat",
+            "maxConcurrency": self._limiter.limit,
+            "batchConcurrency": self._limiter.lane_limits.get(BATCH),
+            "active": self._limiter.active,
+            "waiting": self._limiter.waiting,
+            "endpoints": {
+                endpoint: {
+                    "maxConcurrency": self._endpoint_limiter(endpoint).limit,
+                    "active": self._endpoint_limiter(endpoint).active,
+                    "waiting": self._endpoint_limiter(endpoint).waiting,
+                    "calls": self.calls[endpoint],
+                    "retries": self.retries[endpoint],
+                    "failures": self.failures[endpoint],
+                }
+                for endpoint in sorted(endpoints)
+            },
+        }
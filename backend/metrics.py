@@ -0,0 +1,183 @@
+"""Prometheus metrics and per-request stage timings.
+
+``MetricsMiddleware`` times every request by route template. Code that does
+measurable work wraps it in ``stage(name)``; each stage is observed in a
+histogram and, for the request it ran under, collected so the middleware can
+report the breakdown in a ``Server-Timing`` header. Every LLM-backed
+endpoint records ``prompt_build`` and ``validate`` around its model call,
+alongside ``upload_read``, ``extract``, ``render`` and ``json_decode`` where
+they apply. MongoDB commands are timed by a driver listener, so every
+collection access is covered without touching the call sites.
+"""
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Histogram, generate_latest
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from pymongo import monitoring
+
+registry = CollectorRegistry()
+
+REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route",
+    ["method", "route", "status"], registry=registry,
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60),
+)
+STAGE_SECONDS = Histogram(
+    "stage_duration_seconds", "Time spent in each processing stage",
+    ["stage"], registry=registry,
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60),
+)
+MONGO_SECONDS = Histogram(
+    "mongo_command_duration_seconds", "MongoDB command latency",
+    ["command"], registry=registry,
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5),
+)
+LLM_TOKENS = Counter(
+    "llm_tokens", "LLM tokens, as reported by the provider or estimated from characters",
+    ["endpoint", "kind"], registry=registry,
+)
+LLM_MESSAGE_CHARS = Histogram(
+    "llm_message_chars", "Size of LLM prompts and responses in characters",
+    ["endpoint", "kind"], registry=registry,
+    buckets=(256, 1024, 2048, 4096, 8192, 16384, 32768, 65536, 131072),
+)
+UPLOAD_BYTES = Histogram(
+    "upload_bytes", "Size of uploaded resume files",
+    registry=registry,
+    buckets=(16384, 65536, 262144, 1048576, 4194304, 16777216),
+)
+
+# Rough size of a token in characters, used when the provider reports no usage
+CHARS_PER_TOKEN = 4
+
+_stages: ContextVar[Optional[List[Tuple[str, float]]]] = ContextVar("stages", default=None)
+
+
+def record_stage(name: str, seconds: float):
+    STAGE_SECONDS.labels(name).observe(seconds)
+    stages = _stages.get()
+    if stages is not None:
+        stages.append((name, seconds))
+
+
+@contextmanager
+def stage(name: str):
+    """Time a block as one stage of the current request"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(name, time.perf_counter() - started)
+
+
+def record_llm_call(endpoint: str, prompt: str, response: str,
+                    prompt_tokens: Optional[int] = None, completion_tokens: Optional[int] = None):
+    LLM_MESSAGE_CHARS.labels(endpoint, "prompt").observe(len(prompt))
+    LLM_MESSAGE_CHARS.labels(endpoint, "response").observe(len(response))
+    if prompt_tokens is None:
+        prompt_tokens = len(prompt) // CHARS_PER_TOKEN
+    if completion_tokens is None:
+        completion_tokens = len(response) // CHARS_PER_TOKEN
+    LLM_TOKENS.labels(endpoint, "prompt").inc(prompt_tokens)
+    LLM_TOKENS.labels(endpoint, "completion").inc(completion_tokens)
+
+
+def server_timing(stages: Iterable[Tuple[str, float]]) -> str:
+    """Server-Timing header value, summing repeated stages"""
+    totals: Dict[str, float] = {}
+    for name, seconds in stages:
+        totals[name] = totals.get(name, 0.0) + seconds
+    return ", ".join(f"{name};dur={seconds * 1000:.1f}" for name, seconds in totals.items())
+
+
+class MongoCommandListener(monitoring.CommandListener):
+    """Times MongoDB commands. Motor runs them on threads with the caller's
+    context, so they also count towards the request's mongo stage."""
+
+    def started(self, event):
+        pass
+
+    def _finished(self, event):
+        seconds = event.duration_micros / 1e6
+        MONGO_SECONDS.labels(event.command_name).observe(seconds)
+        record_stage("mongo", seconds)
+
+    def succeeded(self, event):
+        self._finished(event)
+
+    def failed(self, event):
+        self._finished(event)
+
+
+class StatsCollector:
+    """Exposes the counters the caches, pools and gateway already keep.
+
+    ``read`` is called on every scrape and returns (name, help, type, labels,
+    rows) tuples, where type is "counter" or "gauge" and rows are
+    (label values, value) pairs.
+    """
+
+    def __init__(self, read: Callable[[], Iterable[tuple]]):
+        self.read = read
+
+    def collect(self):
+        for name, documentation, kind, labels, rows in self.read():
+            family_type = CounterMetricFamily if kind == "counter" else GaugeMetricFamily
+            family = family_type(name, documentation, labels=labels)
+            for values, value in rows:
+                family.add_metric(values, value)
+            yield family
+
+
+def register_stats(read):
+    registry.register(StatsCollector(read))
+
+
+def render() -> Tuple[bytes, str]:
+    """(body, content type) for the /metrics endpoint"""
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording request latency per route template and
+    adding the request's stage timings as a Server-Timing header.
+
+    The header is written with the response headers, so stages that run
+    while a streamed body is being sent are only in the histograms.
+    """
+
+    def __init__(self, app, add_server_timing: bool = True):
+        self.app = app
+        self.add_server_timing = add_server_timing
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        stages: List[Tuple[str, float]] = []
+        token = _stages.set(stages)
+        started = time.perf_counter()
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if self.add_server_timing:
+                    total = ("total", time.perf_counter() - started)
+                    headers = list(message.get("headers", []))
+                    headers.append((b"server-timing", server_timing([*stages, total]).encode("latin-1")))
+                    message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _stages.reset(token)
+            route = scope.get("route")
+            # Unmatched paths share one label so scanners cannot blow up cardinality
+            path = getattr(route, "path", None) or "unmatched"
+            REQUEST_SECONDS.labels(scope["method"], path, str(status)).observe(time.perf_counter() - started)
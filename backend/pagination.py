@@ -0,0 +1,84 @@
+import base64
+import json
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+# Listing projection used when no fields= selector is given
+SUMMARY_FIELDS = ["id", "name", "template", "updatedAt"]
+
+# Short names accepted by fields= in place of full document paths
+FIELD_ALIASES = {
+    "name": "resumeData.personalInfo.fullName",
+    "email": "resumeData.personalInfo.email",
+}
+
+SELECTABLE_ROOTS = {"id", "template", "createdAt", "updatedAt", "resumeData"}
+
+
+def encode_cursor(updated_at: datetime, resume_id: str) -> str:
+    payload = json.dumps({"u": updated_at.isoformat(), "i": resume_id}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    """Inverse of encode_cursor; raises ValueError on anything malformed"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return datetime.fromisoformat(payload["u"]), str(payload["i"])
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+
+def after_cursor(cursor: Optional[str]) -> dict:
+    """Filter for documents after ``cursor`` in (updatedAt desc, id desc) order"""
+    if not cursor:
+        return {}
+    updated_at, resume_id = decode_cursor(cursor)
+    return {"$or": [
+        {"updatedAt": {"$lt": updated_at}},
+        {"updatedAt": updated_at, "id": {"$lt": resume_id}},
+    ]}
+
+
+def parse_fields(fields: Optional[str]) -> List[str]:
+    """Split a fields= selector into output names, validating each path"""
+    if not fields:
+        return list(SUMMARY_FIELDS)
+    selected = []
+    for name in (part.strip() for part in fields.split(",")):
+        if not name:
+            continue
+        path = FIELD_ALIASES.get(name, name)
+        if path.split(".")[0] not in SELECTABLE_ROOTS:
+            raise ValueError(f"Unknown field: {name}")
+        selected.append(name)
+    return selected
+
+
+def build_projection(selected: List[str]) -> dict:
+    # id and updatedAt are always needed to build the next cursor
+    projection = {"_id": 0, "id": 1, "updatedAt": 1}
+    paths = {FIELD_ALIASES.get(name, name) for name in selected}
+    for path in paths:
+        # MongoDB rejects a projection that names both a path and its parent
+        if not any(path.startswith(other + ".") for other in paths):
+            projection[path] = 1
+    return projection
+
+
+def shape_item(doc: dict, selected: List[str]) -> dict:
+    """Flatten aliased fields; other selected paths keep their nested shape"""
+    item = {}
+    for name in selected:
+        path = FIELD_ALIASES.get(name)
+        if path is None:
+            root = name.split(".")[0]
+            if root in doc:
+                item[root] = doc[root]
+            continue
+        value = doc
+        for key in path.split("."):
+            value = value.get(key) if isinstance(value, dict) else None
+        item[name] = value if value is not None else ""
+    return item
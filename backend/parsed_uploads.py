@@ -0,0 +1,78 @@
+import hashlib
+import logging
+from datetime import datetime
+from typing import Optional
+
+from pymongo.errors import DuplicateKeyError
+
+logger = logging.getLogger(__name__)
+
+
+def sha256_hex(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def text_fingerprint(text: str) -> str:
+    """Hash of extracted text with whitespace normalised, so re-exports of the same CV match"""
+    return sha256_hex(" ".join(text.split()).encode("utf-8"))
+
+
+def parser_version(*parts: str) -> str:
+    """Short hash of everything that shapes parser output (prompt, system message, model)"""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\x00")
+    return digest.hexdigest()[:16]
+
+
+class ParsedUploadStore:
+    """Stored results of /api/parse-resume, looked up by file hash then text hash.
+
+    There is one entry per extracted text and parser version, listing every
+    file hash that text came from, so re-exports of the same CV share it.
+    Every entry carries the parser version it was produced with, so changing
+    the prompt or model makes older entries invisible without a migration.
+    """
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    async def ensure_indexes(self):
+        await self.collection.create_index([("textHash", 1), ("version", 1)], unique=True)
+        # Multikey: no file hash may appear in two entries of the same version
+        await self.collection.create_index([("fileHashes", 1), ("version", 1)], unique=True)
+
+    async def find_by_file(self, file_hash: str, version: str) -> Optional[dict]:
+        return await self._find({"fileHashes": file_hash, "version": version})
+
+    async def find_by_text(self, text_hash: str, version: str) -> Optional[dict]:
+        return await self._find({"textHash": text_hash, "version": version})
+
+    async def save(self, file_hash: str, text: str, resume_data: dict, version: str):
+        text_hash = text_fingerprint(text)
+        update = {
+            "$set": {"text": text, "resumeData": resume_data, "updatedAt": datetime.utcnow()},
+            "$addToSet": {"fileHashes": file_hash},
+            "$setOnInsert": {"createdAt": datetime.utcnow()},
+        }
+        try:
+            try:
+                await self.collection.update_one({"textHash": text_hash, "version": version}, update, upsert=True)
+            except DuplicateKeyError:
+                # Lost an upsert race for this text, or the file is listed under
+                # text extracted differently before; move it here and retry once
+                await self.collection.update_many(
+                    {"fileHashes": file_hash, "version": version, "textHash": {"$ne": text_hash}},
+                    {"$pull": {"fileHashes": file_hash}},
+                )
+                await self.collection.update_one({"textHash": text_hash, "version": version}, update, upsert=True)
+        except Exception as e:
+            logger.warning(f"Failed to store parsed upload: {str(e)}")
+
+    async def _find(self, query: dict) -> Optional[dict]:
+        try:
+            return await self.collection.find_one(query, {"_id": 0})
+        except Exception as e:
+            logger.warning(f"Parsed upload lookup failed: {str(e)}")
+            return None
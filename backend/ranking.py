@@ -0,0 +1,168 @@
+"""Rank many stored resumes against one job description without the LLM.
+
+Resumes are reduced to hashed term counts (the same stemmed 1-2 word terms
+ats_scoring uses), laid out back to back as one sparse CSR-style matrix.
+TF-IDF weights, document norms and every similarity score are then single
+vectorised NumPy operations over that matrix. Hashing keeps the vocabulary
+fixed, so features for a resume are computed once and cached until it
+changes.
+"""
+import zlib
+from collections import Counter, OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ats_scoring import Keyword, extract_keywords, match_keywords, resume_text, text_ngrams
+
+HASH_BITS = 20
+HASH_DIM = 1 << HASH_BITS
+RANK_NGRAM = 2
+
+
+def term_index(term: str) -> int:
+    """Stable hashed column for a term (the same in every process)"""
+    return zlib.crc32(term.encode("utf-8")) & (HASH_DIM - 1)
+
+
+@dataclass
+class Features:
+    """Hashed term counts for one document, indices sorted and unique"""
+    indices: np.ndarray
+    counts: np.ndarray
+
+    @property
+    def nbytes(self) -> int:
+        return self.indices.nbytes + self.counts.nbytes
+
+
+def text_features(text: str, max_n: int = RANK_NGRAM) -> Features:
+    counts = Counter(term_index(term) for term, _, _ in text_ngrams(text, max_n))
+    indices = np.fromiter(counts.keys(), dtype=np.int32, count=len(counts))
+    values = np.fromiter(counts.values(), dtype=np.float32, count=len(counts))
+    order = np.argsort(indices)
+    return Features(indices[order], values[order])
+
+
+def resume_features(resume: dict) -> Features:
+    """Features of a ResumeData dict"""
+    return text_features(resume_text(resume))
+
+
+class FeatureCache:
+    """LRU of resume features keyed by id, invalidated by updatedAt, bounded by bytes"""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, Tuple[datetime, str, Features]]" = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, resume_id: str, updated_at: datetime) -> Optional[Tuple[str, Features]]:
+        entry = self._entries.get(resume_id)
+        if entry is None or entry[0] != updated_at:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(resume_id)
+        self.hits += 1
+        return entry[1], entry[2]
+
+    def put(self, resume_id: str, updated_at: datetime, name: str, features: Features):
+        if resume_id in self._entries:
+            self.size -= self._entries.pop(resume_id)[2].nbytes
+        self._entries[resume_id] = (updated_at, name, features)
+        self.size += features.nbytes
+        while self.size > self.max_bytes and self._entries:
+            _, (_, _, evicted) = self._entries.popitem(last=False)
+            self.size -= evicted.nbytes
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "bytes": self.size,
+            "maxBytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+def _segment_sums(values: np.ndarray, indptr: np.ndarray) -> np.ndarray:
+    """Sum ``values`` over each row of a CSR layout, giving 0 for empty rows"""
+    sums = np.zeros(len(indptr) - 1, dtype=np.float64)
+    starts = indptr[:-1]
+    nonempty = indptr[1:] > starts
+    if values.size:
+        sums[nonempty] = np.add.reduceat(values, starts[nonempty])
+    return sums
+
+
+def similarities(query: Features, documents: Sequence[Features]) -> np.ndarray:
+    """Cosine similarity of TF-IDF vectors between a query and every document.
+
+    IDF is taken over the candidate set itself, so terms shared by every
+    candidate do not separate them.
+    """
+    count = len(documents)
+    lengths = np.fromiter((doc.indices.size for doc in documents), dtype=np.int64, count=count)
+    indptr = np.zeros(count + 1, dtype=np.int64)
+    np.cumsum(lengths, out=indptr[1:])
+    if not indptr[-1] or not query.indices.size:
+        return np.zeros(count)
+    indices = np.concatenate([doc.indices for doc in documents])
+    counts = np.concatenate([doc.counts for doc in documents])
+
+    df = np.bincount(indices, minlength=HASH_DIM)
+    idf = np.log((1 + count) / (1 + df)) + 1
+    weights = (1 + np.log(counts)) * idf[indices]
+    norms = np.sqrt(_segment_sums(weights * weights, indptr))
+
+    query_vector = np.zeros(HASH_DIM)
+    query_vector[query.indices] = (1 + np.log(query.counts)) * idf[query.indices]
+    query_norm = np.linalg.norm(query_vector)
+
+    dots = _segment_sums(weights * query_vector[indices], indptr)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        scores = dots / (norms * query_norm)
+    return np.nan_to_num(scores)
+
+
+def top_k(scores: np.ndarray, k: int) -> List[int]:
+    """Indices of the k highest scores, best first"""
+    if k >= scores.size:
+        return list(np.argsort(-scores, kind="stable"))
+    best = np.argpartition(-scores, k)[:k]
+    return list(best[np.argsort(-scores[best], kind="stable")])
+
+
+def keyword_coverage(keywords: List[Keyword], features: Features) -> Tuple[int, List[str], List[str]]:
+    """(weighted coverage 0-100, matched, missing) of job keywords in a document"""
+    present = set(features.indices.tolist())
+    matched, missing, matched_weight, total_weight = match_keywords(
+        keywords, lambda term: term_index(term) in present
+    )
+    score = round(100 * matched_weight / total_weight) if total_weight else 0
+    return score, matched, missing
+
+
+def job_keywords(job_description: str) -> List[Keyword]:
+    """Job keywords that ranking can check, i.e. no longer than RANK_NGRAM words;
+    longer phrases are replaced by the words folded into them"""
+    keywords = []
+    for keyword in extract_keywords(job_description):
+        if keyword.term.count(" ") < RANK_NGRAM:
+            keywords.append(keyword)
+        else:
+            keywords.extend(keyword.parts)
+    return keywords
+
+
+def stored_resume_features(docs: List[dict]) -> List[Tuple[str, datetime, str, Features]]:
+    """(id, updatedAt, name, features) for stored resume documents"""
+    return [
+        (doc['id'], doc.get('updatedAt'), doc['resumeData'].get('personalInfo', {}).get('fullName', ''),
+         resume_features(doc['resumeData']))
+        for doc in docs
+    ]
@@ -0,0 +1,206 @@
+"""PDF and DOCX rendering for exports.
+
+Renderers run inside worker processes (see worker_pool.py), so they take
+plain dicts and return bytes, and this module must stay importable without
+the FastAPI app or database. Layouts and styles come from the compiled
+registry in export_templates.py. Bump RENDERER_VERSION whenever output
+changes so cached artifacts are not served for the old layout; ``export_key``
+already covers edits to a template definition.
+"""
+import io
+from datetime import date
+from typing import Optional
+
+from docx import Document
+from reportlab.lib.pagesizes import letter
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
+from reportlab.lib.units import inch
+
+from artifact_cache import artifact_key
+from export_templates import COVER_LETTER_STYLES, CompiledTemplate, get_template
+
+RENDERER_VERSION = "2"
+
+
+def export_key(kind: str, *args, template: Optional[str] = None) -> str:
+    """Artifact cache key: renderer version, the template actually used and the render inputs"""
+    fingerprint = get_template(template).fingerprint if template is not None else None
+    return artifact_key(kind, RENDERER_VERSION, fingerprint, *args)
+
+
+def _date_range(exp: dict) -> str:
+    return f"{exp['startDate']} - {'Present' if exp.get('current') else exp.get('endDate', '')}"
+
+
+def _contact_text(info: dict) -> str:
+    contact_text = f"{info['email']} | {info['phone']}"
+    if info.get('location'):
+        contact_text += f" | {info['location']}"
+    return contact_text
+
+
+def _pdf_section(story: list, section: str, data: dict, template: CompiledTemplate):
+    styles = template.pdf_styles
+    bullet_char = template.definition.bullet
+    story.append(Paragraph(template.section_titles[section], styles['heading']))
+    if section == "summary":
+        story.append(Paragraph(data['summary'], styles['body']))
+        story.append(Spacer(1, 12))
+    elif section == "experience":
+        for exp in data['experience']:
+            story.append(Paragraph(f"<b>{exp['title']}</b> - {exp['company']}", styles['body']))
+            story.append(Paragraph(_date_range(exp), styles['body']))
+            for bullet in exp.get('bullets', []):
+                if bullet:
+                    story.append(Paragraph(f"{bullet_char} {bullet}", styles['bullet']))
+            story.append(Spacer(1, 8))
+    elif section == "education":
+        for edu in data['education']:
+            story.append(Paragraph(f"<b>{edu['degree']}</b> - {edu['school']} ({edu['graduationDate']})", styles['body']))
+            story.append(Spacer(1, 8))
+    elif section == "skills":
+        story.append(Paragraph(", ".join(data['skills']), styles['body']))
+    elif section == "certifications":
+        for cert in data['certifications']:
+            cert_text = f"{cert['name']} - {cert['issuer']}"
+            if cert.get('date'):
+                cert_text += f" ({cert['date']})"
+            story.append(Paragraph(f"{bullet_char} {cert_text}", styles['bullet']))
+    elif section == "languages":
+        for lang in data['languages']:
+            story.append(Paragraph(f"{bullet_char} {lang['language']}: {lang['proficiency']}", styles['bullet']))
+
+
+def render_resume_pdf(data: dict, template_name: str) -> bytes:
+    """Render resume data as a PDF in the named template"""
+    template = get_template(template_name)
+    styles = template.pdf_styles
+    buffer = io.BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=letter, topMargin=0.5*inch, bottomMargin=0.5*inch)
+    story = []
+
+    info = data['personalInfo']
+    story.append(Paragraph(info['fullName'], styles['name']))
+    story.append(Spacer(1, 6))
+    story.append(Paragraph(_contact_text(info), styles['contact']))
+    story.append(Spacer(1, 12))
+
+    for section in template.definition.sections:
+        if data.get(section):
+            _pdf_section(story, section, data, template)
+
+    doc.build(story)
+    return buffer.getvalue()
+
+
+def _apply_docx_styles(doc, template: CompiledTemplate):
+    for style_name, spec in template.docx_styles.items():
+        font = doc.styles[style_name].font
+        font.name = spec['font']
+        font.size = spec['size']
+        if spec['color'] is not None:
+            font.color.rgb = spec['color']
+
+
+def render_resume_docx(data: dict, template_name: str) -> bytes:
+    """Render resume data as a DOCX document in the named template"""
+    template = get_template(template_name)
+    doc = Document()
+    _apply_docx_styles(doc, template)
+    info = data['personalInfo']
+
+    name_para = doc.add_heading(info['fullName'], 0)
+    name_para.alignment = template.docx_header_alignment
+    contact_para = doc.add_paragraph(_contact_text(info))
+    contact_para.alignment = template.docx_header_alignment
+
+    for section in template.definition.sections:
+        if not data.get(section):
+            continue
+        doc.add_heading(template.section_titles[section], 1)
+        if section == "summary":
+            doc.add_paragraph(data['summary'])
+        elif section == "experience":
+            for exp in data['experience']:
+                job_para = doc.add_paragraph()
+                job_para.add_run(f"{exp['title']}").bold = True
+                job_para.add_run(f" - {exp['company']}")
+                doc.add_paragraph(_date_range(exp))
+                for bullet in exp.get('bullets', []):
+                    if bullet:
+                        doc.add_paragraph(bullet, style='List Bullet')
+        elif section == "education":
+            for edu in data['education']:
+                edu_para = doc.add_paragraph()
+                edu_para.add_run(edu['degree']).bold = True
+                edu_para.add_run(f" - {edu['school']} ({edu['graduationDate']})")
+        elif section == "skills":
+            doc.add_paragraph(", ".join(data['skills']))
+        elif section == "certifications":
+            for cert in data['certifications']:
+                cert_text = f"{cert['name']} - {cert['issuer']}"
+                if cert.get('date'):
+                    cert_text += f" ({cert['date']})"
+                doc.add_paragraph(cert_text, style='List Bullet')
+        elif section == "languages":
+            for lang in data['languages']:
+                doc.add_paragraph(f"{lang['language']}: {lang['proficiency']}", style='List Bullet')
+
+    buffer = io.BytesIO()
+    doc.save(buffer)
+    return buffer.getvalue()
+
+
+def render_cover_letter_pdf(request: dict, today: str) -> bytes:
+    """Render a cover letter as a PDF dated ``today``"""
+    buffer = io.BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=letter, topMargin=inch, bottomMargin=inch, leftMargin=inch, rightMargin=inch)
+    story = []
+    styles = COVER_LETTER_STYLES
+    name_style = styles['Name']
+    body_style = styles['Body']
+
+    # Personal info
+    personal_info = request.get('personalInfo', {})
+    name_text = personal_info.get('fullName', '')
+    contact_text = f"{personal_info.get('email', '')} | {personal_info.get('phone', '')} | {personal_info.get('location', '')}"
+
+    story.append(Paragraph(name_text, name_style))
+    story.append(Paragraph(contact_text, styles['Normal']))
+    story.append(Spacer(1, 0.3*inch))
+
+    # Date
+    story.append(Paragraph(today, styles['Normal']))
+    story.append(Spacer(1, 0.2*inch))
+
+    # Company info
+    company_name = request.get('companyName', '')
+    company_address = request.get('companyAddress', '')
+    job_title = request.get('jobTitle', '')
+    if company_name:
+        story.append(Paragraph(f"<b>{company_name}</b>", styles['Normal']))
+    if company_address:
+        story.append(Paragraph(company_address, styles['Normal']))
+    if job_title:
+        story.append(Spacer(1, 0.2*inch))
+        story.append(Paragraph(f"Re: {job_title}", styles['Normal']))
+    story.append(Spacer(1, 0.3*inch))
+
+    # Cover letter content
+    content = request.get('content', '')
+    paragraphs = content.split('\n\n')
+    for para in paragraphs:
+        if para.strip():
+            story.append(Paragraph(para.strip(), body_style))
+            story.append(Spacer(1, 0.2*inch))
+
+    # Signature
+    story.append(Spacer(1, 0.3*inch))
+    story.append(Paragraph(f"Yours sincerely,<br/>{name_text}", styles['Normal']))
+
+    doc.build(story)
+    return buffer.getvalue()
+
+
+def cover_letter_date() -> str:
+    return date.today().strftime("%d %B %Y")
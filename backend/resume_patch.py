@@ -0,0 +1,202 @@
+"""Partial updates for stored resumes.
+
+PATCH bodies come in two shapes:
+
+* JSON Patch (RFC 6902) ``add`` / ``replace`` / ``remove`` / ``test``
+  operations, e.g. ``{"op": "add", "path": "/resumeData/skills/-", "value": "Go"}``
+* a field-path diff, e.g. ``{"set": {"resumeData.summary": "..."},
+  "push": {"resumeData.skills": "Go"}, "unset": ["resumeData.personalInfo.photo"]}``
+
+Both are normalised to one operation list, applied to a copy of the stored
+document so the result can be validated, and translated into a single
+MongoDB ``$set``/``$push``/``$unset`` update.
+"""
+import copy
+from typing import Any, Dict, List, Optional, Tuple
+
+PATCHABLE_ROOTS = {"resumeData", "template"}
+
+
+class PatchError(ValueError):
+    """Raised for malformed or unsupported patch operations"""
+
+
+class PatchNotApplicable(PatchError):
+    """Raised for well-formed operations the stored document does not allow:
+    a missing path, an array index out of range or a failed ``test``"""
+
+
+# An operation is (op, path, value) where path is a list of keys/indices
+Operation = Tuple[str, List[Any], Any]
+
+
+def _pointer_tokens(pointer: str) -> List[str]:
+    if not pointer.startswith("/"):
+        raise PatchError(f"Invalid JSON pointer: {pointer}")
+    return [token.replace("~1", "/").replace("~0", "~") for token in pointer[1:].split("/")]
+
+
+def _path_tokens(path: List[str]) -> List[Any]:
+    tokens = [int(token) if token.isdigit() else token for token in path]
+    if not tokens or tokens[0] not in PATCHABLE_ROOTS:
+        raise PatchError(f"Path is not patchable: {'/'.join(map(str, path))}")
+    return tokens
+
+
+def normalise(operations: Optional[List[dict]] = None, set_fields: Optional[Dict[str, Any]] = None,
+              push_fields: Optional[Dict[str, Any]] = None, unset_fields: Optional[List[str]] = None) -> List[Operation]:
+    """Turn either patch format into a list of (op, path, value)"""
+    ops: List[Operation] = []
+    for operation in operations or []:
+        op = operation.get("op")
+        if op not in ("add", "replace", "remove", "test"):
+            raise PatchError(f"Unsupported operation: {op}")
+        if op != "remove" and "value" not in operation:
+            raise PatchError(f"{op} requires a value")
+        tokens = _pointer_tokens(operation.get("path", ""))
+        if op == "add" and tokens[-1] == "-":
+            ops.append(("push", _path_tokens(tokens[:-1]), operation["value"]))
+        else:
+            ops.append((op, _path_tokens(tokens), operation.get("value")))
+    for path, value in (set_fields or {}).items():
+        ops.append(("set", _path_tokens(path.split(".")), value))
+    for path, value in (push_fields or {}).items():
+        ops.append(("push", _path_tokens(path.split(".")), value))
+    for path in unset_fields or []:
+        ops.append(("remove", _path_tokens(path.split(".")), None))
+    if not ops:
+        raise PatchError("Patch contains no operations")
+    return ops
+
+
+def _parent(doc: Any, path: List[Any]) -> Any:
+    node = doc
+    for key in path[:-1]:
+        try:
+            node = node[key]
+        except (KeyError, IndexError, TypeError):
+            raise PatchNotApplicable(f"Path does not exist: {'.'.join(map(str, path))}")
+    return node
+
+
+def _check_index(key: Any, path: List[Any], upper: int):
+    if not isinstance(key, int) or not 0 <= key <= upper:
+        raise PatchNotApplicable(f"Array index out of range: {'.'.join(map(str, path))}")
+
+
+def apply(doc: dict, ops: List[Operation]) -> dict:
+    """Apply operations to a deep copy of ``doc`` and return it.
+
+    ``add`` inserts before an array index (or appends at the array's
+    length), ``replace`` and ``remove`` need the target to exist, and
+    ``set`` (from field-path diffs) creates or overwrites it.
+    """
+    patched = copy.deepcopy(doc)
+    for op, path, value in ops:
+        if op == "push":
+            target = _parent(patched, path + [None])
+            if not isinstance(target, list):
+                raise PatchNotApplicable(f"Cannot append to non-list: {'.'.join(map(str, path))}")
+            target.append(value)
+            continue
+        parent = _parent(patched, path)
+        key = path[-1]
+        if isinstance(parent, list):
+            _check_index(key, path, len(parent) if op == "add" else len(parent) - 1)
+        elif not isinstance(parent, dict):
+            raise PatchNotApplicable(f"Path does not exist: {'.'.join(map(str, path))}")
+        elif op in ("replace", "remove", "test") and key not in parent:
+            raise PatchNotApplicable(f"Path does not exist: {'.'.join(map(str, path))}")
+
+        if op == "test":
+            if parent[key] != value:
+                raise PatchNotApplicable(f"Test failed: {'.'.join(map(str, path))}")
+        elif op == "add" and isinstance(parent, list):
+            parent.insert(key, value)
+        elif op in ("add", "replace", "set"):
+            parent[key] = value
+        else:
+            del parent[key]
+    return patched
+
+
+def _dotted(path: List[Any]) -> str:
+    return ".".join(str(token) for token in path)
+
+
+def _overlaps(a: List[Any], b: List[Any]) -> bool:
+    shorter = min(len(a), len(b))
+    return a[:shorter] == b[:shorter]
+
+
+def _lookup(doc: dict, path: List[Any]) -> Any:
+    # Raises KeyError/IndexError when the path no longer exists
+    node = doc
+    for key in path:
+        node = node[key]
+    return node
+
+
+def to_update(ops: List[Operation], patched: dict) -> dict:
+    """Build a MongoDB update document equivalent to ``ops``.
+
+    MongoDB cannot insert or remove an array element by index, nor touch overlapping
+    paths with different operators in one update. Those cases are collapsed
+    into a ``$set`` of the enclosing value taken from the patched document.
+    """
+    entries = []
+    for op, path, value in ops:
+        if op == "test":
+            continue
+        if op in ("add", "remove") and isinstance(path[-1], int):
+            # Inserting or removing shifts the elements after it: set the whole array
+            entries.append(("set", path[:-1]))
+        elif op in ("add", "replace"):
+            entries.append(("set", path))
+        else:
+            entries.append((op, path))
+
+    changed = True
+    while changed:
+        changed = False
+        for i in range(len(entries)):
+            for j in range(i + 1, len(entries)):
+                (op_a, path_a), (op_b, path_b) = entries[i], entries[j]
+                if not _overlaps(path_a, path_b):
+                    continue
+                if op_a == op_b and path_a == path_b:
+                    del entries[j]
+                else:
+                    common = []
+                    for a, b in zip(path_a, path_b):
+                        if a != b:
+                            break
+                        common.append(a)
+                    # Never collapse further than a top-level field
+                    common = common or path_a[:1]
+                    entries[i] = ("set", common)
+                    del entries[j]
+                changed = True
+                break
+            if changed:
+                break
+
+    update: Dict[str, dict] = {}
+    for op, path in entries:
+        if op == "push":
+            continue
+        if op == "set":
+            try:
+                update.setdefault("$set", {})[_dotted(path)] = _lookup(patched, path)
+                continue
+            except (KeyError, IndexError):
+                # A collapsed entry whose value a later operation removed
+                pass
+        update.setdefault("$unset", {})[_dotted(path)] = ""
+    pushes: Dict[str, list] = {}
+    for op, path, value in ops:
+        if op == "push" and ("push", path) in entries:
+            pushes.setdefault(_dotted(path), []).append(value)
+    for dotted, values in pushes.items():
+        update.setdefault("$push", {})[dotted] = {"$each": values}
+    return update
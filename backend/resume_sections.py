@@ -0,0 +1,203 @@
+"""Split extracted resume text into sections and token-bounded chunks.
+
+Headings are recognised as short lines matching known titles ("Work
+Experience", "EDUCATION", "Technical Skills:"). Everything before the first
+heading is treated as contact details. Sections that have no ResumeData
+field (publications, references, interests...) are dropped, which keeps long
+academic CVs from spending tokens on text that would be thrown away.
+
+Long experience and education sections are split between entries, never
+inside one, since a chunk holding half an entry cannot be parsed on its own.
+"""
+import re
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+# Sections that become their own prompts, in the order results are merged
+SECTIONS = ("profile", "experience", "education", "skills", "certifications", "languages")
+
+HEADINGS = {
+    "profile": r"(professional |personal |career )?(summary|profile|statement)|about me|objective|career objective",
+    "experience": r"((work|professional|employment|career|relevant|research|teaching|industry|clinical|academic) )?"
+                  r"(experience|history|employment)|employment history|work history|positions held|appointments|"
+                  r"academic appointments|career history",
+    "education": r"education( and training| & training)?|academic (background|qualifications)|qualifications",
+    "skills": r"((technical|key|core|professional|relevant) )?(skills|competencies|expertise)( and (tools|technologies))?|"
+              r"technologies|tools and technologies|skills (and|&) interests",
+    "certifications": r"certifications?|certificates|licen[cs]es( (and|&) certifications)?|accreditations|"
+                      r"professional (development|memberships|qualifications)",
+    "languages": r"languages?( skills)?",
+    "other": r"publications|selected publications|presentations|conferences|grants|funding|awards|honou?rs|"
+             r"awards (and|&) honou?rs|references|referees|interests|hobbies|volunteering|volunteer experience|"
+             r"projects|personal projects|memberships|activities|patents|supervision|teaching",
+}
+
+_HEADING_RES = {section: re.compile(rf"(?:{pattern})", re.IGNORECASE) for section, pattern in HEADINGS.items()}
+
+MAX_HEADING_WORDS = 5
+
+BULLET_RE = re.compile(r"^([•·▪●○◦*\-–]|\d{1,2}[.)]\s)")
+# A year or an open-ended range marks the header line of an entry
+DATE_RE = re.compile(r"\b(19|20)\d{2}\b|\b(present|current|now)\b", re.IGNORECASE)
+
+# Rough size of a token in characters, for budgeting without a tokenizer
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def heading_section(line: str) -> Optional[str]:
+    """Section a line introduces, or None if it is not a heading"""
+    title = line.strip().strip(":").strip()
+    title = re.sub(r"^[^\w]+|[^\w)]+$", "", title)
+    if not title or len(title.split()) > MAX_HEADING_WORDS:
+        return None
+    for section, pattern in _HEADING_RES.items():
+        if pattern.fullmatch(title):
+            return section
+    return None
+
+
+def segment(text: str) -> Dict[str, str]:
+    """Section name to text. Repeated sections are joined; "contact" holds the preamble"""
+    parts: Dict[str, List[str]] = {"contact": []}
+    current = "contact"
+    for line in text.splitlines():
+        section = heading_section(line)
+        if section is not None:
+            current = section
+            parts.setdefault(current, [])
+            continue
+        parts[current].append(line)
+    return {section: "\n".join(lines).strip() for section, lines in parts.items() if "\n".join(lines).strip()}
+
+
+def split_entries(text: str) -> List[str]:
+    """Split a list section into its entries (one job, one degree...).
+
+    An entry starts at a non-bullet line that follows a blank line or a
+    bullet. When the section has dates, a block without one is a description
+    paragraph and stays with the entry before it.
+    """
+    lines = text.splitlines()
+    starts: List[int] = []
+    previous = "blank"
+    for index, line in enumerate(lines):
+        stripped = line.strip()
+        if not stripped:
+            previous = "blank"
+            continue
+        bullet = bool(BULLET_RE.match(stripped))
+        if not starts or (not bullet and previous in ("blank", "bullet")):
+            starts.append(index)
+        previous = "bullet" if bullet else "text"
+    blocks = ["\n".join(lines[start:end]).strip() for start, end in zip(starts, starts[1:] + [len(lines)])]
+    if not any(DATE_RE.search(block) for block in blocks):
+        return blocks
+    entries: List[str] = []
+    for block in blocks:
+        if entries and not DATE_RE.search(block):
+            entries[-1] = f"{entries[-1]}\n\n{block}"
+        else:
+            entries.append(block)
+    return entries
+
+
+def _wrap(entry: str, max_chars: int) -> List[str]:
+    # Only an entry bigger than the whole budget is cut: at line breaks, then hard
+    pieces: List[str] = []
+    current = ""
+    for line in entry.splitlines():
+        while len(line) > max_chars:
+            if current:
+                pieces.append(current)
+                current = ""
+            pieces.append(line[:max_chars])
+            line = line[max_chars:]
+        if current and len(current) + len(line) + 1 > max_chars:
+            pieces.append(current)
+            current = ""
+        current = f"{current}\n{line}" if current else line
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def split_to_budget(text: str, max_tokens: int) -> List[str]:
+    """Pack whole entries into chunks within max_tokens"""
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    if len(text) <= max_chars:
+        return [text]
+    chunks: List[str] = []
+    current = ""
+    for entry in split_entries(text):
+        if len(entry) > max_chars:
+            if current:
+                chunks.append(current)
+                current = ""
+            chunks.extend(_wrap(entry, max_chars))
+            continue
+        if current and len(current) + len(entry) + 2 > max_chars:
+            chunks.append(current)
+            current = ""
+        current = f"{current}\n\n{entry}" if current else entry
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def plan_chunks(text: str, max_tokens: int) -> Optional[List[Tuple[str, str]]]:
+    """(section, text) chunks for parallel parsing, or None if no structure was found.
+
+    The profile chunk carries the contact preamble and any summary section.
+    Experience and education are split across as many chunks as the budget
+    needs; the other sections are short lists and are truncated to it.
+    """
+    sections = segment(text)
+    recognised = [s for s in sections if s not in ("contact", "other")]
+    if len(recognised) < 2 or "experience" not in sections:
+        return None
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    profile = "\n\n".join(sections[s] for s in ("contact", "profile") if s in sections)
+    chunks = [("profile", profile[:max_chars])]
+    for section in SECTIONS[1:]:
+        if section not in sections:
+            continue
+        if section in ("experience", "education"):
+            chunks.extend((section, chunk) for chunk in split_to_budget(sections[section], max_tokens))
+        else:
+            chunks.append((section, sections[section][:max_chars]))
+    return chunks
+
+
+def merge_results(chunks: Sequence[Tuple[str, str]], results: Sequence[Any], id_prefixes: Dict[str, str]) -> dict:
+    """Merge per-chunk parser replies, in chunk order, into one resume dict.
+
+    Ids are assigned after merging so they stay sequential across chunks.
+    Raises ValueError if a reply does not have the shape its section needs.
+    """
+    merged: Dict[str, Any] = {"personalInfo": {}, "summary": "", "experience": [], "education": [],
+                              "skills": [], "certifications": [], "languages": []}
+    seen_skills = set()
+    for (section, _), result in zip(chunks, results):
+        if not isinstance(result, dict):
+            raise ValueError(f"Expected a JSON object for the {section} section")
+        if section == "profile":
+            merged["personalInfo"] = result.get('personalInfo') or {}
+            merged["summary"] = result.get('summary') or ''
+        elif section == "skills":
+            for skill in result.get('skills') or []:
+                if isinstance(skill, str) and skill.lower() not in seen_skills:
+                    seen_skills.add(skill.lower())
+                    merged["skills"].append(skill)
+        else:
+            items = result.get(section) or []
+            if not isinstance(items, list) or not all(isinstance(item, dict) for item in items):
+                raise ValueError(f"Expected a list of objects for the {section} section")
+            merged[section].extend(items)
+
+    for section, prefix in id_prefixes.items():
+        for i, item in enumerate(merged[section]):
+            item['id'] = f"{prefix}{i+1}"
+    return merged
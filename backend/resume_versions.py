@@ -0,0 +1,208 @@
+"""Version history for stored resumes, kept as deltas with periodic snapshots.
+
+Each save records the structural difference between the previous content
+and the new one (``diff``) in the resume_versions collection. The full
+content is stored instead every ``snapshot_every`` versions, for the first
+version, and whenever the history has a gap. Version numbers are allocated by
+the atomic write to the resume document, and entries are only ever inserted,
+never overwritten, so concurrent saves each extend the history consistently. Fetching a version replays the
+deltas after the snapshot it is based on, so a read touches at most
+``snapshot_every`` entries and storage grows with the size of edits rather
+than the size of the resume.
+
+A delta is a list of operations on paths (lists of keys and indices):
+
+* ``{"op": "set", "path": [...], "value": v}``
+* ``{"op": "unset", "path": [...]}``
+* ``{"op": "splice", "path": [...], "index": i, "delete": n, "insert": [...]}``
+"""
+import copy
+import json
+import logging
+from datetime import datetime
+from typing import Any, List, Optional
+
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+logger = logging.getLogger(__name__)
+
+# The parts of a resume document that are versioned
+VERSIONED_FIELDS = ("resumeData", "template")
+
+SNAPSHOT = "snapshot"
+DELTA = "delta"
+
+
+class VersionError(Exception):
+    """Raised when stored history cannot be replayed"""
+
+
+def content(doc: dict) -> dict:
+    return {field: doc[field] for field in VERSIONED_FIELDS if field in doc}
+
+
+def diff(old: Any, new: Any, path: Optional[List[Any]] = None) -> List[dict]:
+    """Operations turning ``old`` into ``new``, touching only what changed"""
+    path = path or []
+    if isinstance(old, dict) and isinstance(new, dict):
+        ops = [{"op": "unset", "path": path + [key]} for key in old if key not in new]
+        for key, value in new.items():
+            if key not in old:
+                ops.append({"op": "set", "path": path + [key], "value": value})
+            elif old[key] != value or type(old[key]) is not type(value):
+                ops.extend(diff(old[key], value, path + [key]))
+        return ops
+    if isinstance(old, list) and isinstance(new, list):
+        return _diff_list(old, new, path)
+    if old == new and type(old) is type(new):
+        return []
+    return [{"op": "set", "path": path, "value": new}]
+
+
+def _diff_list(old: list, new: list, path: List[Any]) -> List[dict]:
+    # Trim the unchanged ends; what is left in between is what was edited
+    start = 0
+    while start < len(old) and start < len(new) and old[start] == new[start]:
+        start += 1
+    old_end, new_end = len(old), len(new)
+    while old_end > start and new_end > start and old[old_end - 1] == new[new_end - 1]:
+        old_end -= 1
+        new_end -= 1
+    if old_end - start == new_end - start:
+        # Items edited in place: diff them one by one so a changed field costs only itself
+        ops = []
+        for offset, (a, b) in enumerate(zip(old[start:old_end], new[start:new_end])):
+            ops.extend(diff(a, b, path + [start + offset]))
+        return ops
+    return [{"op": "splice", "path": path, "index": start, "delete": old_end - start, "insert": new[start:new_end]}]
+
+
+def _node(doc: Any, path: List[Any]) -> Any:
+    node = doc
+    for key in path:
+        try:
+            node = node[key]
+        except (KeyError, IndexError, TypeError):
+            raise VersionError(f"Delta path does not exist: {'.'.join(map(str, path))}")
+    return node
+
+
+def _apply(state: Any, delta: List[dict]) -> Any:
+    # Mutates state and shares values with delta; callers pass copies they own
+    for operation in delta:
+        op, path = operation["op"], operation["path"]
+        if op == "splice":
+            index = operation["index"]
+            _node(state, path)[index:index + operation["delete"]] = operation["insert"]
+            continue
+        parent = _node(state, path[:-1])
+        try:
+            if op == "set":
+                parent[path[-1]] = operation["value"]
+            else:
+                del parent[path[-1]]
+        except (KeyError, IndexError, TypeError):
+            raise VersionError(f"Delta path does not exist: {'.'.join(map(str, path))}")
+    return state
+
+
+def apply(doc: dict, delta: List[dict]) -> dict:
+    """Apply a delta to a copy of ``doc`` and return it"""
+    return _apply(copy.deepcopy(doc), copy.deepcopy(delta))
+
+
+def _size(value: Any) -> int:
+    return len(json.dumps(value, default=str))
+
+
+class VersionStore:
+    def __init__(self, collection, snapshot_every: int = 50):
+        self.collection = collection
+        self.snapshot_every = snapshot_every
+
+    async def ensure_indexes(self):
+        await self.collection.create_index([("resumeId", 1), ("version", -1)], unique=True)
+
+    async def record(self, resume_id: str, version: int, previous: Optional[dict], current: dict,
+                     delta: List[dict], created_at: datetime):
+        """Store ``version`` of a resume, given the content it replaced.
+
+        ``version`` and ``previous`` must come from the same atomic write, so
+        ``delta`` is exactly the step from ``version - 1``. The delta is based
+        on the entry for ``version - 1`` itself rather than on the latest one,
+        so saves recorded out of order still chain correctly.
+
+        History is best effort: a failed write is logged, and the next save
+        notices the gap and starts again from a snapshot.
+        """
+        try:
+            base = None
+            if previous is not None:
+                base = await self._base_of(resume_id, version - 1)
+                if base is None:
+                    # Saved before history was kept, an earlier write failed or is
+                    # still in flight: anchor the delta on the content it replaced
+                    base = await self._insert(resume_id, version - 1, SNAPSHOT, previous, created_at)
+            if base is None or version - base >= self.snapshot_every:
+                await self._insert(resume_id, version, SNAPSHOT, current, created_at)
+            else:
+                await self._insert(resume_id, version, DELTA, delta, created_at, base=base)
+        except Exception as e:
+            logger.warning(f"Failed to record version {version} of resume {resume_id}: {str(e)}")
+
+    async def _base_of(self, resume_id: str, version: int) -> Optional[int]:
+        entry = await self.collection.find_one({"resumeId": resume_id, "version": version}, {"_id": 0, "base": 1})
+        return entry['base'] if entry else None
+
+    async def _insert(self, resume_id: str, version: int, kind: str, body: Any, created_at: datetime,
+                      base: Optional[int] = None) -> int:
+        """Insert an entry unless the version is already stored, and return the
+        base of whichever entry is kept. Both describe the same content."""
+        try:
+            stored = await self.collection.find_one_and_update(
+                {"resumeId": resume_id, "version": version},
+                {"$setOnInsert": {
+                    "kind": kind,
+                    "base": version if kind == SNAPSHOT else base,
+                    "content" if kind == SNAPSHOT else "delta": body,
+                    "bytes": _size(body),
+                    "createdAt": created_at,
+                }},
+                {"_id": 0, "base": 1},
+                upsert=True,
+                return_document=ReturnDocument.AFTER,
+            )
+        except DuplicateKeyError:
+            # Lost an upsert race on the unique index; the winner's entry stands
+            stored = await self.collection.find_one({"resumeId": resume_id, "version": version}, {"_id": 0, "base": 1})
+        return stored['base']
+
+    async def list_versions(self, resume_id: str, limit: int, before: Optional[int] = None) -> List[dict]:
+        """Version summaries, newest first"""
+        query: dict = {"resumeId": resume_id}
+        if before is not None:
+            query["version"] = {"$lt": before}
+        return await self.collection.find(query, {"_id": 0, "version": 1, "kind": 1, "bytes": 1, "createdAt": 1}) \
+            .sort([("version", -1)]) \
+            .limit(limit) \
+            .to_list(limit)
+
+    async def fetch(self, resume_id: str, version: int) -> Optional[dict]:
+        """{"content", "createdAt"} of a version, replayed from its snapshot, or None"""
+        target = await self.collection.find_one({"resumeId": resume_id, "version": version}, {"_id": 0, "base": 1})
+        if target is None:
+            return None
+        entries = await self.collection.find(
+            {"resumeId": resume_id, "version": {"$gte": target['base'], "$lte": version}}, {"_id": 0}
+        ).sort([("version", 1)]).to_list(None)
+        if not entries or entries[0]['kind'] != SNAPSHOT or len(entries) != version - target['base'] + 1:
+            raise VersionError(f"History of resume {resume_id} is incomplete at version {version}")
+        # Freshly loaded entries, so they can be replayed in place without copying
+        state = entries[0]['content']
+        for entry in entries[1:]:
+            state = _apply(state, entry['delta'])
+        return {"content": state, "createdAt": entries[-1]['createdAt']}
+
+    async def delete(self, resume_id: str):
+        await self.collection.delete_many({"resumeId": resume_id})
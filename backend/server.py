@@ -1,44 +1,162 @@
-from fastapi import FastAPI, APIRouter, HTTPException, UploadFile, File
-from fastapi.responses import StreamingResponse
+# Installed first so the import of everything below is timed
+import lazy_imports
+lazy_imports.import_timer.install()
+
+from fastapi import FastAPI, APIRouter, HTTPException, UploadFile, File, Header, Query, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import Response, StreamingResponse
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ReturnDocument
 import os
 import logging
 from pathlib import Path
-from pydantic import BaseModel, Field
-from typing import List, Optional
+from pydantic import BaseModel, Field, ValidationError
+from typing import Any, Dict, List, Literal, Optional, Tuple
 import uuid
-from datetime import datetime, date
-from openai import OpenAI
-from emergentintegrations.llm.chat import LlmChat, UserMessage
-from dotenv import load_dotenv
-
-# Load environment variables
-load_dotenv()
-import io
-import json
-from docx import Document
-from docx.enum.text import WD_PARAGRAPH_ALIGNMENT
-from reportlab.lib.pagesizes import letter
-from reportlab.lib import colors
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
-from reportlab.lib.units import inch
-import PyPDF2
-import pdfplumber
-from docx import Document as DocxReader
+from datetime import datetime, timezone
 
+# Load environment variables before any module reads them
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
+import json
+import asyncio
+import time
+from llm_cache import LlmCache, cache_enabled
+from llm_gateway import BATCH, INTERACTIVE, LlmGateway, LlmResponseError, decode_json
+import ats_scoring
+import metrics
+import ranking
+import resume_sections
+import skills_extractor
+import resume_patch
+from resume_patch import PatchError, PatchNotApplicable
+import resume_versions
+from resume_versions import VersionError, VersionStore
+from pagination import after_cursor, build_projection, encode_cursor, parse_fields, shape_item
+from parsed_uploads import ParsedUploadStore, parser_version, text_fingerprint
+from worker_pool import WorkerPool, WorkerPoolBusy, WorkerPoolUnavailable
+import uploads
+import batch_parse
+from uploads import SpooledUpload
+import http_cache
+from job_queue import FINISHED, JobQueue, MemoryJobStore, MongoJobStore
+from artifact_cache import ArtifactCache, artifact_key
+from single_flight import SingleFlight
+from vector_index import ResumeSearch
+from streaming import SSE_HEADERS, SSE_OPEN, DelimitedStream, JsonSectionStream, sse_event
+# extraction, renderers and export_templates pull in pdfplumber, PyPDF2,
+# python-docx and ReportLab; they are imported on first use with
+# lazy_imports.load, or ahead of it by the warm-up task
+
 # MongoDB connection
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
+client = AsyncIOMotorClient(mongo_url, event_listeners=[metrics.MongoCommandListener()])
 db = client[os.environ.get('DB_NAME', 'resume_builder')]
 
-# OpenAI client
-openai_client = OpenAI(api_key=os.environ.get('OPENAI_API_KEY'))
+# LLM settings and response cache
+LLM_PROVIDER = "openai"
+LLM_MODEL = "gpt-4o-mini"
+llm_cache = LlmCache(db.llm_cache, max_entries=int(os.environ.get('LLM_CACHE_MAX_ENTRIES', '512')))
+
+# Every LLM call goes through the gateway, which bounds concurrency and retries
+llm_gateway = LlmGateway(
+    llm_cache,
+    LLM_PROVIDER,
+    LLM_MODEL,
+    max_concurrency=int(os.environ.get('LLM_MAX_CONCURRENCY', '8')),
+    batch_concurrency=int(os.environ.get('LLM_BATCH_CONCURRENCY', '6')),
+    max_retries=int(os.environ.get('LLM_MAX_RETRIES', '4')),
+    retry_base_delay=float(os.environ.get('LLM_RETRY_BASE_DELAY', '0.5')),
+    retry_max_delay=float(os.environ.get('LLM_RETRY_MAX_DELAY', '8')),
+    default_timeout=float(os.environ.get('LLM_TIMEOUT', '60'))
+)
+# Identical AI requests already in flight share one call
+single_flight = SingleFlight()
+# ATS checks have a local fallback, so they give up on the LLM sooner
+ATS_LLM_TIMEOUT = float(os.environ.get('ATS_LLM_TIMEOUT', '20'))
+
+# Long resumes are parsed section by section, each chunk within a token budget
+PARSE_SEGMENT_MIN_CHARS = int(os.environ.get('PARSE_SEGMENT_MIN_CHARS', '4000'))
+PARSE_CHUNK_TOKENS = int(os.environ.get('PARSE_CHUNK_TOKENS', '2000'))
+
+# Previously parsed uploads, keyed by file hash and extracted-text hash
+parsed_uploads = ParsedUploadStore(db.parsed_uploads)
+
+# Resume history: a delta per save, with the full content every RESUME_SNAPSHOT_EVERY versions
+resume_history = VersionStore(db.resume_versions, snapshot_every=int(os.environ.get('RESUME_SNAPSHOT_EVERY', '50')))
+
+# Process pool and byte-bounded cache for PDF/DOCX export rendering
+render_pool = WorkerPool(
+    "render",
+    max_workers=int(os.environ.get('RENDER_WORKERS', '2')),
+    max_queue=int(os.environ.get('RENDER_QUEUE_SIZE', '32')),
+    job_timeout=float(os.environ.get('RENDER_TIMEOUT', '30')),
+    max_jobs_per_worker=int(os.environ.get('RENDER_MAX_JOBS_PER_WORKER', '200'))
+)
+artifact_cache = ArtifactCache(max_bytes=int(os.environ.get('EXPORT_CACHE_MAX_BYTES', str(64 * 1024 * 1024))))
+
+# Hashed term features of stored resumes, reused by /api/ats/rank until a resume changes
+rank_features = ranking.FeatureCache(max_bytes=int(os.environ.get('RANK_FEATURE_CACHE_MAX_BYTES', str(256 * 1024 * 1024))))
+RANK_MAX_CANDIDATES = int(os.environ.get('RANK_MAX_CANDIDATES', '20000'))
+
+# On-disk vector index behind /api/resumes/search. The files belong to a
+# single server process: a second worker on the same SEARCH_INDEX_DIR fails
+# at import, so run one uvicorn worker per directory.
+resume_search = ResumeSearch(db.resumes, Path(os.environ.get('SEARCH_INDEX_DIR', str(ROOT_DIR / 'search_index'))))
+
+# Uploads are spooled to disk (UPLOAD_SPOOL_DIR, default the system temp dir)
+# and rejected with 413 past these sizes
+UPLOAD_MAX_BYTES = int(os.environ.get('UPLOAD_MAX_BYTES', str(10 * 1024 * 1024)))
+UPLOAD_SPOOL_DIR = os.environ.get('UPLOAD_SPOOL_DIR') or None
+RESUME_FILE_KINDS = ("pdf", "docx")
+
+# Batch parsing limits
+BATCH_PARSE_CONCURRENCY = int(os.environ.get('BATCH_PARSE_CONCURRENCY', '8'))
+BATCH_MAX_FILES = int(os.environ.get('BATCH_MAX_FILES', '500'))
+BATCH_MAX_FILE_BYTES = int(os.environ.get('BATCH_MAX_FILE_BYTES', str(20 * 1024 * 1024)))
+BATCH_MAX_REQUEST_BYTES = int(os.environ.get('BATCH_MAX_REQUEST_BYTES', str(256 * 1024 * 1024)))
+# Total size of the files unpacked from the ZIPs in one batch
+BATCH_MAX_UNPACKED_BYTES = int(os.environ.get('BATCH_MAX_UNPACKED_BYTES', str(512 * 1024 * 1024)))
+
+# Process pool for PDF/DOCX text extraction, kept off the event loop
+extraction_pool = WorkerPool(
+    "extraction",
+    max_workers=int(os.environ.get('EXTRACTION_WORKERS', '2')),
+    max_queue=int(os.environ.get('EXTRACTION_QUEUE_SIZE', '16')),
+    job_timeout=float(os.environ.get('EXTRACTION_TIMEOUT', '30')),
+    max_jobs_per_worker=int(os.environ.get('EXTRACTION_MAX_JOBS_PER_WORKER', '50'))
+)
+
+# Background jobs for long AI operations; JOB_BACKEND=memory keeps them in
+# process, for tests and single-process deployments
+job_store = MemoryJobStore() if os.environ.get('JOB_BACKEND', 'mongo') == 'memory' else MongoJobStore(db.jobs)
+JOB_MAX_UPLOAD_BYTES = int(os.environ.get('JOB_MAX_UPLOAD_BYTES', str(10 * 1024 * 1024)))
+
+def job_error_is_permanent(error: Exception) -> bool:
+    # Bad input fails the same way every time; overload and timeouts are worth retrying
+    return isinstance(error, HTTPException) and error.status_code < 500
+
+job_queue = JobQueue(
+    job_store,
+    workers=int(os.environ.get('JOB_WORKERS', '4')),
+    lease_seconds=float(os.environ.get('JOB_LEASE_SECONDS', '60')),
+    max_attempts=int(os.environ.get('JOB_MAX_ATTEMPTS', '3')),
+    retry_base_delay=float(os.environ.get('JOB_RETRY_BASE_DELAY', '5')),
+    job_timeout=float(os.environ.get('JOB_TIMEOUT', '300')),
+    poll_interval=float(os.environ.get('JOB_POLL_INTERVAL', '1')),
+    result_ttl=float(os.environ.get('JOB_RESULT_TTL', '86400')),
+    is_permanent=job_error_is_permanent
+)
+
+# Heavy modules imported in the background shortly after startup; set
+# WARM_UP_IMPORTS=0 to load them only when a request first needs them
+warm_up = lazy_imports.WarmUp(
+    ["extraction", "renderers", llm_gateway.client_module] if os.environ.get('WARM_UP_IMPORTS', '1') == '1' else [],
+    delay=float(os.environ.get('WARM_UP_DELAY', '1'))
+)
 
 # Create the main app
 app = FastAPI()
@@ -106,10 +224,74 @@ class Resume(BaseModel):
     template: str
     createdAt: datetime = Field(default_factory=datetime.utcnow)
     updatedAt: datetime = Field(default_factory=datetime.utcnow)
+    version: int = 1
+
+class ResumePatch(BaseModel):
+    updatedAt: datetime
+    operations: List[dict] = []
+    set: Dict[str, Any] = {}
+    push: Dict[str, Any] = {}
+    unset: List[str] = []
+
+class ResumePatchResponse(BaseModel):
+    id: str
+    updatedAt: datetime
+    version: int
+
+class ResumeVersionListResponse(BaseModel):
+    items: List[dict]
+    nextBefore: Optional[int] = None
+
+class ResumeVersion(BaseModel):
+    id: str
+    version: int
+    createdAt: datetime
+    resumeData: ResumeData
+    template: str
+
+class ResumeVersionDiff(BaseModel):
+    id: str
+    fromVersion: int
+    toVersion: int
+    operations: List[dict]
+
+class ResumeListResponse(BaseModel):
+    items: List[dict]
+    nextCursor: Optional[str] = None
+
+class ResumeSearchResponse(BaseModel):
+    items: List[dict]
 
 class ATSAnalysisRequest(BaseModel):
     resumeData: ResumeData
     jobDescription: str
+    # local: keyword scoring only; hybrid: local scoring plus LLM suggestions; llm: LLM does everything.
+    # llm stays the default, as the frontend sends no mode
+    mode: Literal["local", "hybrid", "llm"] = "llm"
+
+class ATSRankRequest(BaseModel):
+    jobDescription: str
+    # Candidates: the listed ids, or every resume matching the filters below
+    ids: Optional[List[str]] = None
+    template: Optional[str] = None
+    updatedAfter: Optional[datetime] = None
+    topK: int = Field(20, ge=1, le=500)
+
+class RankedResume(BaseModel):
+    id: str
+    name: str
+    similarity: float
+    keywordScore: int
+    matched: List[str]
+    missing: List[str]
+
+class ATSRankResponse(BaseModel):
+    # Resumes ranked; at most RANK_MAX_CANDIDATES, the most recently updated
+    candidates: int
+    # Resumes matching the request; more than candidates when truncated
+    total: int
+    truncated: bool = False
+    results: List[RankedResume]
 
 class KeywordAnalysis(BaseModel):
     matched: List[str]
@@ -159,36 +341,46 @@ class SkillsExtractResponse(BaseModel):
     skills: List[SkillItem]
 
 # Helper Functions
-def extract_text_from_pdf(file_content: bytes) -> str:
-    """Extract text from PDF file"""
-    try:
-        pdf_file = io.BytesIO(file_content)
-        with pdfplumber.open(pdf_file) as pdf:
-            text = ""
-            for page in pdf.pages:
-                text += page.extract_text() + "\n"
-        return text
-    except Exception as e:
-        logger.error(f"PDF extraction error: {str(e)}")
-        raise HTTPException(status_code=400, detail="Failed to extract text from PDF")
+def mongo_datetime(value: datetime) -> datetime:
+    """Naive UTC datetime truncated to the millisecond precision MongoDB stores"""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value.replace(microsecond=value.microsecond // 1000 * 1000)
+
+def remember_rank_features(resume_id: str, updated_at: datetime, resume_data: dict):
+    """Compute ranking features on write so /api/ats/rank rarely has to"""
+    name = resume_data.get('personalInfo', {}).get('fullName', '')
+    rank_features.put(resume_id, updated_at, name, ranking.resume_features(resume_data))
+
+async def spool_upload(file: UploadFile, max_bytes: int = UPLOAD_MAX_BYTES) -> SpooledUpload:
+    """Copy an upload to a temporary file; the caller removes it when done"""
+    with metrics.stage("upload_read"):
+        upload = await uploads.spool(file, max_bytes, UPLOAD_SPOOL_DIR)
+    metrics.UPLOAD_BYTES.observe(upload.size)
+    return upload
+
+def require_resume_file(upload: SpooledUpload):
+    if upload.kind not in RESUME_FILE_KINDS:
+        raise HTTPException(status_code=400, detail="Only PDF and DOCX files are supported")
 
-def extract_text_from_docx(file_content: bytes) -> str:
-    """Extract text from DOCX file"""
+async def extract_resume_text(upload: SpooledUpload) -> str:
+    """Extract text from an uploaded PDF or DOCX in the extraction process pool"""
+    extraction = await lazy_imports.load("extraction")
+    extractor = extraction.extract_text_from_pdf if upload.kind == 'pdf' else extraction.extract_text_from_docx
     try:
-        docx_file = io.BytesIO(file_content)
-        doc = DocxReader(docx_file)
-        text = ""
-        for para in doc.paragraphs:
-            text += para.text + "\n"
-        return text
-    except Exception as e:
-        logger.error(f"DOCX extraction error: {str(e)}")
-        raise HTTPException(status_code=400, detail="Failed to extract text from DOCX")
-
-async def parse_resume_with_ai(resume_text: str) -> ResumeData:
-    """Use Emergent LLM to parse resume text into structured data"""
-    
-    prompt = f"""Parse this resume text and extract ALL information into a structured JSON format. Be thorough and extract every detail.
+        with metrics.stage("extract"):
+            # Workers map the spooled file rather than receiving a copy of it
+            return await extraction_pool.run(extractor, upload.path)
+    except extraction.ExtractionError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except WorkerPoolUnavailable:
+        raise HTTPException(status_code=503, detail="Text extraction workers failed, please retry shortly")
+    except WorkerPoolBusy:
+        raise HTTPException(status_code=503, detail="Too many files are being processed, please retry shortly")
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=504, detail="Timed out extracting text from file")
+
+RESUME_PARSE_PROMPT = """Parse this resume text and extract ALL information into a structured JSON format. Be thorough and extract every detail.
 
 CRITICAL: Return ONLY a valid JSON object (no markdown, no code blocks, no explanations).
 
@@ -259,83 +451,287 @@ IMPORTANT INSTRUCTIONS:
 Resume Text:
 {resume_text}"""
 
+PARSE_FAILURE_NOTICE = "Failed to parse resume automatically. Please review and edit manually."
+
+RESUME_PARSE_SYSTEM_MESSAGE = "You are an expert resume parser. Extract ALL information thoroughly. Always return ONLY valid JSON without any markdown formatting or explanations."
+
+# JSON structure and instructions for each resume_sections chunk
+SECTION_PARSE_SCHEMAS = {
+    "profile": ("""{
+  "personalInfo": {
+    "fullName": "",
+    "email": "",
+    "phone": "",
+    "location": "",
+    "linkedin": "",
+    "portfolio": "",
+    "photo": ""
+  },
+  "summary": ""
+}""", "the contact details and the professional summary"),
+    "experience": ("""{
+  "experience": [
+    {
+      "title": "Job Title",
+      "company": "Company Name",
+      "location": "City, State",
+      "startDate": "01-01-2020",
+      "endDate": "31-12-2021",
+      "current": false,
+      "bullets": ["Achievement 1", "Achievement 2"]
+    }
+  ]
+}""", "ALL work experience entries with their bullets/achievements"),
+    "education": ("""{
+  "education": [
+    {
+      "degree": "Degree Name",
+      "school": "University Name",
+      "location": "City, State",
+      "graduationDate": "2020",
+      "gpa": ""
+    }
+  ]
+}""", "ALL education entries"),
+    "skills": ("""{
+  "skills": ["Skill1", "Skill2", "Skill3"]
+}""", "ALL skills mentioned"),
+    "certifications": ("""{
+  "certifications": [
+    {
+      "name": "Certification Name",
+      "issuer": "Issuing Organization",
+      "date": "2020"
+    }
+  ]
+}""", "ALL certifications"),
+    "languages": ("""{
+  "languages": [
+    {
+      "language": "English",
+      "proficiency": "Native"
+    }
+  ]
+}""", "ALL languages"),
+}
+
+SECTION_PARSE_PROMPT = """This is one section of a resume. Extract {instructions} into a structured JSON format.
+
+CRITICAL: Return ONLY a valid JSON object (no markdown, no code blocks, no explanations).
+
+Required JSON structure:
+{schema}
+
+IMPORTANT INSTRUCTIONS:
+1. Use DD-MM-YYYY format for dates (e.g., "15-06-2020")
+2. For current positions, set "current": true and "endDate": "Present"
+3. Keep entries in the order they appear in the text
+4. If a field is not found, use empty string "" or empty array []
+5. Return ONLY the JSON object, nothing else
+
+Section Text:
+{section_text}"""
+
+SECTION_ID_PREFIXES = {"experience": "exp", "education": "edu", "certifications": "cert", "languages": "lang"}
+
+# Stored parses are only reused while everything that shapes parser output is unchanged
+RESUME_PARSER_VERSION = parser_version(RESUME_PARSE_PROMPT, RESUME_PARSE_SYSTEM_MESSAGE, SECTION_PARSE_PROMPT,
+                                       json.dumps(SECTION_PARSE_SCHEMAS, sort_keys=True), LLM_MODEL)
+
+async def render_artifact(kind: str, renderer_name: str, *args, template: Optional[str] = None) -> Tuple[bytes, str]:
+    """Render an export in the render pool, serving repeats from the artifact cache.
+
+    ``template`` is passed to the renderer after ``args``. Returns the content
+    and its cache key, a hash of the renderer version, template and inputs.
+    """
+    renderers = await lazy_imports.load("renderers")
+    key = renderers.export_key(kind, *args, template=template)
+    if template is not None:
+        args += (template,)
+    cached = artifact_cache.get(key)
+    if cached is not None:
+        return cached, key
     try:
-        # Initialize LlmChat with Emergent LLM key
-        chat = LlmChat(
-            api_key=os.environ.get('EMERGENT_LLM_KEY'),
-            session_id=f"resume_parse_{uuid.uuid4().hex[:8]}",
-            system_message="You are an expert resume parser. Extract ALL information thoroughly. Always return ONLY valid JSON without any markdown formatting or explanations."
-        ).with_model("openai", "gpt-4o-mini")
-        
-        # Create user message
-        user_message = UserMessage(text=prompt)
-        
-        # Send message and get response
-        response = await chat.send_message(user_message)
-        
-        # Clean response (remove markdown code blocks if present)
-        response_text = response.strip()
-        if response_text.startswith('```'):
-            # Remove markdown code blocks
-            lines = response_text.split('\n')
-            response_text = '\n'.join(lines[1:-1]) if len(lines) > 2 else response_text
-            if response_text.startswith('json'):
-                response_text = response_text[4:].strip()
-        
-        # Parse JSON
-        result = json.loads(response_text)
-        
-        # Add IDs if missing and validate structure
-        experiences = result.get('experience', [])
-        for i, exp in enumerate(experiences):
-            if 'id' not in exp:
-                exp['id'] = f"exp{i+1}"
-            if 'bullets' not in exp:
-                exp['bullets'] = []
-                
-        educations = result.get('education', [])
-        for i, edu in enumerate(educations):
-            if 'id' not in edu:
-                edu['id'] = f"edu{i+1}"
-                
-        certifications = result.get('certifications', [])
-        for i, cert in enumerate(certifications):
-            if 'id' not in cert:
-                cert['id'] = f"cert{i+1}"
-                
-        languages = result.get('languages', [])
-        for i, lang in enumerate(languages):
-            if 'id' not in lang:
-                lang['id'] = f"lang{i+1}"
-        
-        # Map to ResumeData model
-        return ResumeData(
-            personalInfo=PersonalInfo(**result.get('personalInfo', {})),
-            summary=result.get('summary', ''),
-            experience=[ExperienceItem(**exp) for exp in experiences],
-            education=[EducationItem(**edu) for edu in educations],
-            skills=result.get('skills', []),
-            certifications=[CertificationItem(**cert) for cert in certifications],
-            languages=[LanguageItem(**lang) for lang in languages]
+        with metrics.stage("render"):
+            content = await render_pool.run(getattr(renderers, renderer_name), *args)
+    except WorkerPoolUnavailable:
+        raise HTTPException(status_code=503, detail="Export workers failed, please retry shortly")
+    except WorkerPoolBusy:
+        raise HTTPException(status_code=503, detail="Too many exports in progress, please retry shortly")
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=504, detail="Timed out rendering export")
+    artifact_cache.put(key, content)
+    return content, key
+
+async def parse_resume_sections(chunks: List[tuple], use_cache: bool, lane: int) -> dict:
+    """Parse resume_sections chunks concurrently and merge them in document order.
+
+    Raises if any chunk fails, since a missing section would go unnoticed.
+    """
+    with metrics.stage("prompt_build"):
+        prompts = [
+            SECTION_PARSE_PROMPT.format(
+                instructions=SECTION_PARSE_SCHEMAS[section][1],
+                schema=SECTION_PARSE_SCHEMAS[section][0],
+                section_text=text
+            )
+            for section, text in chunks
+        ]
+    results = await asyncio.gather(*[
+        llm_gateway.complete_json("resume_parse_section", RESUME_PARSE_SYSTEM_MESSAGE, prompt, use_cache=use_cache, lane=lane)
+        for prompt in prompts
+    ], return_exceptions=True)
+    for result in results:
+        if isinstance(result, BaseException):
+            raise result
+    return resume_sections.merge_results(chunks, results, SECTION_ID_PREFIXES)
+
+async def parse_resume_with_ai(resume_text: str, use_cache: bool = True, lane: int = INTERACTIVE) -> ResumeData:
+    """Use Emergent LLM to parse resume text into structured data.
+
+    Long resumes with recognisable headings are parsed section by section in
+    parallel, so latency follows the longest section rather than the whole
+    document. Anything else, or a section whose output fails to parse or
+    validate, uses the single prompt for the whole document.
+    """
+    chunks = None
+    if len(resume_text) >= PARSE_SEGMENT_MIN_CHARS:
+        chunks = resume_sections.plan_chunks(resume_text, PARSE_CHUNK_TOKENS)
+    if chunks:
+        try:
+            resume_data = resume_data_from_parse(await parse_resume_sections(chunks, use_cache, lane))
+            logger.info(f"Parsed resume in {len(chunks)} section chunks "
+                        f"(largest ~{max(resume_sections.estimate_tokens(text) for _, text in chunks)} tokens)")
+            return resume_data
+        except Exception as e:
+            logger.warning(f"Section parsing failed, parsing whole resume: {str(e)}")
+
+    with metrics.stage("prompt_build"):
+        prompt = RESUME_PARSE_PROMPT.format(resume_text=resume_text)
+
+    try:
+        result = await llm_gateway.complete_json(
+            "resume_parse",
+            RESUME_PARSE_SYSTEM_MESSAGE,
+            prompt,
+            use_cache=use_cache,
+            lane=lane
         )
+
+        return resume_data_from_parse(result)
     except Exception as e:
         logger.error(f"Resume parsing error: {str(e)}")
-        logger.error(f"Response was: {response if 'response' in locals() else 'No response'}")
-        # Return a basic structure with the extracted text in summary
-        # This allows the user to at least see something and edit manually
+        return parse_failure_resume(resume_text)
+
+def fill_parsed_item(section: str, index: int, item: dict) -> dict:
+    """Add the id and defaults a parsed list item needs, if the model left them out"""
+    if 'id' not in item:
+        item['id'] = f"{SECTION_ID_PREFIXES[section]}{index+1}"
+    if section == 'experience' and 'bullets' not in item:
+        item['bullets'] = []
+    return item
+
+def resume_data_from_parse(result: dict) -> ResumeData:
+    """Validate parsed resume JSON into ResumeData"""
+    with metrics.stage("validate"):
+        items = {
+            section: [fill_parsed_item(section, i, item) for i, item in enumerate(result.get(section, []))]
+            for section in SECTION_ID_PREFIXES
+        }
         return ResumeData(
-            personalInfo=PersonalInfo(fullName="", email="", phone="", location=""),
-            summary=f"Failed to parse resume automatically. Please review and edit manually.\n\nExtracted text:\n{resume_text[:500]}",
-            experience=[],
-            education=[],
-            skills=[],
-            certifications=[],
-            languages=[]
+            personalInfo=PersonalInfo(**result.get('personalInfo', {})),
+            summary=result.get('summary', ''),
+            experience=[ExperienceItem(**exp) for exp in items['experience']],
+            education=[EducationItem(**edu) for edu in items['education']],
+            skills=result.get('skills', []),
+            certifications=[CertificationItem(**cert) for cert in items['certifications']],
+            languages=[LanguageItem(**lang) for lang in items['languages']]
         )
 
-async def generate_cover_letter_with_ai(resume_data: ResumeData, job_description: str, company_name: str, job_title: str) -> CoverLetterResponse:
-    """Use Emergent LLM to generate cover letter"""
-    
+def parse_failure_resume(resume_text: str) -> ResumeData:
+    """A basic structure with the extracted text in summary, so the user can
+    at least see something and edit manually"""
+    return ResumeData(
+        personalInfo=PersonalInfo(fullName="", email="", phone="", location=""),
+        summary=f"{PARSE_FAILURE_NOTICE}\n\nExtracted text:\n{resume_text[:500]}",
+        experience=[],
+        education=[],
+        skills=[],
+        certifications=[],
+        languages=[]
+    )
+
+SECTION_ITEM_MODELS = {
+    "experience": ExperienceItem,
+    "education": EducationItem,
+    "certifications": CertificationItem,
+    "languages": LanguageItem,
+}
+
+def resume_section_event(kind: str, key: str, value, counts: Dict[str, int]) -> Optional[str]:
+    """SSE event for a section picked out of streamed parser output, or None
+    if it is not one we send or it does not validate"""
+    try:
+        if kind == "value" and key == "personalInfo":
+            return sse_event("personalInfo", PersonalInfo(**value).dict())
+        if kind == "value" and key == "summary":
+            return sse_event("summary", {"summary": str(value)})
+        if kind == "value" and key == "skills":
+            if not isinstance(value, list) or not all(isinstance(skill, str) for skill in value):
+                raise TypeError("skills must be strings")
+            return sse_event("skills", {"skills": value})
+        if kind == "item" and key in SECTION_ITEM_MODELS:
+            index = counts.get(key, 0)
+            counts[key] = index + 1
+            item = SECTION_ITEM_MODELS[key](**fill_parsed_item(key, index, value))
+            return sse_event(key, {"index": index, "item": item.dict()})
+    except (TypeError, ValidationError) as e:
+        logger.warning(f"Skipping streamed {key} that does not validate: {str(e)}")
+    return None
+
+def resume_data_events(resume_data: ResumeData):
+    """The section events for an already parsed resume, as the stream would send them"""
+    data = resume_data.dict()
+    yield sse_event("personalInfo", data['personalInfo'])
+    yield sse_event("summary", {"summary": data['summary']})
+    for section in SECTION_ITEM_MODELS:
+        for index, item in enumerate(data[section]):
+            yield sse_event(section, {"index": index, "item": item})
+    yield sse_event("skills", {"skills": data['skills']})
+    yield sse_event("done", data)
+
+def validate_parse_reply(response: str) -> ResumeData:
+    """Raises unless a whole parser reply decodes and validates, so only usable replies are cached"""
+    return resume_data_from_parse(decode_json(response))
+
+async def stream_parse_resume(text: str, file_hash: str, use_cache: bool = True):
+    """Parse resume text as Server-Sent Events: each section as soon as the model
+    has finished writing it, then the whole validated resume as done"""
+    yield SSE_OPEN
+    parser = JsonSectionStream()
+    counts: Dict[str, int] = {}
+    with metrics.stage("prompt_build"):
+        prompt = RESUME_PARSE_PROMPT.format(resume_text=text)
+    try:
+        async for chunk in llm_gateway.stream("resume_parse", RESUME_PARSE_SYSTEM_MESSAGE, prompt,
+                                              use_cache=use_cache, validate=validate_parse_reply):
+            for kind, key, value in parser.feed(chunk):
+                event = resume_section_event(kind, key, value, counts)
+                if event:
+                    yield event
+        with metrics.stage("json_decode"):
+            result = decode_json(parser.text)
+        resume_data = resume_data_from_parse(result)
+    except Exception as e:
+        logger.error(f"Resume parsing stream error: {str(e)}")
+        yield sse_event("error", {"detail": PARSE_FAILURE_NOTICE})
+        yield sse_event("done", parse_failure_resume(text).dict())
+        return
+    await parsed_uploads.save(file_hash, text, resume_data.dict(), RESUME_PARSER_VERSION)
+    yield sse_event("done", resume_data.dict())
+
+def cover_letter_brief(resume_data: ResumeData, job_description: str, company_name: str, job_title: str) -> str:
+    """Shared instructions for the cover letter prompts"""
     resume_summary = f"""
 Name: {resume_data.personalInfo.fullName}
 Email: {resume_data.personalInfo.email}
@@ -351,7 +747,7 @@ Education:
 {chr(10).join([f"- {edu.degree} from {edu.school}" for edu in resume_data.education])}
 """
     
-    prompt = f"""Write a professional cover letter for this job application.
+    return f"""Write a professional cover letter for this job application.
 
 Job Title: {job_title}
 Company: {company_name}
@@ -373,7 +769,12 @@ Write a compelling cover letter (300-400 words) that:
 8. Includes specific examples and quantifiable achievements from the resume
 
 IMPORTANT: Cover letters should use first-person perspective (I, my, me) as they are personal letters. However, maintain a balance - not every sentence should start with "I". Mix personal statements with achievement-focused language.
+"""
 
+async def generate_cover_letter_with_ai(resume_data: ResumeData, job_description: str, company_name: str, job_title: str, use_cache: bool = True) -> CoverLetterResponse:
+    """Use Emergent LLM to generate cover letter"""
+    started = time.perf_counter()
+    prompt = f"""{cover_letter_brief(resume_data, job_description, company_name, job_title)}
 Also provide 2-3 suggestions for customization.
 
 Return ONLY valid JSON (no markdown, no code blocks):
@@ -382,111 +783,168 @@ Return ONLY valid JSON (no markdown, no code blocks):
   "suggestions": ["suggestion 1", "suggestion 2", "suggestion 3"]
 }}
 """
+    metrics.record_stage("prompt_build", time.perf_counter() - started)
     
     try:
         logger.info(f"Starting cover letter generation for {company_name} - {job_title}")
         
-        # Initialize LlmChat with Emergent LLM key
-        chat = LlmChat(
-            api_key=os.environ.get('EMERGENT_LLM_KEY'),
-            session_id=f"cover_letter_{uuid.uuid4().hex[:8]}",
-            system_message="You are an expert cover letter writer. Always use British English and return ONLY valid JSON without markdown formatting."
-        ).with_model("openai", "gpt-4o-mini")
-        
-        # Create user message
-        user_message = UserMessage(text=prompt)
-        
-        # Send message and get response
-        logger.info("Sending request to LLM...")
-        response = await chat.send_message(user_message)
-        logger.info(f"Received response from LLM (length: {len(response)})")
-        
-        # Clean response (remove markdown code blocks if present)
-        response_text = response.strip()
-        if response_text.startswith('```'):
-            logger.info("Cleaning markdown code blocks from response")
-            lines = response_text.split('\n')
-            response_text = '\n'.join(lines[1:-1]) if len(lines) > 2 else response_text
-            if response_text.startswith('json'):
-                response_text = response_text[4:].strip()
-        
-        logger.info(f"Parsing JSON response (length: {len(response_text)})")
-        result = json.loads(response_text)
+        result = await llm_gateway.complete_json(
+            "cover_letter",
+            "You are an expert cover letter writer. Always use British English and return ONLY valid JSON without markdown formatting.",
+            prompt,
+            use_cache=use_cache
+        )
         
         logger.info(f"Successfully generated cover letter (content length: {len(result.get('content', ''))})")
         
-        return CoverLetterResponse(
-            content=result.get('content', ''),
-            suggestions=result.get('suggestions', [])
-        )
+        with metrics.stage("validate"):
+            return CoverLetterResponse(
+                content=result.get('content', ''),
+                suggestions=result.get('suggestions', [])
+            )
     except Exception as e:
         logger.error(f"Cover letter generation error: {str(e)}")
-        logger.error(f"Response was: {response if 'response' in locals() else 'No response'}")
         raise HTTPException(status_code=500, detail=f"Failed to generate cover letter: {str(e)}")
 
-async def extract_skills_with_ai(text: str, existing_skills: List[str]) -> SkillsExtractResponse:
-    """Use Emergent LLM to extract skills from job description"""
-    
-    prompt = f"""Extract technical and professional skills from this job description. 
-Return ONLY valid JSON (no markdown, no code blocks).
+COVER_LETTER_STREAM_SYSTEM_MESSAGE = "You are an expert cover letter writer. Always use British English and write plain text without markdown."
+SUGGESTIONS_DELIMITER = "---SUGGESTIONS---"
 
-Job Description:
-{text}
+def validate_cover_letter_reply(response: str):
+    """Raises unless a streamed reply holds a letter followed by the suggestions delimiter"""
+    with metrics.stage("validate"):
+        letter, delimiter, _ = response.partition(SUGGESTIONS_DELIMITER)
+        if not delimiter or not letter.strip():
+            raise LlmResponseError("Cover letter reply is incomplete")
 
-Existing Skills (to mark as already added):
-{', '.join(existing_skills)}
+def parse_suggestions(text: str) -> List[str]:
+    """Suggestions from the trailer of a streamed reply, as a JSON array or one per line"""
+    text = text.strip()
+    try:
+        result = decode_json(text)
+        if isinstance(result, dict):
+            result = result.get('suggestions', [])
+        if isinstance(result, list):
+            return [str(item) for item in result if str(item).strip()]
+    except ValueError:
+        pass
+    return [line.strip().lstrip('-*•0123456789. ').strip() for line in text.split('\n') if line.strip()]
+
+async def stream_cover_letter_with_ai(resume_data: ResumeData, job_description: str, company_name: str, job_title: str, use_cache: bool = True):
+    """Generate a cover letter as Server-Sent Events: token events, then suggestions, then done"""
+    started = time.perf_counter()
+    prompt = f"""{cover_letter_brief(resume_data, job_description, company_name, job_title)}
+Write the cover letter as plain text with paragraphs separated by blank lines. Do not use markdown or JSON for the letter.
+
+After the letter, write a line containing only {SUGGESTIONS_DELIMITER} and then a JSON array of 2-3 suggestions for customization.
+"""
+    metrics.record_stage("prompt_build", time.perf_counter() - started)
+    yield SSE_OPEN
+    splitter = DelimitedStream(SUGGESTIONS_DELIMITER)
+    try:
+        logger.info(f"Streaming cover letter for {company_name} - {job_title}")
+        async for chunk in llm_gateway.stream("cover_letter", COVER_LETTER_STREAM_SYSTEM_MESSAGE, prompt,
+                                              use_cache=use_cache, validate=validate_cover_letter_reply):
+            text = splitter.feed(chunk)
+            if text:
+                yield sse_event("token", {"text": text})
+        rest, trailer = splitter.finish()
+        if rest:
+            yield sse_event("token", {"text": rest})
+        yield sse_event("suggestions", {"suggestions": parse_suggestions(trailer)})
+        yield sse_event("done", {"content": splitter.body.strip()})
+    except Exception as e:
+        logger.error(f"Cover letter streaming error: {str(e)}")
+        yield sse_event("error", {"detail": f"Failed to generate cover letter: {str(e)}"})
+
+SKILLS_CLASSIFY_SYSTEM_MESSAGE = "You are an expert at classifying skills from job descriptions. Return ONLY valid JSON without markdown."
+
+async def classify_skill_candidates(candidates: List[str], use_cache: bool = True) -> List[SkillItem]:
+    """Ask the LLM which leftover candidate phrases are skills, and their categories"""
+    started = time.perf_counter()
+    prompt = f"""These phrases were taken from a job description. Return only the ones that are technical or professional skills, tools, technologies or methodologies.
+Return ONLY valid JSON (no markdown, no code blocks).
+
+Phrases:
+{json.dumps(candidates)}
 
 Return JSON:
 {{
   "skills": [
-    {{"name": "Python", "category": "Programming", "alreadyAdded": false}},
-    {{"name": "Leadership", "category": "Soft Skills", "alreadyAdded": true}}
+    {{"name": "Temporal", "category": "Tools"}}
   ]
 }}
 
-Categories: Programming, Frameworks, Databases, Cloud, Tools, Soft Skills, Other"""
-    
+Categories: {', '.join(skills_extractor.CATEGORIES)}"""
+    metrics.record_stage("prompt_build", time.perf_counter() - started)
+
     try:
-        # Initialize LlmChat with Emergent LLM key
-        chat = LlmChat(
-            api_key=os.environ.get('EMERGENT_LLM_KEY'),
-            session_id=f"skills_extract_{uuid.uuid4().hex[:8]}",
-            system_message="You are an expert at extracting skills from job descriptions. Return ONLY valid JSON without markdown."
-        ).with_model("openai", "gpt-4o-mini")
-        
-        user_message = UserMessage(text=prompt)
-        response = await chat.send_message(user_message)
-        
-        # Clean response
-        response_text = response.strip()
-        if response_text.startswith('```'):
-            lines = response_text.split('\n')
-            response_text = '\n'.join(lines[1:-1]) if len(lines) > 2 else response_text
-            if response_text.startswith('json'):
-                response_text = response_text[4:].strip()
-        
-        result = json.loads(response_text)
-        skills = []
-        
-        for skill_data in result.get('skills', []):
-            already_added = skill_data.get('name', '') in existing_skills
-            skills.append(SkillItem(
-                name=skill_data.get('name', ''),
-                category=skill_data.get('category', 'Other'),
-                alreadyAdded=already_added
-            ))
-        
-        return SkillsExtractResponse(skills=skills)
+        result = await llm_gateway.complete_json("skills_extract", SKILLS_CLASSIFY_SYSTEM_MESSAGE, prompt, use_cache=use_cache)
+        with metrics.stage("validate"):
+            skills = []
+            for skill_data in result.get('skills', []):
+                name = skill_data.get('name', '').strip()
+                if not name:
+                    continue
+                category = skill_data.get('category', 'Other')
+                skills.append(SkillItem(name=name, category=category if category in skills_extractor.CATEGORIES else 'Other'))
+            return skills
     except Exception as e:
-        logger.error(f"Skills extraction error: {str(e)}")
-        logger.error(f"Response was: {response if 'response' in locals() else 'No response'}")
-        return SkillsExtractResponse(skills=[])
+        logger.error(f"Skills classification error: {str(e)}")
+        return []
+
+async def extract_skills_with_ai(text: str, existing_skills: List[str], use_cache: bool = True) -> SkillsExtractResponse:
+    """Extract skills from job description with the local taxonomy, using the LLM only for terms it doesn't cover"""
+    taxonomy = skills_extractor.TAXONOMY
+    skills = [SkillItem(name=skill.name, category=skill.category) for skill in taxonomy.extract(text)]
+
+    candidates = skills_extractor.candidate_phrases(text)
+    if candidates:
+        logger.info(f"Classifying {len(candidates)} phrases not in skills taxonomy {taxonomy.version}")
+        skills.extend(await classify_skill_candidates(candidates, use_cache=use_cache))
+
+    existing = {taxonomy.canonical(skill) for skill in existing_skills}
+    seen = set()
+    result = []
+    for skill in skills:
+        known = taxonomy.lookup(skill.name)
+        if known is not None:
+            skill = SkillItem(name=known.name, category=known.category)
+        key = taxonomy.canonical(skill.name)
+        if key in seen:
+            continue
+        seen.add(key)
+        skill.alreadyAdded = key in existing
+        result.append(skill)
+    return SkillsExtractResponse(skills=result)
 
 # AI Analysis Function
-async def analyze_ats_with_ai(resume_data: ResumeData, job_description: str) -> ATSAnalysisResponse:
-    """Use Emergent LLM to analyze resume against job description"""
-    
-    resume_text = f"""
+def ats_status(score: int) -> str:
+    return "Excellent" if score >= 80 else "Good" if score >= 60 else "Needs Work"
+
+def analyze_ats_local(resume_data: ResumeData, job_description: str) -> ATSAnalysisResponse:
+    """Score resume against job description with the local keyword engine (no LLM)"""
+    analysis = ats_scoring.analyze(resume_data.dict(), job_description)
+    return ATSAnalysisResponse(
+        score=analysis.score,
+        status=ats_status(analysis.score),
+        keywordAnalysis=KeywordAnalysis(
+            matched=analysis.matched,
+            missing=analysis.missing,
+            overused=analysis.overused
+        ),
+        suggestions=analysis.suggestions,
+        impactOpportunities=[
+            ImpactOpportunity(original=original, suggestion=suggestion)
+            for original, suggestion in analysis.impact_opportunities
+        ],
+        readability=ReadabilityAnalysis(
+            score=analysis.readability_score,
+            suggestions=analysis.readability_suggestions
+        )
+    )
+
+def _ats_resume_text(resume_data: ResumeData) -> str:
+    return f"""
 Summary: {resume_data.summary}
 
 Skills: {', '.join(resume_data.skills)}
@@ -497,6 +955,63 @@ Experience:
 Education:
 {chr(10).join([f"- {edu.degree} from {edu.school}" for edu in resume_data.education])}
 """
+
+async def analyze_ats_hybrid(resume_data: ResumeData, job_description: str, use_cache: bool = True) -> ATSAnalysisResponse:
+    """Score locally, asking the LLM only for suggestions and impact opportunities"""
+    local = analyze_ats_local(resume_data, job_description)
+    
+    started = time.perf_counter()
+    prompt = f"""You are an expert resume coach.
+
+The resume below was scored against the job description.
+Matched keywords: {', '.join(local.keywordAnalysis.matched)}
+Missing keywords: {', '.join(local.keywordAnalysis.missing)}
+
+Provide:
+1. Specific suggestions to improve the resume for this job
+2. Bullet points that could be rewritten with quantified impact
+
+Resume:
+{_ats_resume_text(resume_data)}
+
+Job Description:
+{job_description}
+
+Return ONLY valid JSON (no markdown, no code blocks):
+{{
+  "suggestions": ["suggestion 1", "suggestion 2"],
+  "impact_opportunities": [{{"original": "original text", "improved": "improved text"}}]
+}}
+"""
+    metrics.record_stage("prompt_build", time.perf_counter() - started)
+    
+    try:
+        result = await llm_gateway.complete_json(
+            "ats_analysis",
+            "You are an expert resume coach. Always return ONLY valid JSON without markdown formatting.",
+            prompt,
+            use_cache=use_cache,
+            deadline=time.monotonic() + ATS_LLM_TIMEOUT
+        )
+        
+        with metrics.stage("validate"):
+            if result.get('suggestions'):
+                local.suggestions = result['suggestions']
+            if result.get('impact_opportunities'):
+                local.impactOpportunities = [
+                    ImpactOpportunity(original=opp.get('original', ''), suggestion=opp.get('improved', ''))
+                    for opp in result['impact_opportunities']
+                ]
+    except Exception as e:
+        # The local analysis already carries rule-based suggestions
+        logger.error(f"ATS suggestions error: {str(e)}")
+    return local
+
+async def analyze_ats_with_ai(resume_data: ResumeData, job_description: str, use_cache: bool = True) -> ATSAnalysisResponse:
+    """Use Emergent LLM to analyze resume against job description"""
+    
+    started = time.perf_counter()
+    resume_text = _ats_resume_text(resume_data)
     
     prompt = f"""You are an expert ATS (Applicant Tracking System) analyzer.
 
@@ -524,60 +1039,42 @@ Return ONLY valid JSON (no markdown, no code blocks):
   "readability_suggestions": ["suggestion 1"]
 }}
 """
+    metrics.record_stage("prompt_build", time.perf_counter() - started)
     
     try:
-        # Initialize LlmChat with Emergent LLM key
-        chat = LlmChat(
-            api_key=os.environ.get('EMERGENT_LLM_KEY'),
-            session_id=f"ats_analysis_{uuid.uuid4().hex[:8]}",
-            system_message="You are an expert ATS analyzer. Always return ONLY valid JSON without markdown formatting."
-        ).with_model("openai", "gpt-4o-mini")
-        
-        user_message = UserMessage(text=prompt)
-        response = await chat.send_message(user_message)
-        
-        # Clean response
-        response_text = response.strip()
-        if response_text.startswith('```'):
-            lines = response_text.split('\n')
-            response_text = '\n'.join(lines[1:-1]) if len(lines) > 2 else response_text
-            if response_text.startswith('json'):
-                response_text = response_text[4:].strip()
-        
-        result = json.loads(response_text)
+        result = await llm_gateway.complete_json(
+            "ats_analysis",
+            "You are an expert ATS analyzer. Always return ONLY valid JSON without markdown formatting.",
+            prompt,
+            use_cache=use_cache,
+            deadline=time.monotonic() + ATS_LLM_TIMEOUT
+        )
         
-        score = result.get('score', 75)
-        status = "Excellent" if score >= 80 else "Good" if score >= 60 else "Needs Work"
+        with metrics.stage("validate"):
+            score = result.get('score', 75)
+            status = ats_status(score)
         
-        return ATSAnalysisResponse(
-            score=score,
-            status=status,
-            keywordAnalysis=KeywordAnalysis(
-                matched=result.get('matched_keywords', []),
-                missing=result.get('missing_keywords', []),
-                overused=[]
-            ),
-            suggestions=result.get('suggestions', []),
-            impactOpportunities=[
-                ImpactOpportunity(original=opp.get('original', ''), suggestion=opp.get('improved', ''))
-                for opp in result.get('impact_opportunities', [])
-            ],
-            readability=ReadabilityAnalysis(
-                score=result.get('readability_score', 85),
-                suggestions=result.get('readability_suggestions', [])
+            return ATSAnalysisResponse(
+                score=score,
+                status=status,
+                keywordAnalysis=KeywordAnalysis(
+                    matched=result.get('matched_keywords', []),
+                    missing=result.get('missing_keywords', []),
+                    overused=[]
+                ),
+                suggestions=result.get('suggestions', []),
+                impactOpportunities=[
+                    ImpactOpportunity(original=opp.get('original', ''), suggestion=opp.get('improved', ''))
+                    for opp in result.get('impact_opportunities', [])
+                ],
+                readability=ReadabilityAnalysis(
+                    score=result.get('readability_score', 85),
+                    suggestions=result.get('readability_suggestions', [])
+                )
             )
-        )
     except Exception as e:
         logger.error(f"ATS analysis error: {str(e)}")
-        logger.error(f"Response was: {response if 'response' in locals() else 'No response'}")
-        return ATSAnalysisResponse(
-            score=70,
-            status="Good",
-            keywordAnalysis=KeywordAnalysis(matched=["Product Management"], missing=["Machine Learning"], overused=[]),
-            suggestions=["Add more quantified achievements"],
-            impactOpportunities=[],
-            readability=ReadabilityAnalysis(score=80, suggestions=["Use stronger action verbs"])
-        )
+        return analyze_ats_local(resume_data, job_description)
 
 # API Routes
 @api_router.get("/")
@@ -587,251 +1084,727 @@ async def root():
 @api_router.post("/resumes", response_model=Resume)
 async def create_resume(input: ResumeCreate):
     resume_obj = Resume(resumeData=input.resumeData, template=input.template)
-    await db.resumes.insert_one(resume_obj.dict())
+    doc = resume_obj.dict()
+    await db.resumes.insert_one(doc)
+    await resume_history.record(resume_obj.id, 1, None, resume_versions.content(doc), [], mongo_datetime(resume_obj.updatedAt))
+    remember_rank_features(resume_obj.id, mongo_datetime(resume_obj.updatedAt), resume_obj.resumeData.dict())
+    await resume_search.upsert(resume_obj.id, resume_obj.resumeData.dict())
+    resume_search.schedule_maintenance()
     return resume_obj
 
-@api_router.get("/resumes", response_model=List[Resume])
-async def get_resumes():
-    resumes = await db.resumes.find().to_list(1000)
-    return [Resume(**resume) for resume in resumes]
+def resume_etag(doc: dict) -> str:
+    # Every save moves updatedAt and version, so the stamp identifies the content
+    return http_cache.strong_etag(doc['id'], doc['updatedAt'], doc.get('version', 1))
+
+@api_router.get("/resumes", response_model=ResumeListResponse)
+async def get_resumes(
+    request: Request,
+    response: Response,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    if_none_match: Optional[str] = Header(None)
+):
+    """List resumes, newest first, as summaries or the fields= selection"""
+    try:
+        selected = parse_fields(fields)
+        query = after_cursor(cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    # Fetch one extra document to learn whether another page exists
+    docs = await db.resumes.find(query, build_projection(selected)) \
+        .sort([("updatedAt", -1), ("id", -1)]) \
+        .limit(limit + 1) \
+        .to_list(limit + 1)
+    next_cursor = None
+    if len(docs) > limit:
+        docs = docs[:limit]
+        next_cursor = encode_cursor(docs[-1]['updatedAt'], docs[-1]['id'])
+    items = [shape_item(doc, selected) for doc in docs]
+    etag = http_cache.strong_etag(items, next_cursor)
+    conditional = http_cache.evaluate_if_none_match(request.method, if_none_match, etag, http_cache.REVALIDATE)
+    if conditional is not None:
+        return conditional
+    http_cache.set_validators(response, etag, http_cache.REVALIDATE)
+    return ResumeListResponse(items=items, nextCursor=next_cursor)
+
+# Declared before /resumes/{resume_id} so "search" is not taken for an id
+@api_router.get("/resumes/search", response_model=ResumeSearchResponse)
+async def search_resumes(q: str = Query(..., min_length=1), limit: int = Query(10, ge=1, le=100)):
+    """Resumes most similar to a free-text query, best first, as summaries with a score"""
+    hits = await resume_search.search(q, limit)
+    if not hits:
+        return ResumeSearchResponse(items=[])
+    selected = parse_fields(None)
+    docs = await db.resumes.find({"id": {"$in": [resume_id for resume_id, _ in hits]}}, build_projection(selected)) \
+        .to_list(len(hits))
+    by_id = {doc['id']: doc for doc in docs}
+    items = []
+    for resume_id, score in hits:
+        if resume_id in by_id:
+            items.append({**shape_item(by_id[resume_id], selected), "score": round(score, 4)})
+    return ResumeSearchResponse(items=items)
 
 @api_router.get("/resumes/{resume_id}", response_model=Resume)
-async def get_resume(resume_id: str):
+async def get_resume(resume_id: str, request: Request, response: Response,
+                     if_none_match: Optional[str] = Header(None)):
+    if if_none_match:
+        # Most polls find the resume unchanged: compare its stamp before loading the whole document
+        stamp = await db.resumes.find_one({"id": resume_id}, {"_id": 0, "id": 1, "updatedAt": 1, "version": 1})
+        if stamp:
+            conditional = http_cache.evaluate_if_none_match(
+                request.method, if_none_match, resume_etag(stamp), http_cache.REVALIDATE
+            )
+            if conditional is not None:
+                return conditional
     resume = await db.resumes.find_one({"id": resume_id})
     if not resume:
         raise HTTPException(status_code=404, detail="Resume not found")
+    http_cache.set_validators(response, resume_etag(resume), http_cache.REVALIDATE)
     return Resume(**resume)
 
+@api_router.patch("/resumes/{resume_id}", response_model=ResumePatchResponse)
+async def patch_resume(resume_id: str, patch: ResumePatch):
+    """Apply a partial update, rejecting it if the resume changed since patch.updatedAt"""
+    expected = mongo_datetime(patch.updatedAt)
+    current = await db.resumes.find_one({"id": resume_id}, {"_id": 0})
+    if not current:
+        raise HTTPException(status_code=404, detail="Resume not found")
+    if current['updatedAt'] != expected:
+        raise HTTPException(status_code=409, detail="Resume was modified since it was loaded")
+
+    try:
+        ops = resume_patch.normalise(patch.operations, patch.set, patch.push, patch.unset)
+        patched = resume_patch.apply(current, ops)
+        Resume(**patched)
+    except PatchNotApplicable as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except PatchError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=f"Patched resume is invalid: {str(e)}")
+
+    previous = resume_versions.content(current)
+    delta = resume_versions.diff(previous, resume_versions.content(patched))
+    if not delta:
+        # Nothing changed, so there is nothing to write or to version
+        return ResumePatchResponse(id=resume_id, updatedAt=current['updatedAt'], version=current.get('version', 1))
+
+    update = resume_patch.to_update(ops, patched)
+    now = mongo_datetime(datetime.utcnow())
+    update.setdefault("$set", {})["updatedAt"] = now
+    update["$inc"] = {"version": 1}
+    # The updatedAt filter makes the write fail if another save landed in between, so the
+    # replaced document is the one the delta was taken from; the version is allocated by
+    # the same atomic write, so concurrent saves never share one
+    replaced = await db.resumes.find_one_and_update(
+        {"id": resume_id, "updatedAt": expected}, update, {"_id": 0, "version": 1},
+        return_document=ReturnDocument.BEFORE
+    )
+    if replaced is None:
+        raise HTTPException(status_code=409, detail="Resume was modified since it was loaded")
+    version = replaced.get('version', 0) + 1
+    await resume_history.record(resume_id, version, previous, resume_versions.content(patched), delta, now)
+    remember_rank_features(resume_id, now, patched['resumeData'])
+    await resume_search.upsert(resume_id, patched['resumeData'])
+    resume_search.schedule_maintenance()
+    return ResumePatchResponse(id=resume_id, updatedAt=now, version=version)
+
+@api_router.put("/resumes/{resume_id}", response_model=Resume)
+async def save_resume(resume_id: str, input: ResumeCreate):
+    """Save a resume's full content in place; only the change is added to its history"""
+    new_content = {"resumeData": input.resumeData.dict(), "template": input.template}
+    current = await db.resumes.find_one({"id": resume_id}, {"_id": 0})
+    if not current:
+        raise HTTPException(status_code=404, detail="Resume not found")
+    if not resume_versions.diff(resume_versions.content(current), new_content):
+        # Autosaves that change nothing write nothing
+        return Resume(**current)
+
+    now = mongo_datetime(datetime.utcnow())
+    # Last write wins. The write allocates the version and returns the document it
+    # replaced, so the recorded delta always matches what it replaced
+    replaced = await db.resumes.find_one_and_update(
+        {"id": resume_id},
+        {"$set": {**new_content, "updatedAt": now}, "$inc": {"version": 1}},
+        {"_id": 0},
+        return_document=ReturnDocument.BEFORE
+    )
+    if replaced is None:
+        raise HTTPException(status_code=404, detail="Resume not found")
+    version = replaced.get('version', 0) + 1
+    previous = resume_versions.content(replaced)
+    delta = resume_versions.diff(previous, new_content)
+    await resume_history.record(resume_id, version, previous, new_content, delta, now)
+    remember_rank_features(resume_id, now, new_content['resumeData'])
+    await resume_search.upsert(resume_id, new_content['resumeData'])
+    resume_search.schedule_maintenance()
+    return Resume(**{**replaced, **new_content, "updatedAt": now, "version": version})
+
+@api_router.get("/resumes/{resume_id}/versions", response_model=ResumeVersionListResponse)
+async def list_resume_versions(
+    resume_id: str,
+    limit: int = Query(20, ge=1, le=100),
+    before: Optional[int] = Query(None, ge=1)
+):
+    """Saved versions of a resume, newest first; pass nextBefore as before= for the next page"""
+    items = await resume_history.list_versions(resume_id, limit + 1, before)
+    if not items and not await db.resumes.find_one({"id": resume_id}, {"_id": 1}):
+        raise HTTPException(status_code=404, detail="Resume not found")
+    next_before = None
+    if len(items) > limit:
+        items = items[:limit]
+        next_before = items[-1]['version']
+    return ResumeVersionListResponse(items=items, nextBefore=next_before)
+
+async def fetch_resume_version(resume_id: str, version: int) -> dict:
+    try:
+        stored = await resume_history.fetch(resume_id, version)
+    except VersionError as e:
+        logger.error(str(e))
+        raise HTTPException(status_code=500, detail="Version history is incomplete")
+    if stored is None:
+        raise HTTPException(status_code=404, detail="Version not found")
+    return stored
+
+# Declared before /versions/{version} so "diff" is not taken for a version
+@api_router.get("/resumes/{resume_id}/versions/diff", response_model=ResumeVersionDiff)
+async def diff_resume_versions(
+    resume_id: str,
+    from_version: int = Query(..., alias="from", ge=1),
+    to_version: int = Query(..., alias="to", ge=1)
+):
+    """Operations that turn one saved version into another"""
+    old = await fetch_resume_version(resume_id, from_version)
+    new = await fetch_resume_version(resume_id, to_version)
+    return ResumeVersionDiff(
+        id=resume_id,
+        fromVersion=from_version,
+        toVersion=to_version,
+        operations=resume_versions.diff(old['content'], new['content'])
+    )
+
+@api_router.get("/resumes/{resume_id}/versions/{version}", response_model=ResumeVersion)
+async def get_resume_version(resume_id: str, version: int, request: Request, response: Response,
+                             if_none_match: Optional[str] = Header(None)):
+    """A saved version, rebuilt from the nearest snapshot and the deltas after it"""
+    # A saved version never changes, so its number is a validator
+    etag = http_cache.strong_etag(resume_id, version)
+    conditional = http_cache.evaluate_if_none_match(request.method, if_none_match, etag, http_cache.IMMUTABLE)
+    if conditional is not None:
+        return conditional
+    stored = await fetch_resume_version(resume_id, version)
+    http_cache.set_validators(response, etag, http_cache.IMMUTABLE)
+    return ResumeVersion(id=resume_id, version=version, createdAt=stored['createdAt'], **stored['content'])
+
+@api_router.delete("/resumes/{resume_id}")
+async def delete_resume(resume_id: str):
+    result = await db.resumes.delete_one({"id": resume_id})
+    if result.deleted_count == 0:
+        raise HTTPException(status_code=404, detail="Resume not found")
+    await resume_history.delete(resume_id)
+    await resume_search.delete(resume_id)
+    resume_search.schedule_maintenance()
+    return {"message": "Resume deleted"}
+
+@api_router.get("/search-index/stats")
+async def get_search_index_stats():
+    """Row counts and IVF state of the resume search index"""
+    return {**await resume_search.stats(), "rebuilding": resume_search.rebuilding}
+
+@api_router.post("/search-index/rebuild", status_code=202)
+async def rebuild_search_index():
+    """Re-embed every stored resume into a fresh search index in the background"""
+    resume_search.start_rebuild()
+    return {"message": "Rebuild started"}
+
+async def run_ats_analysis(request: ATSAnalysisRequest, use_cache: bool) -> ATSAnalysisResponse:
+    if request.mode == "local":
+        return analyze_ats_local(request.resumeData, request.jobDescription)
+    analyzer = analyze_ats_hybrid if request.mode == "hybrid" else analyze_ats_with_ai
+    key = artifact_key(request.mode, request.resumeData.dict(), request.jobDescription, use_cache)
+    return await single_flight.run("ats_analysis", key, analyzer, request.resumeData, request.jobDescription, use_cache=use_cache)
+
 @api_router.post("/ai/analyze-ats", response_model=ATSAnalysisResponse)
-async def analyze_ats(request: ATSAnalysisRequest):
-    return await analyze_ats_with_ai(request.resumeData, request.jobDescription)
+async def analyze_ats(request: ATSAnalysisRequest, x_cache_bypass: Optional[str] = Header(None)):
+    return await run_ats_analysis(request, use_cache=cache_enabled(x_cache_bypass))
+
+@api_router.post("/ats/rank", response_model=ATSRankResponse)
+async def rank_resumes(request: ATSRankRequest):
+    """Rank stored resumes against a job description by TF-IDF similarity (no LLM)"""
+    query = {}
+    if request.ids is not None:
+        query["id"] = {"$in": request.ids}
+    if request.template:
+        query["template"] = request.template
+    if request.updatedAfter:
+        query["updatedAt"] = {"$gt": mongo_datetime(request.updatedAfter)}
+    # Past the cap, only the most recently updated resumes are ranked and the response says so
+    stamps = await db.resumes.find(query, {"_id": 0, "id": 1, "updatedAt": 1}) \
+        .sort([("updatedAt", -1), ("id", -1)]) \
+        .limit(RANK_MAX_CANDIDATES + 1) \
+        .to_list(RANK_MAX_CANDIDATES + 1)
+    truncated = len(stamps) > RANK_MAX_CANDIDATES
+    if truncated:
+        stamps = stamps[:RANK_MAX_CANDIDATES]
+        total = await db.resumes.count_documents(query)
+        logger.warning(f"Ranking the {RANK_MAX_CANDIDATES} most recently updated of {total} matching resumes")
+
+    ids, names, features = [], [], []
+    stale = {}
+    for doc in stamps:
+        cached = rank_features.get(doc['id'], doc.get('updatedAt'))
+        if cached is None:
+            stale[doc['id']] = len(ids)
+            cached = ("", None)
+        ids.append(doc['id'])
+        names.append(cached[0])
+        features.append(cached[1])
+
+    # Only resumes that are new or changed since they were last ranked are loaded in full
+    if stale:
+        cursor = db.resumes.find({"id": {"$in": list(stale)}}, {"_id": 0, "id": 1, "updatedAt": 1, "resumeData": 1})
+        while True:
+            docs = await cursor.to_list(500)
+            if not docs:
+                break
+            for resume_id, updated_at, name, doc_features in await asyncio.to_thread(ranking.stored_resume_features, docs):
+                rank_features.put(resume_id, updated_at, name, doc_features)
+                index = stale.pop(resume_id)
+                names[index] = name
+                features[index] = doc_features
+    if not truncated:
+        total = len(stamps)
+    # Anything deleted between the two queries is dropped
+    if stale:
+        gone = set(stale.values())
+        ids = [v for i, v in enumerate(ids) if i not in gone]
+        names = [v for i, v in enumerate(names) if i not in gone]
+        features = [v for i, v in enumerate(features) if i not in gone]
+
+    job_features = ranking.text_features(request.jobDescription)
+    scores = await asyncio.to_thread(ranking.similarities, job_features, features)
+    keywords = ranking.job_keywords(request.jobDescription)
+
+    results = []
+    for index in ranking.top_k(scores, request.topK):
+        keyword_score, matched, missing = ranking.keyword_coverage(keywords, features[index])
+        results.append(RankedResume(
+            id=ids[index],
+            name=names[index],
+            similarity=round(float(scores[index]), 4),
+            keywordScore=keyword_score,
+            matched=matched,
+            missing=missing
+        ))
+    return ATSRankResponse(candidates=len(ids), total=total, truncated=truncated, results=results)
+
+@api_router.get("/ats/rank/cache/stats")
+async def get_rank_cache_stats():
+    """Size and hit/miss counters for cached ranking features"""
+    return rank_features.stats()
 
 # Resume Parsing
 @api_router.post("/parse-resume", response_model=ResumeData)
-async def parse_resume(file: UploadFile = File(...)):
+async def parse_resume(file: UploadFile = File(...), x_cache_bypass: Optional[str] = Header(None)):
     """Parse uploaded resume file (PDF or DOCX)"""
     if not file.filename:
         raise HTTPException(status_code=400, detail="No file provided")
     
-    file_ext = file.filename.lower().split('.')[-1]
-    
-    if file_ext not in ['pdf', 'docx']:
-        raise HTTPException(status_code=400, detail="Only PDF and DOCX files are supported")
+    upload = await spool_upload(file)
+    try:
+        require_resume_file(upload)
+        return await parse_resume_upload(upload, use_cache=cache_enabled(x_cache_bypass))
+    finally:
+        upload.remove()
+
+async def find_parsed_upload(upload: SpooledUpload, use_cache: bool, timings: dict) -> tuple:
+    """(file hash, extracted text, stored ResumeData or None) for an upload.
+
+    The text is None when the same file was parsed before, since extraction
+    is skipped entirely.
+    """
+    file_hash = upload.sha256
     
-    # Read file content
-    content = await file.read()
+    # Same file uploaded before: skip extraction and parsing entirely
+    if use_cache:
+        stored = await parsed_uploads.find_by_file(file_hash, RESUME_PARSER_VERSION)
+        if stored:
+            logger.info(f"Parsed upload hit on file hash {file_hash[:12]}")
+            return file_hash, None, ResumeData(**stored['resumeData'])
     
     # Extract text
-    if file_ext == 'pdf':
-        text = extract_text_from_pdf(content)
-    else:
-        text = extract_text_from_docx(content)
+    started = time.perf_counter()
+    text = await extract_resume_text(upload)
+    timings['extractMs'] = round((time.perf_counter() - started) * 1000, 1)
+    
+    # Same content in a different file: reuse the parse, remember the new file
+    if use_cache:
+        stored = await parsed_uploads.find_by_text(text_fingerprint(text), RESUME_PARSER_VERSION)
+        if stored:
+            logger.info(f"Parsed upload hit on text hash for file {file_hash[:12]}")
+            await parsed_uploads.save(file_hash, text, stored['resumeData'], RESUME_PARSER_VERSION)
+            return file_hash, text, ResumeData(**stored['resumeData'])
+    return file_hash, text, None
+
+async def parse_resume_upload(upload: SpooledUpload, use_cache: bool = True, timings: Optional[dict] = None, lane: int = INTERACTIVE) -> ResumeData:
+    """Extract and parse one uploaded resume, reusing stored results where possible"""
+    if timings is None:
+        timings = {}
+    file_hash, text, stored = await find_parsed_upload(upload, use_cache, timings)
+    if stored is not None:
+        return stored
     
     # Parse with AI
-    return await parse_resume_with_ai(text)
+    started = time.perf_counter()
+    # Per lane, so an interactive upload never waits on a batch call's limits and deadline
+    key = artifact_key(text, use_cache, lane)
+    resume_data = await single_flight.run("resume_parse", key, parse_resume_with_ai, text, use_cache=use_cache, lane=lane)
+    timings['parseMs'] = round((time.perf_counter() - started) * 1000, 1)
+    if not resume_data.summary.startswith(PARSE_FAILURE_NOTICE):
+        await parsed_uploads.save(file_hash, text, resume_data.dict(), RESUME_PARSER_VERSION)
+    return resume_data
+
+@api_router.post("/parse-resume/stream")
+async def parse_resume_stream(file: UploadFile = File(...), x_cache_bypass: Optional[str] = Header(None)):
+    """Parse uploaded resume file, streaming each section as Server-Sent Events as it is parsed"""
+    if not file.filename:
+        raise HTTPException(status_code=400, detail="No file provided")
+    
+    upload = await spool_upload(file)
+    use_cache = cache_enabled(x_cache_bypass)
+    # Extraction errors still surface as HTTP errors, before the stream starts
+    try:
+        require_resume_file(upload)
+        file_hash, text, stored = await find_parsed_upload(upload, use_cache, {})
+    finally:
+        upload.remove()
+    if stored is not None:
+        async def replay():
+            yield SSE_OPEN
+            for event in resume_data_events(stored):
+                yield event
+        events = replay()
+    else:
+        events = stream_parse_resume(text, file_hash, use_cache=use_cache)
+    return StreamingResponse(events, media_type="text/event-stream", headers=SSE_HEADERS)
+
+@api_router.post("/parse-resume/batch")
+async def parse_resume_batch(files: List[UploadFile] = File(...), x_cache_bypass: Optional[str] = Header(None)):
+    """Parse many resumes (PDF, DOCX or a ZIP of them), streaming NDJSON results as each finishes"""
+    entries = await batch_parse.collect(
+        files, lambda file: spool_upload(file, BATCH_MAX_REQUEST_BYTES),
+        BATCH_MAX_FILES, BATCH_MAX_FILE_BYTES, BATCH_MAX_UNPACKED_BYTES, UPLOAD_SPOOL_DIR
+    )
+    use_cache = cache_enabled(x_cache_bypass)
+
+    async def parse(upload: SpooledUpload, timings: dict) -> dict:
+        require_resume_file(upload)
+        resume_data = await parse_resume_upload(upload, use_cache=use_cache, timings=timings, lane=BATCH)
+        return resume_data.dict()
+
+    return StreamingResponse(batch_parse.ndjson_results(entries, parse, BATCH_PARSE_CONCURRENCY),
+                             media_type="application/x-ndjson")
 
 # Cover Letter
 @api_router.post("/cover-letter/generate", response_model=CoverLetterResponse)
-async def generate_cover_letter(request: CoverLetterRequest):
+async def generate_cover_letter(request: CoverLetterRequest, x_cache_bypass: Optional[str] = Header(None)):
     """Generate AI-powered cover letter"""
     return await generate_cover_letter_with_ai(
         request.resumeData,
         request.jobDescription,
         request.companyName,
-        request.jobTitle
+        request.jobTitle,
+        use_cache=cache_enabled(x_cache_bypass)
+    )
+
+@api_router.post("/cover-letter/generate/stream")
+async def generate_cover_letter_stream(request: CoverLetterRequest, x_cache_bypass: Optional[str] = Header(None)):
+    """Stream an AI-powered cover letter as Server-Sent Events"""
+    events = stream_cover_letter_with_ai(
+        request.resumeData,
+        request.jobDescription,
+        request.companyName,
+        request.jobTitle,
+        use_cache=cache_enabled(x_cache_bypass)
     )
+    return StreamingResponse(events, media_type="text/event-stream", headers=SSE_HEADERS)
 
 @api_router.post("/cover-letter/export/pdf")
 async def export_cover_letter_pdf(request: dict):
     """Export cover letter as PDF"""
-    buffer = io.BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=letter, topMargin=inch, bottomMargin=inch, leftMargin=inch, rightMargin=inch)
-    story = []
-    styles = getSampleStyleSheet()
-    
-    # Styles
-    name_style = ParagraphStyle('Name', parent=styles['Normal'], fontSize=12, fontName='Helvetica-Bold')
-    body_style = ParagraphStyle('Body', parent=styles['Normal'], fontSize=11, leading=16)
-    
-    # Personal info
-    personal_info = request.get('personalInfo', {})
-    name_text = personal_info.get('fullName', '')
-    contact_text = f"{personal_info.get('email', '')} | {personal_info.get('phone', '')} | {personal_info.get('location', '')}"
-    
-    story.append(Paragraph(name_text, name_style))
-    story.append(Paragraph(contact_text, styles['Normal']))
-    story.append(Spacer(1, 0.3*inch))
-    
-    # Date
-    today = date.today().strftime("%d %B %Y")
-    story.append(Paragraph(today, styles['Normal']))
-    story.append(Spacer(1, 0.2*inch))
-    
-    # Company info
-    company_name = request.get('companyName', '')
-    company_address = request.get('companyAddress', '')
-    job_title = request.get('jobTitle', '')
-    if company_name:
-        story.append(Paragraph(f"<b>{company_name}</b>", styles['Normal']))
-    if company_address:
-        story.append(Paragraph(company_address, styles['Normal']))
-    if job_title:
-        story.append(Spacer(1, 0.2*inch))
-        story.append(Paragraph(f"Re: {job_title}", styles['Normal']))
-    story.append(Spacer(1, 0.3*inch))
-    
-    # Cover letter content
-    content = request.get('content', '')
-    paragraphs = content.split('\n\n')
-    for para in paragraphs:
-        if para.strip():
-            story.append(Paragraph(para.strip(), body_style))
-            story.append(Spacer(1, 0.2*inch))
-    
-    # Signature
-    story.append(Spacer(1, 0.3*inch))
-    story.append(Paragraph(f"Yours sincerely,<br/>{name_text}", styles['Normal']))
-    
-    doc.build(story)
-    buffer.seek(0)
+    renderers = await lazy_imports.load("renderers")
+    content, _ = await render_artifact("cover_letter_pdf", "render_cover_letter_pdf", request, renderers.cover_letter_date())
     
+    name_text = request.get('personalInfo', {}).get('fullName', '')
     filename = f"{name_text.replace(' ', '_')}_Cover_Letter.pdf"
-    return StreamingResponse(buffer, media_type="application/pdf", headers={"Content-Disposition": f"attachment; filename={filename}"})
+    return Response(content, media_type="application/pdf", headers={"Content-Disposition": f"attachment; filename={filename}"})
 
 # Skills Extraction
 @api_router.post("/skills/extract", response_model=SkillsExtractResponse)
-async def extract_skills(request: SkillsExtractRequest):
+async def extract_skills(request: SkillsExtractRequest, x_cache_bypass: Optional[str] = Header(None)):
     """Extract skills from job description"""
-    return await extract_skills_with_ai(request.text, request.existingSkills)
+    use_cache = cache_enabled(x_cache_bypass)
+    key = artifact_key(request.text, request.existingSkills, use_cache)
+    return await single_flight.run("skills_extract", key, extract_skills_with_ai, request.text, request.existingSkills, use_cache=use_cache)
+
+# LLM Cache
+@api_router.get("/llm-cache/stats")
+async def get_llm_cache_stats():
+    """Hit/miss counters for the LLM response cache"""
+    return llm_cache.stats()
+
+@api_router.get("/llm/stats")
+async def get_llm_stats():
+    """Concurrency, retry and failure counters for LLM calls, and coalesced requests"""
+    return {**llm_gateway.stats(), "singleFlight": single_flight.stats()}
+
+# Worker Pools
+@api_router.get("/workers/stats")
+async def get_worker_stats():
+    """Queue depth and job counters for the background worker pools"""
+    return {"extraction": extraction_pool.stats(), "render": render_pool.stats()}
 
 # Export Routes
+def export_headers(filename: str, key: str) -> dict:
+    # POST responses are not revalidated, so the ETag only lets clients tell identical exports
+    # apart; it is weak as renders embed timestamps and are not byte-identical
+    return {
+        "Content-Disposition": f"attachment; filename={filename}",
+        "ETag": http_cache.weak_etag(key),
+        "Cache-Control": http_cache.NO_STORE,
+    }
+
 @api_router.post("/export/pdf")
 async def export_pdf(request: ExportRequest):
-    buffer = io.BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=letter, topMargin=0.5*inch, bottomMargin=0.5*inch)
-    story = []
-    styles = getSampleStyleSheet()
-    
-    title_style = ParagraphStyle('Title', parent=styles['Heading1'], fontSize=24, textColor=colors.HexColor('#0f172a'), spaceAfter=12)
-    heading_style = ParagraphStyle('Heading', parent=styles['Heading2'], fontSize=14, textColor=colors.HexColor('#0f172a'), spaceBefore=12, spaceAfter=6)
-    
     data = request.resumeData
-    
-    story.append(Paragraph(data.personalInfo.fullName, title_style))
-    story.append(Spacer(1, 6))
-    
-    contact_text = f"{data.personalInfo.email} | {data.personalInfo.phone}"
-    if data.personalInfo.location:
-        contact_text += f" | {data.personalInfo.location}"
-    story.append(Paragraph(contact_text, styles['Normal']))
-    story.append(Spacer(1, 12))
-    
-    if data.summary:
-        story.append(Paragraph("PROFESSIONAL SUMMARY", heading_style))
-        story.append(Paragraph(data.summary, styles['Normal']))
-        story.append(Spacer(1, 12))
-    
-    if data.experience:
-        story.append(Paragraph("WORK EXPERIENCE", heading_style))
-        for exp in data.experience:
-            job_title = f"<b>{exp.title}</b> - {exp.company}"
-            story.append(Paragraph(job_title, styles['Normal']))
-            date_range = f"{exp.startDate} - {'Present' if exp.current else exp.endDate}"
-            story.append(Paragraph(date_range, styles['Normal']))
-            for bullet in exp.bullets:
-                if bullet:
-                    story.append(Paragraph(f"• {bullet}", styles['Normal']))
-            story.append(Spacer(1, 8))
-    
-    if data.education:
-        story.append(Paragraph("EDUCATION", heading_style))
-        for edu in data.education:
-            degree_text = f"<b>{edu.degree}</b> - {edu.school} ({edu.graduationDate})"
-            story.append(Paragraph(degree_text, styles['Normal']))
-            story.append(Spacer(1, 8))
-    
-    if data.skills:
-        story.append(Paragraph("SKILLS", heading_style))
-        skills_text = ", ".join(data.skills)
-        story.append(Paragraph(skills_text, styles['Normal']))
-    
-    doc.build(story)
-    buffer.seek(0)
+    content, key = await render_artifact("pdf", "render_resume_pdf", data.dict(), template=request.template)
     
     filename = f"{data.personalInfo.fullName.replace(' ', '_')}_Resume.pdf"
-    return StreamingResponse(buffer, media_type="application/pdf", headers={"Content-Disposition": f"attachment; filename={filename}"})
+    return Response(content, media_type="application/pdf", headers=export_headers(filename, key))
 
 @api_router.post("/export/docx")
 async def export_docx(request: ExportRequest):
-    doc = Document()
     data = request.resumeData
-    
-    name_para = doc.add_heading(data.personalInfo.fullName, 0)
-    name_para.alignment = WD_PARAGRAPH_ALIGNMENT.CENTER
-    
-    contact_text = f"{data.personalInfo.email} | {data.personalInfo.phone}"
-    if data.personalInfo.location:
-        contact_text += f" | {data.personalInfo.location}"
-    contact_para = doc.add_paragraph(contact_text)
-    contact_para.alignment = WD_PARAGRAPH_ALIGNMENT.CENTER
-    
-    if data.summary:
-        doc.add_heading('Professional Summary', 1)
-        doc.add_paragraph(data.summary)
-    
-    if data.experience:
-        doc.add_heading('Work Experience', 1)
-        for exp in data.experience:
-            job_para = doc.add_paragraph()
-            job_para.add_run(f"{exp.title}").bold = True
-            job_para.add_run(f" - {exp.company}")
-            date_range = f"{exp.startDate} - {'Present' if exp.current else exp.endDate}"
-            doc.add_paragraph(date_range)
-            for bullet in exp.bullets:
-                if bullet:
-                    doc.add_paragraph(bullet, style='List Bullet')
-    
-    if data.education:
-        doc.add_heading('Education', 1)
-        for edu in data.education:
-            edu_para = doc.add_paragraph()
-            edu_para.add_run(edu.degree).bold = True
-            edu_para.add_run(f" - {edu.school} ({edu.graduationDate})")
-    
-    if data.skills:
-        doc.add_heading('Skills', 1)
-        doc.add_paragraph(", ".join(data.skills))
-    
-    if data.certifications:
-        doc.add_heading('Certifications', 1)
-        for cert in data.certifications:
-            cert_text = f"{cert.name} - {cert.issuer}"
-            if cert.date:
-                cert_text += f" ({cert.date})"
-            doc.add_paragraph(cert_text, style='List Bullet')
-    
-    if data.languages:
-        doc.add_heading('Languages', 1)
-        for lang in data.languages:
-            doc.add_paragraph(f"{lang.language}: {lang.proficiency}", style='List Bullet')
-    
-    buffer = io.BytesIO()
-    doc.save(buffer)
-    buffer.seek(0)
+    content, key = await render_artifact("docx", "render_resume_docx", data.dict(), template=request.template)
     
     filename = f"{data.personalInfo.fullName.replace(' ', '_')}_Resume.docx"
-    return StreamingResponse(buffer, media_type="application/vnd.openxmlformats-officedocument.wordprocessingml.document", headers={"Content-Disposition": f"attachment; filename={filename}"})
+    return Response(content, media_type="application/vnd.openxmlformats-officedocument.wordprocessingml.document", headers=export_headers(filename, key))
+
+@api_router.get("/export/templates")
+async def get_export_templates(response: Response):
+    """Names of the templates the export renderers support"""
+    export_templates = await lazy_imports.load("export_templates")
+    response.headers["Cache-Control"] = http_cache.STATIC
+    return {"templates": list(export_templates.template_names())}
+
+@api_router.get("/startup/stats")
+async def get_startup_stats():
+    """Import time per module and background warm-up progress"""
+    return {
+        "imports": lazy_imports.import_timer.stats(),
+        "warmUp": warm_up.stats(),
+    }
+
+# Background Jobs
+async def run_parse_resume_job(payload: dict) -> dict:
+    upload = await asyncio.to_thread(uploads.spool_bytes, payload['content'], "", UPLOAD_SPOOL_DIR)
+    try:
+        require_resume_file(upload)
+        resume_data = await parse_resume_upload(upload, use_cache=payload['useCache'])
+    finally:
+        upload.remove()
+    return resume_data.dict()
+
+async def run_cover_letter_job(payload: dict) -> dict:
+    request = CoverLetterRequest(**payload['request'])
+    result = await generate_cover_letter_with_ai(
+        request.resumeData,
+        request.jobDescription,
+        request.companyName,
+        request.jobTitle,
+        use_cache=payload['useCache']
+    )
+    return result.dict()
+
+async def run_ats_analysis_job(payload: dict) -> dict:
+    result = await run_ats_analysis(ATSAnalysisRequest(**payload['request']), use_cache=payload['useCache'])
+    return result.dict()
+
+job_queue.register("parse_resume", run_parse_resume_job)
+job_queue.register("cover_letter", run_cover_letter_job)
+job_queue.register("ats_analysis", run_ats_analysis_job)
+
+@api_router.post("/jobs/parse-resume", status_code=202)
+async def submit_parse_resume_job(file: UploadFile = File(...), x_cache_bypass: Optional[str] = Header(None)):
+    """Queue parsing of an uploaded resume; poll /api/jobs/{id} for the ResumeData"""
+    if not file.filename:
+        raise HTTPException(status_code=400, detail="No file provided")
+    
+    # Queued uploads are stored on the job document until it finishes, hence the lower size limit
+    upload = await spool_upload(file, JOB_MAX_UPLOAD_BYTES)
+    try:
+        require_resume_file(upload)
+        content = await asyncio.to_thread(upload.read_bytes)
+    finally:
+        upload.remove()
+    return await job_queue.submit("parse_resume", {"content": content, "useCache": cache_enabled(x_cache_bypass)})
+
+@api_router.post("/jobs/cover-letter", status_code=202)
+async def submit_cover_letter_job(request: CoverLetterRequest, x_cache_bypass: Optional[str] = Header(None)):
+    """Queue cover letter generation; poll /api/jobs/{id} for the CoverLetterResponse"""
+    return await job_queue.submit("cover_letter", {"request": request.dict(), "useCache": cache_enabled(x_cache_bypass)})
+
+@api_router.post("/jobs/analyze-ats", status_code=202)
+async def submit_ats_analysis_job(request: ATSAnalysisRequest, x_cache_bypass: Optional[str] = Header(None)):
+    """Queue an ATS analysis; poll /api/jobs/{id} for the ATSAnalysisResponse"""
+    return await job_queue.submit("ats_analysis", {"request": request.dict(), "useCache": cache_enabled(x_cache_bypass)})
+
+@api_router.get("/jobs/stats")
+async def get_job_stats():
+    """Queue depth by status and per-kind counters for this process's workers"""
+    return await job_queue.stats()
+
+@api_router.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Status of a background job, with its result once it has succeeded"""
+    job = await job_queue.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@api_router.get("/jobs/{job_id}/events")
+async def get_job_events(job_id: str):
+    """Stream a job's status changes as Server-Sent Events, ending with the finished job"""
+    if not await job_queue.get(job_id):
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    async def events():
+        yield SSE_OPEN
+        async for job in job_queue.watch(job_id):
+            if job['status'] in FINISHED:
+                yield sse_event("done", jsonable_encoder(job))
+            else:
+                yield sse_event("status", {"id": job['id'], "status": job['status'], "attempts": job['attempts']})
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers=SSE_HEADERS)
+
+@api_router.get("/export/cache/stats")
+async def get_export_cache_stats():
+    """Hit/miss counters and size of the rendered-export cache"""
+    return artifact_cache.stats()
 
 app.include_router(api_router)
 
+def service_stats():
+    """Counters kept by the caches, pools and LLM gateway, for /metrics"""
+    cache = llm_cache.stats()['endpoints']
+    yield ("llm_cache_hits", "LLM response cache hits", "counter", ["endpoint"],
+           [([name], counts['hits']) for name, counts in cache.items()])
+    yield ("llm_cache_misses", "LLM response cache misses", "counter", ["endpoint"],
+           [([name], counts['misses']) for name, counts in cache.items()])
+    gateway = llm_gateway.stats()
+    for field, documentation in (("calls", "LLM calls sent"), ("retries", "LLM calls retried"), ("failures", "LLM calls failed")):
+        yield (f"llm_{field}", documentation, "counter", ["endpoint"],
+               [([name], endpoint[field]) for name, endpoint in gateway['endpoints'].items()])
+    yield ("llm_active", "LLM calls in progress", "gauge", [], [([], gateway['active'])])
+    yield ("llm_waiting", "LLM calls waiting for a slot", "gauge", [], [([], gateway['waiting'])])
+    flights = single_flight.stats()['endpoints']
+    yield ("single_flight_coalesced", "Requests served by an identical in-flight call", "counter", ["endpoint"],
+           [([name], counts['coalesced']) for name, counts in flights.items()])
+    for name, stats in (("export", artifact_cache.stats()), ("rank_features", rank_features.stats())):
+        yield (f"{name}_cache_hits", f"{name} cache hits", "counter", [], [([], stats['hits'])])
+        yield (f"{name}_cache_misses", f"{name} cache misses", "counter", [], [([], stats['misses'])])
+        yield (f"{name}_cache_bytes", f"{name} cache size in bytes", "gauge", [], [([], stats['bytes'])])
+    pools = {"extraction": extraction_pool.stats(), "render": render_pool.stats()}
+    yield ("worker_pool_in_flight", "Jobs running or queued in a worker pool", "gauge", ["pool"],
+           [([name], stats['inFlight']) for name, stats in pools.items()])
+    for field in ("completed", "failed", "timedOut", "rejected"):
+        yield (f"worker_pool_{field.lower()}", f"Worker pool jobs {field}", "counter", ["pool"],
+               [([name], stats[field]) for name, stats in pools.items()])
+    index = resume_search.index.stats()
+    yield ("search_index_rows", "Live resumes in the search index", "gauge", [], [([], index['live'])])
+    for field, documentation in (("submitted", "Background jobs submitted"), ("succeeded", "Background jobs succeeded"),
+                                 ("failed", "Background jobs failed permanently"), ("retried", "Background job attempts retried"),
+                                 ("dead", "Background jobs dead-lettered after their last attempt")):
+        counts = getattr(job_queue, field)
+        yield (f"jobs_{field}", documentation, "counter", ["kind"], [([kind], count) for kind, count in counts.items()])
+    yield ("jobs_running", "Background jobs running in this process", "gauge", [], [([], job_queue.running)])
+    yield ("startup_import_seconds", "Time spent importing modules", "gauge", [],
+           [([], sum(own for _, own in lazy_imports.import_timer.modules.values()))])
+
+metrics.register_stats(service_stats)
+
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    """Prometheus metrics"""
+    body, content_type = metrics.render()
+    return Response(body, media_type=content_type)
+
+app.add_middleware(
+    http_cache.CompressionMiddleware,
+    minimum_size=int(os.environ.get('COMPRESSION_MIN_BYTES', '1024')),
+    gzip_level=int(os.environ.get('GZIP_LEVEL', '6')),
+    brotli_quality=int(os.environ.get('BROTLI_QUALITY', '4'))
+)
+# Inside CORS, so early 413s still carry CORS headers
+app.add_middleware(uploads.UploadLimitMiddleware, limits={
+    "/api/parse-resume": UPLOAD_MAX_BYTES + uploads.MULTIPART_OVERHEAD,
+    "/api/parse-resume/stream": UPLOAD_MAX_BYTES + uploads.MULTIPART_OVERHEAD,
+    "/api/parse-resume/batch": BATCH_MAX_REQUEST_BYTES,
+    "/api/jobs/parse-resume": JOB_MAX_UPLOAD_BYTES + uploads.MULTIPART_OVERHEAD,
+})
 app.add_middleware(
     CORSMiddleware,
     allow_credentials=True,
     allow_origins=["*"],
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing"],
 )
+# Outermost, so request timings include CORS handling
+app.add_middleware(metrics.MetricsMiddleware, add_server_timing=os.environ.get('SERVER_TIMING', '1') == '1')
+
+@app.on_event("startup")
+async def create_indexes():
+    try:
+        await db.resumes.create_index("id", unique=True)
+    except Exception as e:
+        # Older deployments may already hold duplicate ids; keep lookups fast anyway
+        logger.error(f"Could not create unique index on resumes.id: {str(e)}")
+        await db.resumes.create_index("id")
+    await db.resumes.create_index("updatedAt")
+    await db.resumes.create_index([("updatedAt", -1), ("id", -1)])
+    # Saves allocate versions with $inc, which would restart from 1 on documents
+    # stored before resumes were versioned
+    await db.resumes.update_many({"version": {"$exists": False}}, {"$set": {"version": 1}})
+    await llm_cache.ensure_indexes()
+    await parsed_uploads.ensure_indexes()
+    await resume_history.ensure_indexes()
+    await job_store.ensure_indexes()
+
+    # A missing, outdated or out-of-step search index is rebuilt in the background
+    stored = await db.resumes.count_documents({})
+    if len(resume_search.index.rows) != stored:
+        logger.info(f"Search index has {len(resume_search.index.rows)} resumes, database has {stored}; rebuilding")
+        resume_search.start_rebuild()
+
+@app.on_event("startup")
+async def report_startup():
+    slowest = ", ".join(f"{row['module']} {row['selfMs']:.0f}ms" for row in lazy_imports.import_timer.slowest(10))
+    logger.info(f"Startup took {lazy_imports.since_start():.2f}s; slowest imports: {slowest}")
+    warm_up.start()
+
+@app.on_event("startup")
+async def start_job_workers():
+    job_queue.start()
 
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    warm_up.stop()
+    await job_queue.stop()
     client.close()
+    extraction_pool.shutdown()
+    render_pool.shutdown()
+    resume_search.close()
@@ -0,0 +1,62 @@
+import asyncio
+import logging
+from collections import defaultdict
+from typing import Dict, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class _Flight:
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Share one in-flight call between concurrent callers with the same key.
+
+    The call runs in its own task, so a caller that disconnects stops waiting
+    without cancelling it for the others; only when every caller has gone is
+    the shared task cancelled. Results and exceptions go to every caller.
+    """
+
+    def __init__(self):
+        self._flights: Dict[Tuple[str, str], _Flight] = {}
+        self.calls: Dict[str, int] = defaultdict(int)
+        self.coalesced: Dict[str, int] = defaultdict(int)
+
+    async def run(self, name: str, key: str, func, *args, **kwargs):
+        flight_key = (name, key)
+        flight = self._flights.get(flight_key)
+        if flight is None:
+            flight = _Flight(asyncio.ensure_future(func(*args, **kwargs)))
+            self._flights[flight_key] = flight
+            flight.task.add_done_callback(lambda _: self._forget(flight_key, flight))
+            self.calls[name] += 1
+        else:
+            self.coalesced[name] += 1
+            logger.info(f"Coalesced {name} request onto an in-flight call")
+
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                # Nobody is left to receive the result; later callers start afresh
+                self._forget(flight_key, flight)
+                flight.task.cancel()
+
+    def _forget(self, flight_key: Tuple[str, str], flight: _Flight):
+        if self._flights.get(flight_key) is flight:
+            del self._flights[flight_key]
+
+    def stats(self) -> dict:
+        names = set(self.calls) | set(self.coalesced)
+        return {
+            "inFlight": len(self._flights),
+            "endpoints": {
+                name: {"calls": self.calls[name], "coalesced": self.coalesced[name]}
+                for name in sorted(names)
+            },
+        }
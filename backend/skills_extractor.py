@@ -0,0 +1,294 @@
+"""Local skills extraction over a bundled taxonomy.
+
+Every skill name and alias in data/skills_taxonomy.json is compiled once at
+import into an Aho-Corasick automaton, so a job description is scanned in a
+single pass however large the taxonomy grows. Text is normalised (case,
+dashes, whitespace) before matching. Aliases that are ordinary English words
+in lower case ("Go", "REST", "Spark") are listed under ``exactCase`` and only
+match when written that way. Anything the taxonomy does not cover is left to
+``candidate_phrases``, which picks out the few tech-looking terms worth
+asking the LLM about.
+"""
+import json
+from collections import deque
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+from ats_scoring import STOPWORDS, TOKEN_RE
+
+TAXONOMY_PATH = Path(__file__).parent / "data" / "skills_taxonomy.json"
+
+CATEGORIES = ("Programming", "Frameworks", "Databases", "Cloud", "Tools", "Soft Skills", "Other")
+
+MAX_CANDIDATES = 30
+
+# Characters that continue a term, so "C" does not match inside "C++" or "C-suite"
+_TERM_CHARS = "+#"
+
+_DASHES = dict.fromkeys(map(ord, "‐‑‒–—−"), "-")
+
+# Capitalised words that are never skills, mostly sentence furniture and dates
+_NOT_SKILLS = frozenset("""
+monday tuesday wednesday thursday friday saturday sunday january february march april may june july
+august september october november december we you our your the this they it he she if as in on at for
+to and or but an a all any hybrid remote uk us usa eu ltd inc llc team role salary benefits
+""".split())
+
+
+@dataclass(frozen=True)
+class Skill:
+    name: str
+    category: str
+
+
+def normalise(text: str) -> Tuple[str, List[int]]:
+    """Lower-case ``text``, unify dashes and collapse whitespace.
+
+    Returns the normalised string and, for each of its characters, the index
+    of the character it came from, so matches can be mapped back.
+    """
+    chars: List[str] = []
+    origin: List[int] = []
+    previous_space = True
+    for index, char in enumerate(text.translate(_DASHES)):
+        if char.isspace():
+            if not previous_space:
+                chars.append(" ")
+                origin.append(index)
+            previous_space = True
+            continue
+        lowered = char.lower()
+        # Keep one character per source character so offsets stay aligned
+        chars.append(lowered if len(lowered) == 1 else char)
+        origin.append(index)
+        previous_space = False
+    if chars and chars[-1] == " ":
+        chars.pop()
+        origin.pop()
+    return "".join(chars), origin
+
+
+def _normalised(text: str) -> str:
+    return normalise(text)[0]
+
+
+class Automaton:
+    """Aho-Corasick automaton over normalised patterns"""
+
+    def __init__(self):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[Tuple[int, object]]] = [[]]
+
+    def add(self, pattern: str, value: object):
+        state = 0
+        for char in pattern:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            state = next_state
+        self._output[state].append((len(pattern), value))
+
+    def build(self):
+        """Compute failure links breadth first; call once after all patterns are added"""
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                candidate = self._goto[fail].get(char, 0)
+                self._fail[next_state] = candidate if candidate != next_state else 0
+                self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
+
+    def iter_matches(self, text: str):
+        """(start, end, value) for every pattern occurrence in ``text``"""
+        state = 0
+        for index, char in enumerate(text):
+            while state and char not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(char, 0)
+            for length, value in self._output[state]:
+                yield index + 1 - length, index + 1, value
+
+
+@dataclass(frozen=True)
+class _Pattern:
+    skill: Skill
+    exact: Optional[str] = None
+
+
+def _is_term_char(char: str) -> bool:
+    return char.isalnum() or char in _TERM_CHARS
+
+
+def _at_boundary(text: str, start: int, end: int) -> bool:
+    if start > 0 and (_is_term_char(text[start - 1]) or (text[start - 1] == "." and start > 1 and text[start - 2].isalnum())):
+        return False
+    if end < len(text):
+        following = text[end]
+        if _is_term_char(following):
+            return False
+        # "node" must not match the start of "node.js", nor "c" the start of "c-suite"
+        if following in ".-/" and end + 1 < len(text) and text[end + 1].isalnum():
+            return False
+    return True
+
+
+class Taxonomy:
+    """Skill names, aliases and categories compiled for single-pass matching"""
+
+    def __init__(self, data: dict):
+        self.version = data["version"]
+        self.skills: Dict[str, Skill] = {}
+        self.aliases: Dict[str, Skill] = {}
+        self.automaton = Automaton()
+        for category, entries in data["categories"].items():
+            if category not in CATEGORIES:
+                raise ValueError(f"Unknown skills category: {category}")
+            for entry in entries:
+                skill = Skill(entry["name"], category)
+                self.skills[skill.name] = skill
+                exact = entry.get("exactCase", [])
+                folded = {form.lower() for form in exact}
+                for form in [entry["name"], *entry.get("aliases", [])]:
+                    if form.lower() not in folded:
+                        self._add(_normalised(form), _Pattern(skill))
+                for form in exact:
+                    self._add(_normalised(form), _Pattern(skill, exact=form))
+        self.automaton.build()
+
+    def _add(self, key: str, pattern: _Pattern):
+        self.aliases.setdefault(key, pattern.skill)
+        self.automaton.add(key, pattern)
+
+    @classmethod
+    def load(cls, path: Path = TAXONOMY_PATH) -> "Taxonomy":
+        with open(path) as f:
+            return cls(json.load(f))
+
+    def find(self, text: str) -> List[Tuple[int, int, Skill]]:
+        """Non-overlapping (start, end, skill) spans in ``text``, leftmost-longest first"""
+        normalised, origin = normalise(text)
+        matches = []
+        for start, end, pattern in self.automaton.iter_matches(normalised):
+            if not _at_boundary(normalised, start, end):
+                continue
+            source_start, source_end = origin[start], origin[end - 1] + 1
+            if pattern.exact is not None and text[source_start:source_end] != pattern.exact:
+                continue
+            matches.append((source_start, source_end, pattern.skill))
+        matches.sort(key=lambda m: (m[0], m[0] - m[1]))
+
+        spans = []
+        covered_to = 0
+        for start, end, skill in matches:
+            if start >= covered_to:
+                spans.append((start, end, skill))
+                covered_to = end
+        return spans
+
+    def extract(self, text: str) -> List[Skill]:
+        """Distinct skills mentioned in ``text``, in order of first mention"""
+        seen: Set[str] = set()
+        skills = []
+        for _, _, skill in self.find(text):
+            if skill.name not in seen:
+                seen.add(skill.name)
+                skills.append(skill)
+        return skills
+
+    def canonical(self, name: str) -> str:
+        """Canonical skill name for a name or alias, or the normalised name if unknown"""
+        key = _normalised(name)
+        skill = self.aliases.get(key)
+        return skill.name.lower() if skill else key
+
+    def lookup(self, name: str) -> Optional[Skill]:
+        return self.aliases.get(_normalised(name))
+
+
+TAXONOMY = Taxonomy.load()
+
+
+# A capitalised word right after one of these (or at the start) begins a sentence
+SENTENCE_BREAKS = ".!?:;\n•*-(\"'"
+
+
+def candidate_phrases(text: str, taxonomy: Taxonomy = TAXONOMY, limit: int = MAX_CANDIDATES) -> List[str]:
+    """Tech-looking terms in ``text`` that the taxonomy did not match.
+
+    Picks acronyms, CamelCase and dotted/versioned names ("HIPAA", "GraphQL",
+    "Vue3") plus runs of capitalised words that do not start a sentence
+    ("Google Tag Manager"), skipping anything inside a taxonomy match.
+    """
+    # Sorted and non-overlapping, and tokens arrive in order, so one pointer walks them
+    covered = [(start, end) for start, end, _ in taxonomy.find(text)]
+    next_covered = 0
+
+    def is_covered(start: int, end: int) -> bool:
+        nonlocal next_covered
+        while next_covered < len(covered) and covered[next_covered][1] <= start:
+            next_covered += 1
+        return next_covered < len(covered) and covered[next_covered][0] < end
+
+    candidates: List[str] = []
+    seen: Set[str] = set()
+    run: List[str] = []
+
+    def flush():
+        if run:
+            phrase = " ".join(run)
+            key = phrase.lower()
+            if key not in seen and key not in _NOT_SKILLS:
+                seen.add(key)
+                candidates.append(phrase)
+            run.clear()
+
+    previous_end = -1
+    previous_match_end = 0
+    # Last non-space character before the current token
+    last_char = ""
+    for match in TOKEN_RE.finditer(text):
+        word = match.group().rstrip(".-/")
+        start, end = match.start(), match.start() + len(word)
+        lowered = word.lower()
+        gap = text[previous_match_end:start].rstrip()
+        if gap:
+            last_char = gap[-1]
+        sentence_start = not last_char or last_char in SENTENCE_BREAKS
+        previous_match_end = match.end()
+        last_char = text[previous_match_end - 1]
+        # A run of capitalised words is broken by anything other than a single space
+        if run and text[previous_end:start] != " ":
+            flush()
+        previous_end = end
+
+        if is_covered(start, end) or lowered in STOPWORDS or lowered in _NOT_SKILLS or word.isdigit():
+            flush()
+            continue
+        technical = (
+            any(c.isdigit() for c in word) and any(c.isalpha() for c in word)
+            or any(c in "+#./" for c in word)
+            or any(c.isupper() for c in word[1:])
+        )
+        capitalised = word[0].isupper() and not sentence_start
+        if technical and len(word) > 1:
+            flush()
+            run.append(word)
+            flush()
+        elif capitalised and len(word) > 2:
+            run.append(word)
+        else:
+            flush()
+        if len(candidates) >= limit:
+            break
+    flush()
+    return candidates[:limit]
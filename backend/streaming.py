@@ -0,0 +1,185 @@
+"""Helpers for streaming LLM output to clients as Server-Sent Events"""
+import json
+from typing import List, Optional, Tuple
+
+
+def sse_event(event: str, data) -> str:
+    """Format one SSE message with a JSON payload"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+# Sent before the first token so proxies and browsers flush the headers straight away
+SSE_OPEN = ": stream open\n\n"
+
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    # Stop nginx buffering the stream, which would defeat the point of it
+    "X-Accel-Buffering": "no",
+}
+
+
+class DelimitedStream:
+    """Split streamed model output into a body and a trailer at a delimiter line.
+
+    ``feed`` returns the body text that is safe to forward, holding back just
+    enough characters to be sure the delimiter is not split across chunks.
+    """
+
+    def __init__(self, delimiter: str):
+        self.delimiter = delimiter
+        self._pending = ""
+        self._body: List[str] = []
+        self._trailer: Optional[List[str]] = None
+
+    def feed(self, chunk: str) -> str:
+        if self._trailer is not None:
+            self._trailer.append(chunk)
+            return ""
+        self._pending += chunk
+        index = self._pending.find(self.delimiter)
+        if index >= 0:
+            emit = self._pending[:index]
+            self._trailer = [self._pending[index + len(self.delimiter):]]
+            self._pending = ""
+        else:
+            keep = self._partial_suffix(self._pending)
+            emit = self._pending[:len(self._pending) - keep]
+            self._pending = self._pending[len(emit):]
+        self._body.append(emit)
+        return emit
+
+    def _partial_suffix(self, text: str) -> int:
+        """Length of the longest suffix of ``text`` that could start the delimiter"""
+        for size in range(min(len(text), len(self.delimiter) - 1), 0, -1):
+            if self.delimiter.startswith(text[-size:]):
+                return size
+        return 0
+
+    def finish(self) -> Tuple[str, str]:
+        """Flush held-back text; returns (remaining body, trailer)"""
+        rest = self._pending
+        self._pending = ""
+        self._body.append(rest)
+        return rest, "".join(self._trailer or [])
+
+    @property
+    def body(self) -> str:
+        return "".join(self._body)
+
+
+class JsonSectionStream:
+    """Pick complete top-level values out of a JSON object as it streams in.
+
+    ``feed`` returns ("item", key, value) for each finished element of a
+    top-level array and ("value", key, value) for each finished top-level
+    value, arrays included. Anything before the opening brace (such as a
+    markdown fence) is skipped.
+    """
+
+    def __init__(self):
+        self._chunks: List[str] = []
+        # Unconsumed tail of the text; positions below are offsets into the whole text
+        self._buffer = ""
+        self._base = 0
+        self._pos = 0
+        self._stack: List[str] = []
+        self._in_string = False
+        self._escape = False
+        self._done = False
+        self._key: Optional[str] = None
+        self._key_start: Optional[int] = None
+        self._expect_key = False
+        self._value_start: Optional[int] = None
+        self._item_start: Optional[int] = None
+
+    def feed(self, chunk: str) -> List[Tuple[str, str, object]]:
+        self._chunks.append(chunk)
+        if self._done:
+            return []
+        self._buffer += chunk
+        events = []
+        buffer, base = self._buffer, self._base
+        for i in range(self._pos, base + len(buffer)):
+            if self._done:
+                break
+            c = buffer[i - base]
+            depth = len(self._stack)
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == "\\":
+                    self._escape = True
+                elif c == '"':
+                    self._in_string = False
+                    if self._key_start is not None:
+                        self._key = json.loads(self._slice(self._key_start, i + 1))
+                        self._key_start = None
+                continue
+            if c == '"':
+                self._in_string = True
+                if depth == 1 and self._expect_key:
+                    self._key_start = i
+                    self._expect_key = False
+            elif c in "{[":
+                if not self._stack and c != "{":
+                    continue
+                self._stack.append(c)
+                if depth == 0:
+                    self._expect_key = True
+                elif depth == 1 and c == "[":
+                    self._item_start = i + 1
+            elif c in "}]":
+                if not self._stack:
+                    continue
+                if depth == 2 and c == "]":
+                    self._emit_item(i, events)
+                    self._item_start = None
+                if depth == 1:
+                    # An empty object has no value to emit
+                    if self._value_start is not None:
+                        self._emit_value(i, events)
+                    self._done = True
+                self._stack.pop()
+            elif c == ":" and depth == 1:
+                self._value_start = i + 1
+            elif c == "," and self._value_start is not None:
+                if depth == 1:
+                    self._emit_value(i, events)
+                    self._expect_key = True
+                elif depth == 2 and self._stack[1] == "[":
+                    self._emit_item(i, events)
+                    self._item_start = i + 1
+        self._pos = base + len(buffer)
+        self._trim()
+        return events
+
+    def _slice(self, start: int, end: int) -> str:
+        return self._buffer[start - self._base:end - self._base]
+
+    def _trim(self):
+        """Drop buffered text that no unfinished key, value or item starts in"""
+        starts = [start for start in (self._key_start, self._value_start, self._item_start) if start is not None]
+        keep = min(starts, default=self._pos)
+        self._buffer = self._buffer[keep - self._base:]
+        self._base = keep
+
+    def _emit_item(self, end: int, events: list):
+        raw = self._slice(self._item_start, end)
+        if raw.strip():
+            events.append(("item", self._key, json.loads(raw)))
+
+    def _emit_value(self, end: int, events: list):
+        raw = self._slice(self._value_start, end)
+        if raw.strip():
+            events.append(("value", self._key, json.loads(raw)))
+        self._value_start = None
+
+    @property
+    def text(self) -> str:
+        """Everything fed so far"""
+        return "".join(self._chunks)
+
+    @property
+    def complete(self) -> bool:
+        """Whether the closing brace of the object has been seen"""
+        return self._done
@@ -0,0 +1,227 @@
+"""Uploaded files, spooled to disk and identified by content.
+
+Uploads are copied to a temporary file in chunks while being hashed, so a
+resume is never held in memory whole and extraction workers are handed a
+path (which they mmap) instead of a pickled copy of the bytes. Size limits
+are enforced twice: ``UploadLimitMiddleware`` rejects an oversized request
+body before it is parsed, and ``spool`` caps each file. The file type comes
+from its leading bytes, not its name. Every file spooled while the
+middleware handles a request is removed once the response is finished,
+even when it never started.
+"""
+import asyncio
+import hashlib
+import json
+import os
+import tempfile
+import zipfile
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import HTTPException, UploadFile
+
+CHUNK_SIZE = 1024 * 1024
+
+# Room for multipart boundaries and part headers around a file in a request body
+MULTIPART_OVERHEAD = 64 * 1024
+
+# Anywhere in the first KiB, as PDF readers allow
+PDF_MAGIC = b"%PDF-"
+ZIP_MAGIC = b"PK\x03\x04"
+
+
+# Files spooled while handling the current request, removed by UploadLimitMiddleware
+_request_spools: ContextVar[Optional[List["SpooledUpload"]]] = ContextVar("request_spools", default=None)
+
+
+class UploadTooLarge(HTTPException):
+    """413 raised while an upload is read. An HTTPException, so FastAPI passes
+    it through when it is raised from inside request body parsing."""
+
+    def __init__(self, max_bytes: int):
+        super().__init__(status_code=413, detail=f"Upload exceeds {max_bytes} bytes")
+
+
+def detect_kind(path: str) -> Optional[str]:
+    """"pdf", "docx" or "zip" from the file's contents, or None"""
+    with open(path, "rb") as f:
+        head = f.read(1024)
+    # ZIP first: an archive of stored PDFs has "%PDF-" in its first KiB too
+    if head.startswith(ZIP_MAGIC):
+        try:
+            with zipfile.ZipFile(path) as zf:
+                names = set(zf.namelist())
+        except zipfile.BadZipFile:
+            return None
+        # A DOCX is a ZIP holding a WordprocessingML main part
+        return "docx" if "word/document.xml" in names else "zip"
+    if PDF_MAGIC in head:
+        return "pdf"
+    return None
+
+
+@dataclass
+class SpooledUpload:
+    path: str
+    size: int
+    sha256: str
+    kind: Optional[str]
+    filename: str = ""
+
+    def read_bytes(self) -> bytes:
+        with open(self.path, "rb") as f:
+            return f.read()
+
+    def remove(self):
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+
+
+def _spool_file(directory: Optional[str]):
+    out = tempfile.NamedTemporaryFile(prefix="upload_", suffix=".bin", dir=directory, delete=False)
+    spools = _request_spools.get()
+    if spools is not None:
+        spools.append(SpooledUpload(out.name, 0, "", None))
+    return out
+
+
+async def spool(file: UploadFile, max_bytes: int, directory: Optional[str] = None) -> SpooledUpload:
+    """Copy an upload to a temporary file, raising UploadTooLarge past ``max_bytes``"""
+    digest = hashlib.sha256()
+    size = 0
+    out = _spool_file(directory)
+    try:
+        while True:
+            chunk = await file.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            size += len(chunk)
+            if size > max_bytes:
+                raise UploadTooLarge(max_bytes)
+            digest.update(chunk)
+            await asyncio.to_thread(out.write, chunk)
+        out.close()
+        kind = await asyncio.to_thread(detect_kind, out.name)
+    except BaseException:
+        out.close()
+        os.unlink(out.name)
+        raise
+    return SpooledUpload(out.name, size, digest.hexdigest(), kind, file.filename or "")
+
+
+def spool_bytes(data: bytes, filename: str = "", directory: Optional[str] = None) -> SpooledUpload:
+    """Write bytes already in memory (e.g. a queued job's payload) to a spooled upload"""
+    with _spool_file(directory) as out:
+        out.write(data)
+    return SpooledUpload(out.name, len(data), hashlib.sha256(data).hexdigest(), detect_kind(out.name), filename)
+
+
+def unpack_zip(archive: SpooledUpload, max_entry_bytes: int, directory: Optional[str] = None,
+               max_entries: Optional[int] = None,
+               max_total_bytes: Optional[int] = None) -> List[Tuple[str, Optional[SpooledUpload]]]:
+    """Spool each file in a ZIP upload; entries over ``max_entry_bytes`` come back as None.
+
+    More than ``max_entries`` files, or more than ``max_total_bytes`` once
+    unpacked, is rejected with a 413 before anything is written, going by
+    the archive's directory, and the byte total is enforced again while
+    unpacking.
+    """
+    entries: List[Tuple[str, Optional[SpooledUpload]]] = []
+    try:
+        with zipfile.ZipFile(archive.path) as zf:
+            infos = [
+                info for info in zf.infolist()
+                if not (info.is_dir() or info.filename.startswith('__MACOSX/')
+                        or os.path.basename(info.filename).startswith('.'))
+            ]
+            if max_entries is not None and len(infos) > max_entries:
+                raise HTTPException(status_code=413, detail="Archive holds too many files")
+            if max_total_bytes is not None and \
+                    sum(info.file_size for info in infos if info.file_size <= max_entry_bytes) > max_total_bytes:
+                raise UploadTooLarge(max_total_bytes)
+            unpacked = 0
+            for info in infos:
+                name = info.filename
+                if info.file_size > max_entry_bytes:
+                    entries.append((name, None))
+                    continue
+                digest = hashlib.sha256()
+                with zf.open(info) as source, _spool_file(directory) as out:
+                    try:
+                        while True:
+                            chunk = source.read(CHUNK_SIZE)
+                            if not chunk:
+                                break
+                            unpacked += len(chunk)
+                            if max_total_bytes is not None and unpacked > max_total_bytes:
+                                raise UploadTooLarge(max_total_bytes)
+                            digest.update(chunk)
+                            out.write(chunk)
+                    except BaseException:
+                        os.unlink(out.name)
+                        raise
+                entries.append((name, SpooledUpload(out.name, info.file_size, digest.hexdigest(), detect_kind(out.name), name)))
+    except BaseException:
+        for _, upload in entries:
+            if upload is not None:
+                upload.remove()
+        raise
+    return entries
+
+
+class UploadLimitMiddleware:
+    """ASGI middleware capping request bodies on upload routes.
+
+    A Content-Length over the limit is answered with 413 before any of the
+    body is read; chunked bodies are counted as they arrive and abandoned
+    with a 413 as soon as they pass it. Files spooled for the request are
+    removed when the response has been sent, failed or been abandoned.
+    """
+
+    def __init__(self, app, limits: Dict[str, int]):
+        self.app = app
+        self.limits = limits
+
+    async def __call__(self, scope, receive, send):
+        limit = self.limits.get(scope["path"]) if scope["type"] == "http" else None
+        if limit is None:
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope["headers"])
+        try:
+            declared = int(headers.get(b"content-length", b""))
+        except ValueError:
+            declared = None
+        if declared is not None and declared > limit:
+            body = json.dumps({"detail": f"Upload exceeds {limit} bytes"}).encode()
+            await send({"type": "http.response.start", "status": 413, "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"connection", b"close"),
+            ]})
+            await send({"type": "http.response.body", "body": body})
+            return
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    raise UploadTooLarge(limit)
+            return message
+
+        spools: List[SpooledUpload] = []
+        token = _request_spools.set(spools)
+        try:
+            await self.app(scope, limited_receive, send)
+        finally:
+            _request_spools.reset(token)
+            for upload in spools:
+                upload.remove()
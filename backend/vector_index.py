@@ -0,0 +1,533 @@
+"""Persistent approximate nearest-neighbour index over stored resumes.
+
+Resumes are embedded offline by signed feature hashing of the stemmed 1-2
+word terms ats_scoring extracts, weighted by the bundled corpus IDF, into
+``DIM`` float32 dimensions and L2-normalised, so a dot product is a cosine.
+Each term is hashed into two slots, which keeps a single collision from
+making an unrelated short resume look like a strong match.
+
+On disk, in one directory:
+
+* ``vectors.f32``: row-major float32 matrix, memory-mapped and grown by
+  doubling. Rows are append-only; an update appends a new row.
+* ``assign.i32``: the IVF list each row belongs to (-1 before training)
+* ``centroids.npy``: IVF centroids, trained by spherical k-means
+* ``ids.log``: journal of ``+row id`` / ``-row id`` lines, replayed on load
+* ``meta.json``: format version, dimensions and capacity
+
+Queries probe the ``nprobe`` closest lists, or scan everything while the
+index is small. Deleted and replaced rows are skipped via an alive mask
+until ``compact`` rewrites the files without them.
+
+``train`` and ``compact`` do their heavy work on a snapshot without the
+index lock, since rows are never modified once written, and take the lock
+only to swap the result in and catch up on writes made in the meantime.
+
+The files belong to one process. ``ResumeSearch`` holds an exclusive lock
+on ``<directory>.lock`` and refuses to start if another process has it, as
+a second uvicorn worker would only ever see its own writes.
+"""
+import asyncio
+import fcntl
+import hashlib
+import json
+import logging
+import math
+import os
+import shutil
+import threading
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from ats_scoring import CORPUS, resume_text, text_ngrams
+
+logger = logging.getLogger(__name__)
+
+# Bump when the embedding or file layout changes; older indexes are rebuilt
+INDEX_VERSION = 2
+DIM = 512
+HASHES = 2
+BIGRAM_WEIGHT = 0.5
+INITIAL_CAPACITY = 1024
+# Below this many live rows a full scan is faster than probing lists
+IVF_MIN_ROWS = 4096
+IVF_TRAIN_SAMPLE = 20000
+IVF_ITERATIONS = 10
+DEFAULT_NPROBE = 8
+# Compact once this share of rows is dead
+COMPACT_DEAD_RATIO = 0.25
+
+
+def embed_text(text: str) -> np.ndarray:
+    """Unit-length float32 embedding of free text"""
+    vector = np.zeros(DIM, dtype=np.float32)
+    counts = Counter((term, n) for term, _, n in text_ngrams(text, 2))
+    for (term, n), tf in counts.items():
+        weight = (1 + math.log(tf)) * CORPUS.idf(term) * (1.0 if n == 1 else BIGRAM_WEIGHT)
+        digest = hashlib.blake2b(term.encode("utf-8"), digest_size=4 * HASHES).digest()
+        # Each term lands in HASHES independent signed slots, so one collision only shares part of its weight
+        for offset in range(0, 4 * HASHES, 4):
+            bits = int.from_bytes(digest[offset:offset + 4], "little")
+            vector[bits % DIM] += -weight if bits >> 31 else weight
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+def embed_resume(resume: dict) -> np.ndarray:
+    """Embedding of a ResumeData dict's content; names are left out as they only add noise"""
+    return embed_text(resume_text(resume))
+
+
+class VectorIndex:
+    """Memory-mapped vectors with an id map and IVF lists; thread-safe"""
+
+    def __init__(self, directory: Path, dim: int = DIM):
+        self.directory = Path(directory)
+        self.dim = dim
+        self._lock = threading.RLock()
+        # Serialises train and compact, which run outside _lock for most of their work
+        self._maintenance_lock = threading.Lock()
+        self._open()
+
+    # Files
+
+    def _open(self):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        meta = self._read_meta()
+        if meta is None or meta.get("version") != INDEX_VERSION or meta.get("dim") != self.dim:
+            self._reset()
+            meta = self._read_meta()
+        self.capacity = meta["capacity"]
+        self.trained_rows = meta.get("trainedRows", 0)
+        self._vectors = self._map("vectors.f32", np.float32, (self.capacity, self.dim))
+        self._assign = self._map("assign.i32", np.int32, (self.capacity,))
+        self.centroids = self._load_centroids()
+        self._load_journal()
+
+    def _path(self, name: str) -> Path:
+        return self.directory / name
+
+    def _read_meta(self) -> Optional[dict]:
+        try:
+            with open(self._path("meta.json")) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_meta(self):
+        tmp = self._path("meta.json.tmp")
+        with open(tmp, "w") as f:
+            json.dump({"version": INDEX_VERSION, "dim": self.dim, "capacity": self.capacity,
+                       "trainedRows": self.trained_rows}, f)
+        os.replace(tmp, self._path("meta.json"))
+
+    def _reset(self):
+        for name in ("vectors.f32", "assign.i32", "centroids.npy", "ids.log"):
+            self._path(name).unlink(missing_ok=True)
+        self.capacity = INITIAL_CAPACITY
+        self.trained_rows = 0
+        self._write_meta()
+
+    def _map(self, name: str, dtype, shape: tuple) -> np.memmap:
+        path = self._path(name)
+        size = int(np.prod(shape)) * np.dtype(dtype).itemsize
+        fresh = not path.exists()
+        with open(path, "ab") as f:
+            if f.tell() < size:
+                f.truncate(size)
+        mapped = np.memmap(path, dtype=dtype, mode="r+", shape=shape)
+        if fresh and dtype == np.int32:
+            mapped[:] = -1
+        return mapped
+
+    def _load_centroids(self) -> Optional[np.ndarray]:
+        path = self._path("centroids.npy")
+        return np.load(path) if path.exists() else None
+
+    def _load_journal(self):
+        self.row_ids: List[Optional[str]] = []
+        self.rows: Dict[str, int] = {}
+        # Built once the journal is replayed
+        self.alive: Optional[np.ndarray] = None
+        path = self._path("ids.log")
+        if path.exists():
+            with open(path) as f:
+                for line in f:
+                    op, (row_text, _, resume_id) = line[:1], line[1:].rstrip("\n").partition(" ")
+                    if op not in ("+", "-") or not row_text.isdigit() or not resume_id:
+                        continue  # torn final line after a crash
+                    row = int(row_text)
+                    if row >= self.capacity:
+                        continue
+                    while len(self.row_ids) <= row:
+                        self.row_ids.append(None)
+                    if op == "+":
+                        self._forget(resume_id)
+                        self.row_ids[row] = resume_id
+                        self.rows[resume_id] = row
+                    elif self.rows.get(resume_id) == row:
+                        self._forget(resume_id)
+        self.count = len(self.row_ids)
+        self.alive = np.zeros(self.capacity, dtype=bool)
+        self.alive[list(self.rows.values())] = True
+        self._journal = open(path, "a")
+        if self._journal.tell() and not path.read_bytes().endswith(b"\n"):
+            # Terminate a torn final line so the next entry is not glued onto it
+            self._journal.write("\n")
+        self._build_postings()
+
+    def _build_postings(self):
+        self._postings: List[List[int]] = []
+        if self.centroids is None:
+            return
+        self._postings = [[] for _ in range(len(self.centroids))]
+        for row in self.rows.values():
+            target = int(self._assign[row])
+            if target < 0:
+                target = self._nearest_list(self._vectors[row])
+                self._assign[row] = target
+            self._postings[target].append(row)
+
+    def _forget(self, resume_id: str) -> Optional[int]:
+        row = self.rows.pop(resume_id, None)
+        if row is not None:
+            self.row_ids[row] = None
+            if self.alive is not None:
+                self.alive[row] = False
+        return row
+
+    def _grow(self):
+        self._vectors.flush()
+        self._assign.flush()
+        del self._vectors, self._assign
+        self.capacity *= 2
+        self._vectors = self._map("vectors.f32", np.float32, (self.capacity, self.dim))
+        assign = self._map("assign.i32", np.int32, (self.capacity,))
+        assign[self.capacity // 2:] = -1
+        self._assign = assign
+        alive = np.zeros(self.capacity, dtype=bool)
+        alive[:len(self.alive)] = self.alive
+        self.alive = alive
+        self._write_meta()
+
+    # Writes
+
+    def _nearest_list(self, vector: np.ndarray) -> int:
+        return int(np.argmax(self.centroids @ vector))
+
+    def upsert(self, resume_id: str, vector: np.ndarray):
+        with self._lock:
+            self._forget(resume_id)
+            if self.count >= self.capacity:
+                self._grow()
+            row = self.count
+            self.count += 1
+            self.row_ids.append(resume_id)
+            self.rows[resume_id] = row
+            self._vectors[row] = vector
+            self.alive[row] = True
+            if self.centroids is not None:
+                target = self._nearest_list(vector)
+                self._assign[row] = target
+                self._postings[target].append(row)
+            self._journal.write(f"+{row} {resume_id}\n")
+            self._journal.flush()
+
+    def delete(self, resume_id: str) -> bool:
+        with self._lock:
+            row = self._forget(resume_id)
+            if row is None:
+                return False
+            self._journal.write(f"-{row} {resume_id}\n")
+            self._journal.flush()
+            return True
+
+    @property
+    def dead(self) -> int:
+        return self.count - len(self.rows)
+
+    def needs_compaction(self) -> bool:
+        return self.count >= 1024 and self.dead / self.count >= COMPACT_DEAD_RATIO
+
+    def needs_training(self) -> bool:
+        live = len(self.rows)
+        if live < IVF_MIN_ROWS:
+            return False
+        return self.centroids is None or live >= 4 * self.trained_rows
+
+    def compact(self):
+        """Rewrite the files with live rows only"""
+        with self._maintenance_lock:
+            with self._lock:
+                ids = list(self.rows)
+                live_rows = np.fromiter((self.rows[i] for i in ids), dtype=np.int64, count=len(ids))
+                snapshot_count = self.count
+                source_vectors, source_assign = self._vectors, self._assign
+            # Snapshot rows are never rewritten in place, so they can be copied without the lock
+            capacity = INITIAL_CAPACITY
+            while capacity < len(ids):
+                capacity *= 2
+            for name, source, dtype, fill in (("vectors.f32", source_vectors, np.float32, 0),
+                                              ("assign.i32", source_assign, np.int32, -1)):
+                tmp = self._path(name + ".tmp")
+                tmp.unlink(missing_ok=True)
+                shape = (capacity, self.dim) if dtype == np.float32 else (capacity,)
+                out = np.memmap(tmp, dtype=dtype, mode="w+", shape=shape)
+                out[:] = fill
+                for start in range(0, len(ids), 8192):
+                    chunk = live_rows[start:start + 8192]
+                    out[start:start + chunk.size] = source[chunk]
+                out.flush()
+                del out
+            del source_vectors, source_assign
+
+            with self._lock:
+                # Catch up on writes made while copying: rows deleted or replaced since
+                # are left out of the journal, rows added since are appended again
+                added = [(resume_id, np.array(self._vectors[row]))
+                         for resume_id, row in self.rows.items() if row >= snapshot_count]
+                journal = [f"+{position} {resume_id}\n" for position, (resume_id, row) in enumerate(zip(ids, live_rows))
+                           if self.rows.get(resume_id) == row]
+                self.close()
+                for name in ("vectors.f32", "assign.i32"):
+                    os.replace(self._path(name + ".tmp"), self._path(name))
+                tmp = self._path("ids.log.tmp")
+                with open(tmp, "w") as f:
+                    f.writelines(journal)
+                os.replace(tmp, self._path("ids.log"))
+                self.capacity = capacity
+                self._write_meta()
+                self._open()
+                for resume_id, vector in added:
+                    self.upsert(resume_id, vector)
+            logger.info(f"Compacted vector index to {len(journal) + len(added)} rows")
+
+    def train(self, seed: int = 0):
+        """Fit IVF centroids with spherical k-means and assign every row"""
+        with self._maintenance_lock:
+            with self._lock:
+                live_rows = np.sort(np.fromiter(self.rows.values(), dtype=np.int64, count=len(self.rows)))
+                vectors = self._vectors
+            if live_rows.size == 0:
+                return
+            rng = np.random.default_rng(seed)
+            sample_rows = live_rows if live_rows.size <= IVF_TRAIN_SAMPLE else rng.choice(live_rows, IVF_TRAIN_SAMPLE, replace=False)
+            sample = np.array(vectors[np.sort(sample_rows)])
+            nlist = int(min(1024, max(1, math.sqrt(live_rows.size))))
+            centroids = sample[rng.choice(len(sample), nlist, replace=False)]
+            for _ in range(IVF_ITERATIONS):
+                labels = np.argmax(sample @ centroids.T, axis=1)
+                sums = np.zeros_like(centroids)
+                np.add.at(sums, labels, sample)
+                norms = np.linalg.norm(sums, axis=1, keepdims=True)
+                # Empty clusters keep their previous centroid
+                centroids = np.where(norms > 0, sums / np.maximum(norms, 1e-12), centroids).astype(np.float32)
+
+            assignments = np.empty(live_rows.size, dtype=np.int32)
+            for start in range(0, live_rows.size, 8192):
+                chunk = live_rows[start:start + 8192]
+                assignments[start:start + 8192] = np.argmax(vectors[chunk] @ centroids.T, axis=1)
+            del vectors
+            tmp = self._path("centroids.tmp.npy")
+            np.save(tmp, centroids)
+
+            with self._lock:
+                self._assign[:] = -1
+                self._assign[live_rows] = assignments
+                self._assign.flush()
+                os.replace(tmp, self._path("centroids.npy"))
+                self.centroids = centroids
+                self.trained_rows = int(live_rows.size)
+                self._write_meta()
+                # Rows added since the snapshot are still -1 and get assigned here
+                self._build_postings()
+            logger.info(f"Trained vector index with {nlist} lists over {live_rows.size} rows")
+
+    # Reads
+
+    def search(self, vector: np.ndarray, k: int = 10, nprobe: int = DEFAULT_NPROBE) -> List[Tuple[str, float]]:
+        """Up to k (id, cosine similarity) pairs, best first"""
+        with self._lock:
+            if not self.rows:
+                return []
+            if self.centroids is None or len(self.rows) < IVF_MIN_ROWS:
+                candidates = np.flatnonzero(self.alive[:self.count])
+            else:
+                probe = np.argsort(-(self.centroids @ vector))[:nprobe]
+                candidates = np.fromiter(
+                    (row for target in probe for row in self._postings[target]), dtype=np.int64
+                )
+                candidates = candidates[self.alive[candidates]]
+            if candidates.size == 0:
+                return []
+            candidates.sort()
+            scores = self._vectors[candidates] @ vector
+            k = min(k, scores.size)
+            best = np.argpartition(-scores, k - 1)[:k]
+            best = best[np.argsort(-scores[best], kind="stable")]
+            return [(self.row_ids[candidates[i]], float(scores[i])) for i in best]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "rows": self.count,
+                "live": len(self.rows),
+                "dead": self.dead,
+                "capacity": self.capacity,
+                "dim": self.dim,
+                "lists": 0 if self.centroids is None else len(self.centroids),
+                "trainedRows": self.trained_rows,
+            }
+
+    def close(self):
+        with self._lock:
+            self._vectors.flush()
+            self._assign.flush()
+            self._journal.close()
+
+
+class ResumeSearch:
+    """Keeps a VectorIndex in step with the resumes collection"""
+
+    def __init__(self, collection, directory: Path):
+        self.collection = collection
+        self.directory = Path(directory)
+        self.directory.parent.mkdir(parents=True, exist_ok=True)
+        self._lock_file = open(self.directory.with_name(self.directory.name + ".lock"), "w")
+        try:
+            fcntl.flock(self._lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            self._lock_file.close()
+            raise RuntimeError(f"Search index {self.directory} is in use by another process; "
+                               f"run one server worker per SEARCH_INDEX_DIR")
+        self.index = VectorIndex(self.directory)
+        self.rebuilding = False
+        # Writes made while a rebuild runs, replayed onto the new index
+        self._pending: List[Tuple[str, Optional[np.ndarray]]] = []
+        # Index calls run in threads; this keeps writes off an index being swapped out
+        self._writes = asyncio.Lock()
+        self._maintenance: Optional[asyncio.Task] = None
+        self._rebuild: Optional[asyncio.Task] = None
+
+    @staticmethod
+    def _log_failure(what: str):
+        def callback(task: asyncio.Task):
+            if not task.cancelled() and task.exception() is not None:
+                logger.error(f"Search index {what} failed: {str(task.exception())}")
+        return callback
+
+    async def upsert(self, resume_id: str, resume: dict):
+        vector = await asyncio.to_thread(embed_resume, resume)
+        async with self._writes:
+            await asyncio.to_thread(self.index.upsert, resume_id, vector)
+            if self.rebuilding:
+                self._pending.append((resume_id, vector))
+
+    async def delete(self, resume_id: str):
+        async with self._writes:
+            await asyncio.to_thread(self.index.delete, resume_id)
+            if self.rebuilding:
+                self._pending.append((resume_id, None))
+
+    async def search(self, query: str, k: int) -> List[Tuple[str, float]]:
+        index = self.index
+        return await asyncio.to_thread(lambda: index.search(embed_text(query), k))
+
+    async def stats(self) -> dict:
+        return await asyncio.to_thread(self.index.stats)
+
+    def close(self):
+        self.index.close()
+        self._lock_file.close()
+
+    async def maintain(self):
+        """Compact or retrain in a thread when the index has drifted"""
+        if self.rebuilding:
+            return
+        if self.index.needs_compaction():
+            await asyncio.to_thread(self.index.compact)
+        if self.index.needs_training():
+            await asyncio.to_thread(self.index.train)
+
+    def schedule_maintenance(self):
+        """Start ``maintain`` in the background unless it is already running or not needed"""
+        if self._maintenance is not None and not self._maintenance.done():
+            return
+        if self.index.needs_compaction() or self.index.needs_training():
+            self._maintenance = asyncio.create_task(self.maintain())
+            self._maintenance.add_done_callback(self._log_failure("maintenance"))
+
+    def start_rebuild(self):
+        """Run ``rebuild`` in the background, keeping a reference to the task"""
+        if not self.rebuilding:
+            self._rebuild = asyncio.create_task(self.rebuild())
+            self._rebuild.add_done_callback(self._log_failure("rebuild"))
+
+    async def rebuild(self, batch_size: int = 500):
+        """Re-embed every stored resume into a fresh index and swap it in"""
+        if self.rebuilding:
+            return
+        self.rebuilding = True
+        self._pending = []
+        staging = self.directory.with_name(self.directory.name + ".rebuild")
+        shutil.rmtree(staging, ignore_errors=True)
+        fresh = None
+        try:
+            fresh = VectorIndex(staging)
+            cursor = self.collection.find({}, {"_id": 0, "id": 1, "resumeData": 1})
+            while True:
+                docs = await cursor.to_list(batch_size)
+                if not docs:
+                    break
+                await asyncio.to_thread(self._load_batch, fresh, docs)
+            if fresh.needs_training():
+                await asyncio.to_thread(fresh.train)
+            if self._maintenance is not None and not self._maintenance.done():
+                # Never swap the index out from under a compaction or training thread
+                await asyncio.wait([self._maintenance])
+            async with self._writes:
+                await asyncio.to_thread(self._replay, fresh, self._pending)
+                fresh.close()
+                fresh = None
+                await asyncio.to_thread(self._swap, staging)
+            logger.info(f"Rebuilt resume search index with {len(self.index.rows)} resumes")
+        except BaseException:
+            if fresh is not None:
+                fresh.close()
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+        finally:
+            self.rebuilding = False
+            self._pending = []
+
+    @staticmethod
+    def _load_batch(index: VectorIndex, docs: List[dict]):
+        for doc in docs:
+            index.upsert(doc['id'], embed_resume(doc['resumeData']))
+
+    @staticmethod
+    def _replay(index: VectorIndex, writes: List[Tuple[str, Optional[np.ndarray]]]):
+        for resume_id, vector in writes:
+            if vector is None:
+                index.delete(resume_id)
+            else:
+                index.upsert(resume_id, vector)
+
+    def _swap(self, staging: Path):
+        retired = self.directory.with_name(self.directory.name + ".old")
+        shutil.rmtree(retired, ignore_errors=True)
+        self.index.close()
+        try:
+            os.replace(self.directory, retired)
+            os.replace(staging, self.directory)
+        except OSError:
+            # Put the previous index back rather than leave search without one
+            if not self.directory.exists() and retired.exists():
+                os.replace(retired, self.directory)
+            self.index = VectorIndex(self.directory)
+            raise
+        shutil.rmtree(retired, ignore_errors=True)
+        self.index = VectorIndex(self.directory)
@@ -0,0 +1,165 @@
+import asyncio
+import logging
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+
+class WorkerPoolBusy(Exception):
+    """Raised when a pool's submission queue is full"""
+
+
+class WorkerPoolUnavailable(WorkerPoolBusy):
+    """Raised when a job's workers crashed, even after a retry on fresh ones"""
+
+
+class WorkerPool:
+    """Bounded process pool for CPU-heavy work called from async handlers.
+
+    At most ``max_workers + max_queue`` jobs are admitted at once; anything
+    beyond that is rejected with ``WorkerPoolBusy`` rather than piling up.
+    Worker processes are replaced after ``max_jobs_per_worker`` jobs so that
+    memory held by parsing libraries is returned to the OS. A timed-out job
+    moves new work to fresh workers without failing the jobs still running
+    next to it, and a job whose workers crash is retried once.
+    """
+
+    def __init__(self, name: str, max_workers: int = 2, max_queue: int = 16,
+                 job_timeout: float = 30.0, max_jobs_per_worker: int = 50):
+        self.name = name
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.job_timeout = job_timeout
+        self.max_jobs_per_worker = max_jobs_per_worker
+        self._executor: Optional[ProcessPoolExecutor] = None
+        # Unfinished jobs per executor, and executors that take no new work
+        self._jobs: Dict[ProcessPoolExecutor, Set[asyncio.Future]] = {}
+        self._retired: Set[ProcessPoolExecutor] = set()
+        self._in_flight = 0
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.timed_out = 0
+        self.rejected = 0
+        self.total_seconds = 0.0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # max_tasks_per_child needs a spawn context; spawned workers only
+            # import the module that defines the submitted function
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                max_tasks_per_child=self.max_jobs_per_worker,
+            )
+        return self._executor
+
+    async def run(self, func: Callable, *args, timeout: Optional[float] = None) -> Any:
+        """Run ``func(*args)`` in a worker process and await its result"""
+        if self._in_flight >= self.max_workers + self.max_queue:
+            self.rejected += 1
+            raise WorkerPoolBusy(f"{self.name} pool is at capacity")
+
+        self._in_flight += 1
+        self.submitted += 1
+        started = time.perf_counter()
+        limit = timeout or self.job_timeout
+        try:
+            try:
+                result = await self._run_once(func, args, limit)
+            except BrokenProcessPool:
+                # A worker died (e.g. in a native library) and took the executor with it
+                logger.warning(f"{self.name} workers crashed, retrying on fresh workers")
+                try:
+                    result = await self._run_once(func, args, max(0.0, limit - (time.perf_counter() - started)))
+                except BrokenProcessPool as e:
+                    raise WorkerPoolUnavailable(f"{self.name} workers crashed twice") from e
+        except asyncio.TimeoutError:
+            self.timed_out += 1
+            raise
+        except Exception:
+            self.failed += 1
+            raise
+        else:
+            self.completed += 1
+            return result
+        finally:
+            self._in_flight -= 1
+            self.total_seconds += time.perf_counter() - started
+
+    async def _run_once(self, func: Callable, args: tuple, timeout: float) -> Any:
+        executor = self._get_executor()
+        future = asyncio.get_running_loop().run_in_executor(executor, func, *args)
+        jobs = self._jobs.setdefault(executor, set())
+        jobs.add(future)
+        future.add_done_callback(lambda done: self._job_done(executor, done))
+        try:
+            return await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"{self.name} job exceeded {timeout}s, retiring its workers")
+            self._retire(executor)
+            raise
+        except asyncio.CancelledError:
+            # Client went away; a job that has not started yet is dropped
+            future.cancel()
+            raise
+        except BrokenProcessPool:
+            self._retire(executor)
+            raise
+
+    def _job_done(self, executor: ProcessPoolExecutor, future: asyncio.Future):
+        self._jobs.get(executor, set()).discard(future)
+        self._reap(executor)
+
+    def _retire(self, executor: ProcessPoolExecutor):
+        """Send no more work to ``executor`` and kill its workers once its other jobs finish.
+
+        Terminating a worker breaks the whole executor, so a worker stuck on
+        a timed-out job is only killed after the jobs sharing it are done.
+        """
+        if self._executor is executor:
+            self._executor = None
+        self._retired.add(executor)
+        self._reap(executor)
+
+    def _reap(self, executor: ProcessPoolExecutor):
+        if executor in self._retired and not any(not job.done() for job in self._jobs.get(executor, ())):
+            self._retired.discard(executor)
+            self._jobs.pop(executor, None)
+            self._kill(executor)
+
+    @staticmethod
+    def _kill(executor: ProcessPoolExecutor):
+        processes = list((getattr(executor, "_processes", None) or {}).values())
+        executor.shutdown(wait=False, cancel_futures=True)
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+
+    def stats(self) -> dict:
+        return {
+            "maxWorkers": self.max_workers,
+            "maxQueue": self.max_queue,
+            "inFlight": self._in_flight,
+            "queueDepth": max(0, self._in_flight - self.max_workers),
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "timedOut": self.timed_out,
+            "rejected": self.rejected,
+            "retiredExecutors": len(self._retired),
+            "avgJobSeconds": round(self.total_seconds / self.submitted, 4) if self.submitted else 0.0,
+        }
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        for executor in list(self._retired):
+            self._kill(executor)
+        self._retired.clear()
+        self._jobs.clear()
@@ -0,0 +1,64 @@
+from ats_scoring import analyze, extract_keywords, segments, stem, text_ngrams, tokenize
+
+
+def test_tokenize_keeps_punctuation_inside_tokens():
+    assert [surface for _, surface in tokenize("Node.js, C++ and CI/CD.")] == ["Node.js", "C++", "and", "CI/CD"]
+
+
+def test_segments_split_at_list_and_sentence_punctuation():
+    runs = segments("Docker, Kubernetes; Terraform.\n• AWS Lambda | Go (gRPC)")
+    assert [[term for term, _ in run] for run in runs] == [
+        ["docker"], ["kubernetes"], ["terraform"], ["aws", "lambda"], ["go"], ["grpc"]
+    ]
+
+
+def test_ngrams_do_not_cross_commas():
+    terms = {term for term, _, _ in text_ngrams("Docker, Kubernetes")}
+    assert terms == {"docker", stem("kubernetes")}
+
+
+def test_listed_skills_are_not_reported_as_a_missing_phrase():
+    jd = "Skills: Docker, Kubernetes. We deploy with Docker, Kubernetes and Django, PostgreSQL, AWS."
+    keywords = {keyword.term for keyword in extract_keywords(jd)}
+    assert "docker kubernet" not in keywords
+    result = analyze({"skills": ["Docker", "Kubernetes", "Django", "PostgreSQL", "AWS"]}, jd)
+    assert {"Docker", "Kubernetes", "Django", "PostgreSQL", "AWS"} <= set(result.matched)
+    assert not {"Docker", "Kubernetes", "Django", "PostgreSQL", "AWS"} & set(result.missing)
+
+
+def test_missing_phrase_falls_back_to_its_words():
+    jd = "Machine learning platform. Machine learning models in production. Machine learning ops."
+    phrase = next(k for k in extract_keywords(jd) if k.surface == "Machine learning")
+    assert {part.surface for part in phrase.parts} == {"Machine", "learning"}
+
+    found = analyze({"summary": "Built machine translation and online learning systems"}, jd)
+    assert "Machine learning" not in found.matched
+    assert {"Machine", "learning"} <= set(found.matched)
+
+    exact = analyze({"summary": "Shipped machine learning models"}, jd)
+    assert "Machine learning" in exact.matched
+
+
+def test_score_is_deterministic_and_bounded():
+    resume = {
+        "summary": "Platform engineer",
+        "skills": ["Python", "Kubernetes"],
+        "experience": [{"title": "Engineer", "company": "Acme", "bullets": ["Reduced deploy time by 40% with Kubernetes"]}],
+        "education": [{"degree": "BSc", "school": "Uni"}],
+    }
+    jd = "Python and Kubernetes engineer. Python services on Kubernetes."
+    first, second = analyze(resume, jd), analyze(resume, jd)
+    assert first == second
+    assert 0 <= first.score <= 100
+
+
+def test_section_headings_are_not_reported_as_keywords():
+    jd = ("Key Responsibilities: build data pipelines in Python and Airflow. Skills: Python, Airflow, Kubernetes. "
+          "Technical Skills: SQL. Requirements: Python. Qualifications: a degree. What we offer: salary, bonus.")
+    surfaces = {keyword.surface.lower() for keyword in extract_keywords(jd)}
+    assert {"python", "airflow", "kubernetes", "sql"} <= surfaces
+    assert not surfaces & {"skills", "technical skills", "key responsibilities", "requirements",
+                           "qualifications", "salary", "bonus"}
+
+    result = analyze({"skills": ["Python", "Airflow", "Kubernetes", "SQL"]}, jd)
+    assert not {"Skills", "Requirements", "Qualifications"} & set(result.missing)
@@ -0,0 +1,151 @@
+import asyncio
+import io
+import json
+import os
+import zipfile
+
+import pytest
+
+pytest.importorskip("fastapi")
+
+import batch_parse
+import uploads
+from fastapi import HTTPException
+from uploads import spool_bytes
+
+
+class _File:
+    def __init__(self, data: bytes, filename: str):
+        self._data = io.BytesIO(data)
+        self.filename = filename
+
+    async def read(self, size: int = -1) -> bytes:
+        return self._data.read(size)
+
+
+def _zip(entries) -> bytes:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as zf:
+        for name, data in entries:
+            zf.writestr(name, data)
+    return buffer.getvalue()
+
+
+def _collect(tmp_path, files, max_files=10, max_file_bytes=100, max_unpacked_bytes=1000):
+    async def spool_file(file):
+        return await uploads.spool(file, 10_000, str(tmp_path))
+    return asyncio.run(batch_parse.collect(files, spool_file, max_files, max_file_bytes, max_unpacked_bytes,
+                                           str(tmp_path)))
+
+
+def test_collect_unpacks_zips_in_order_and_marks_oversized_files(tmp_path):
+    files = [
+        _File(b"%PDF-1.4 first", "first.pdf"),
+        _File(_zip([("a.pdf", b"%PDF-1.4 a"), ("big.pdf", b"%PDF" + b"x" * 200)]), "batch.zip"),
+        _File(b"%PDF" + b"y" * 200, "huge.pdf"),
+    ]
+    entries = _collect(tmp_path, files)
+    assert [(name, upload is not None) for name, upload in entries] == \
+        [("first.pdf", True), ("a.pdf", True), ("big.pdf", False), ("huge.pdf", False)]
+    # Only the files to parse stay on disk; the archive and oversized uploads are gone
+    assert sorted(os.listdir(tmp_path)) == sorted(os.path.basename(u.path) for _, u in entries if u is not None)
+    batch_parse.remove(entries)
+    assert not os.listdir(tmp_path)
+
+
+@pytest.mark.parametrize("files, status", [
+    ([_File(b"%PDF-1.4 one", f"{i}.pdf") for i in range(4)], 413),
+    ([_File(b"%PDF-1.4 one", "one.pdf"), _File(_zip([(f"{i}.pdf", b"%PDF-1.4") for i in range(3)]), "a.zip")], 413),
+    ([_File(_zip([(f"{i}.pdf", b"\0" * 90) for i in range(2)]), "a.zip"),
+      _File(_zip([(f"{i}.pdf", b"\0" * 90) for i in range(2)]), "b.zip")], 413),
+    ([], 400),
+])
+def test_collect_rejects_over_limit_batches_and_removes_everything(tmp_path, files, status):
+    with pytest.raises(HTTPException) as raised:
+        _collect(tmp_path, files, max_files=3, max_unpacked_bytes=300)
+    assert raised.value.status_code == status
+    assert not os.listdir(tmp_path)
+
+
+def _entries(tmp_path, names):
+    return [(name, None if name.startswith("huge") else spool_bytes(b"%PDF-1.4 " + name.encode(), name, str(tmp_path)))
+            for name in names]
+
+
+async def _lines(stream, limit=None):
+    lines = []
+    async for line in stream:
+        lines.append(json.loads(line))
+        if limit is not None and len(lines) == limit:
+            await stream.aclose()
+            break
+    return lines
+
+
+def test_results_stream_as_each_file_finishes_with_errors_per_file(tmp_path):
+    delays = {"slow.pdf": 0.05, "fast.pdf": 0.0, "invalid.pdf": 0.01, "crash.pdf": 0.02}
+
+    async def parse(upload, timings):
+        await asyncio.sleep(delays[upload.filename])
+        if upload.filename == "invalid.pdf":
+            raise HTTPException(status_code=400, detail="Only PDF and DOCX files are supported")
+        if upload.filename == "crash.pdf":
+            raise RuntimeError("extraction worker died")
+        timings['parseMs'] = 1.0
+        return {"summary": upload.filename}
+
+    entries = _entries(tmp_path, ["slow.pdf", "fast.pdf", "huge.pdf", "invalid.pdf", "crash.pdf"])
+    lines = asyncio.run(_lines(batch_parse.ndjson_results(entries, parse, concurrency=5)))
+
+    assert [line.get("filename") for line in lines[:-1]] == ["huge.pdf", "fast.pdf", "invalid.pdf", "crash.pdf",
+                                                            "slow.pdf"]
+    by_name = {line["filename"]: line for line in lines[:-1]}
+    assert by_name["slow.pdf"]["index"] == 0 and by_name["slow.pdf"]["resumeData"] == {"summary": "slow.pdf"}
+    assert by_name["fast.pdf"]["status"] == "ok" and by_name["fast.pdf"]["timings"]["parseMs"] == 1.0
+    assert by_name["huge.pdf"] == {**by_name["huge.pdf"], "status": "error", "error": "File is too large"}
+    assert by_name["invalid.pdf"]["error"] == "Only PDF and DOCX files are supported"
+    assert by_name["crash.pdf"]["error"] == "extraction worker died"
+    assert {key: lines[-1][key] for key in ("status", "total", "succeeded", "failed")} == \
+        {"status": "done", "total": 5, "succeeded": 2, "failed": 3}
+    assert not os.listdir(tmp_path)
+
+
+def test_concurrency_is_bounded(tmp_path):
+    running, peak = 0, 0
+
+    async def parse(upload, timings):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        return {}
+
+    entries = _entries(tmp_path, [f"{i}.pdf" for i in range(8)])
+    lines = asyncio.run(_lines(batch_parse.ndjson_results(entries, parse, concurrency=2)))
+    assert peak == 2 and lines[-1]["succeeded"] == 8
+
+
+def test_client_leaving_cancels_work_and_removes_files(tmp_path):
+    cancelled = []
+
+    async def parse(upload, timings):
+        if upload.filename == "first.pdf":
+            return {}
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(upload.filename)
+            raise
+
+    entries = _entries(tmp_path, ["first.pdf", "second.pdf", "third.pdf"])
+
+    async def scenario():
+        lines = await _lines(batch_parse.ndjson_results(entries, parse, concurrency=3), limit=1)
+        await asyncio.sleep(0)
+        return lines
+
+    lines = asyncio.run(scenario())
+    assert [line["filename"] for line in lines] == ["first.pdf"]
+    assert sorted(cancelled) == ["second.pdf", "third.pdf"]
+    assert not os.listdir(tmp_path)
@@ -0,0 +1,105 @@
+import asyncio
+import gzip
+
+import pytest
+
+pytest.importorskip("fastapi")
+
+import http_cache
+from http_cache import CompressionMiddleware, choose_coding, etag_matches, evaluate_if_none_match, strong_etag
+
+
+def test_strong_etag_is_stable_and_quoted():
+    etag = strong_etag({"a": 1, "b": [2, 3]})
+    assert etag == strong_etag({"b": [2, 3], "a": 1})
+    assert etag.startswith('"') and etag.endswith('"')
+    assert etag != strong_etag({"a": 2})
+
+
+def test_etag_matching_is_weak_and_ignores_coding_suffixes():
+    etag = strong_etag("resume", 3)
+    assert etag_matches(etag, etag)
+    assert etag_matches("W/" + etag, etag)
+    assert etag_matches(etag[:-1] + '-gzip"', etag)
+    assert etag_matches(f'"other", {etag[:-1]}-br"', etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches(None, etag)
+    assert not etag_matches('"other"', etag)
+
+
+def test_if_none_match_is_304_for_safe_methods_and_412_otherwise():
+    etag = strong_etag("resume", 3)
+    for method in ("GET", "HEAD", "get"):
+        response = evaluate_if_none_match(method, etag, etag, http_cache.REVALIDATE)
+        assert response.status_code == 304
+        assert response.headers["ETag"] == etag
+    for method in ("POST", "PUT", "DELETE"):
+        assert evaluate_if_none_match(method, etag, etag, http_cache.REVALIDATE).status_code == 412
+    assert evaluate_if_none_match("GET", '"stale"', etag, http_cache.REVALIDATE) is None
+    assert evaluate_if_none_match("POST", None, etag, http_cache.REVALIDATE) is None
+
+
+def test_choose_coding(monkeypatch):
+    monkeypatch.setattr(http_cache, "brotli", object())
+    assert choose_coding("gzip, deflate, br") == "br"
+    assert choose_coding("br;q=0.5, gzip") == "gzip"
+    assert choose_coding("*") == "br"
+    assert choose_coding("identity") is None
+    assert choose_coding("gzip;q=0, br;q=0") is None
+    assert choose_coding("") is None
+    monkeypatch.setattr(http_cache, "brotli", None)
+    assert choose_coding("br, gzip;q=0.1") == "gzip"
+    assert choose_coding("br") is None
+
+
+def _run(middleware, accept_encoding="gzip"):
+    scope = {"type": "http", "headers": [(b"accept-encoding", accept_encoding.encode())]}
+    sent = []
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(middleware(scope, receive, send))
+    return dict(sent[0]["headers"]), b"".join(m.get("body", b"") for m in sent[1:])
+
+
+def _app(body, media_type=b"application/json", etag=b'"abc"', chunks=1):
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": [
+            (b"content-type", media_type), (b"content-length", str(len(body)).encode()), (b"etag", etag),
+        ]})
+        size = -(-len(body) // chunks)
+        for i in range(chunks):
+            await send({"type": "http.response.body", "body": body[i * size:(i + 1) * size],
+                        "more_body": i < chunks - 1})
+    return app
+
+
+def test_compression_middleware_gzips_large_json_and_suffixes_etag(monkeypatch):
+    monkeypatch.setattr(http_cache, "brotli", None)
+    body = b'{"items": [' + b'"x",' * 1000 + b'"y"]}'
+    headers, sent = _run(CompressionMiddleware(_app(body)))
+    assert headers[b"content-encoding"] == b"gzip"
+    assert headers[b"etag"] == b'"abc-gzip"'
+    assert headers[b"vary"] == b"Accept-Encoding"
+    assert int(headers[b"content-length"]) == len(sent)
+    assert gzip.decompress(sent) == body
+
+
+def test_compression_middleware_passes_through_small_streamed_and_other_responses(monkeypatch):
+    monkeypatch.setattr(http_cache, "brotli", None)
+    body = b'{"items": [' + b'"x",' * 1000 + b'"y"]}'
+    cases = [
+        (_app(b'{"ok": true}'), "gzip"),
+        (_app(body), "identity"),
+        (_app(body, chunks=3), "gzip"),
+        (_app(body, media_type=b"application/pdf"), "gzip"),
+    ]
+    for app, accept_encoding in cases:
+        headers, sent = _run(CompressionMiddleware(app), accept_encoding)
+        assert b"content-encoding" not in headers
+        assert headers[b"etag"] == b'"abc"'
+        assert sent in (body, b'{"ok": true}')
@@ -0,0 +1,187 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+
+pytest.importorskip("pymongo")
+
+from job_queue import DEAD, FAILED, QUEUED, RUNNING, SUCCEEDED, JobQueue, MemoryJobStore, PermanentJobError
+
+
+def _queue(store=None, **kwargs):
+    options = dict(workers=2, lease_seconds=0.3, max_attempts=3, retry_base_delay=0.01, retry_max_delay=0.05,
+                   job_timeout=5, poll_interval=0.01)
+    options.update(kwargs)
+    return JobQueue(store or MemoryJobStore(), **options)
+
+
+async def _finished(queue, job_id, timeout=5):
+    async def wait():
+        async for job in queue.watch(job_id):
+            last = job
+        return last
+    return await asyncio.wait_for(wait(), timeout)
+
+
+def _run(queue, scenario):
+    async def main():
+        queue.start()
+        try:
+            return await scenario()
+        finally:
+            await queue.stop()
+    return asyncio.run(main())
+
+
+def test_job_succeeds_and_payload_stays_private():
+    store = MemoryJobStore()
+    queue = _queue(store)
+
+    async def handler(payload):
+        return {"doubled": payload["n"] * 2}
+    queue.register("double", handler)
+
+    async def scenario():
+        submitted = await queue.submit("double", {"n": 21})
+        assert submitted["status"] == QUEUED and "payload" not in submitted
+        return await _finished(queue, submitted["id"])
+
+    job = _run(queue, scenario)
+    assert job["status"] == SUCCEEDED
+    assert job["result"] == {"doubled": 42}
+    assert job["attempts"] == 1 and job["errors"] == []
+    assert "payload" not in job and "leaseOwner" not in job
+    # Payloads can hold whole uploads, so they are dropped once the job finishes
+    assert store.jobs[job["id"]]["payload"] is None
+
+
+def test_failure_is_retried_then_succeeds():
+    queue = _queue()
+    calls = []
+
+    async def flaky(payload):
+        calls.append(1)
+        if len(calls) < 3:
+            raise RuntimeError("upstream 503")
+        return "ok"
+    queue.register("flaky", flaky)
+
+    async def scenario():
+        return await _finished(queue, (await queue.submit("flaky", {}))["id"])
+
+    job = _run(queue, scenario)
+    assert job["status"] == SUCCEEDED and job["result"] == "ok"
+    assert job["attempts"] == 3
+    assert [error["attempt"] for error in job["errors"]] == [1, 2]
+    assert queue.retried["flaky"] == 2
+
+
+def test_job_is_dead_lettered_when_attempts_run_out():
+    queue = _queue()
+
+    async def broken(payload):
+        raise RuntimeError("still down")
+    queue.register("broken", broken)
+
+    async def scenario():
+        return await _finished(queue, (await queue.submit("broken", {}))["id"])
+
+    job = _run(queue, scenario)
+    assert job["status"] == DEAD
+    assert job["attempts"] == 3
+    assert [error["message"] for error in job["errors"]] == ["still down"] * 3
+    assert queue.dead["broken"] == 1
+
+
+def test_permanent_failure_is_not_retried():
+    queue = _queue(is_permanent=lambda e: isinstance(e, ValueError))
+
+    async def invalid(payload):
+        raise PermanentJobError("unsupported file")
+
+    async def bad_input(payload):
+        raise ValueError("bad input")
+    queue.register("invalid", invalid)
+    queue.register("bad_input", bad_input)
+
+    async def scenario():
+        first = await queue.submit("invalid", {})
+        second = await queue.submit("bad_input", {})
+        return await _finished(queue, first["id"]), await _finished(queue, second["id"])
+
+    for job in _run(queue, scenario):
+        assert job["status"] == FAILED
+        assert job["attempts"] == 1 and len(job["errors"]) == 1
+    assert queue.retried == {}
+
+
+def test_lost_lease_cancels_the_work():
+    store = MemoryJobStore()
+    queue = _queue(store, workers=1)
+    started, cancelled = asyncio.Event(), []
+
+    async def slow(payload):
+        started.set()
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+    queue.register("slow", slow)
+
+    async def scenario():
+        job = await queue.submit("slow", {})
+        await asyncio.wait_for(started.wait(), 5)
+        # Another process took the job over, e.g. after a pause outlived the lease
+        store.jobs[job["id"]]["leaseOwner"] = "other-process"
+        for _ in range(100):
+            if cancelled:
+                break
+            await asyncio.sleep(0.02)
+        return store.jobs[job["id"]]
+
+    job = _run(queue, scenario)
+    assert cancelled == [True]
+    assert job["status"] == RUNNING and job["leaseOwner"] == "other-process"
+    assert queue.succeeded == {} and queue.failed == {} and queue.dead == {}
+
+
+def _orphaned(store, attempts):
+    # A job whose worker died mid-run: still running, lease long expired
+    past = datetime.utcnow() - timedelta(minutes=5)
+    job = {"id": f"orphan-{attempts}", "kind": "echo", "status": RUNNING, "payload": {"value": attempts},
+           "result": None, "errors": [], "attempts": attempts, "maxAttempts": 3, "availableAt": past,
+           "createdAt": past, "updatedAt": past, "leaseOwner": "dead-process", "leaseExpiresAt": past}
+    asyncio.run(store.insert(job))
+    return job["id"]
+
+
+def test_job_with_expired_lease_is_reclaimed():
+    store = MemoryJobStore()
+    queue = _queue(store)
+    job_id = _orphaned(store, attempts=1)
+
+    async def echo(payload):
+        return payload["value"]
+    queue.register("echo", echo)
+
+    job = _run(queue, lambda: _finished(queue, job_id))
+    assert job["status"] == SUCCEEDED and job["result"] == 1
+    assert job["attempts"] == 2
+
+
+def test_job_whose_lease_expired_on_every_attempt_is_dead_lettered():
+    store = MemoryJobStore()
+    queue = _queue(store)
+    job_id = _orphaned(store, attempts=3)
+    calls = []
+
+    async def echo(payload):
+        calls.append(payload)
+    queue.register("echo", echo)
+
+    job = _run(queue, lambda: _finished(queue, job_id))
+    assert job["status"] == DEAD
+    assert job["attempts"] == 4
+    assert job["errors"][-1]["message"] == "Lease expired on every attempt"
+    assert calls == []
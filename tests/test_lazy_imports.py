@@ -0,0 +1,83 @@
+import asyncio
+import sys
+import threading
+
+import lazy_imports
+
+
+def _write_slow_module(tmp_path, monkeypatch, name):
+    started = threading.Event()
+    release = threading.Event()
+    (tmp_path / f"{name}.py").write_text(
+        "import lazy_imports_test_hooks as hooks\n"
+        "hooks.started.set()\n"
+        "hooks.release.wait(5)\n"
+        "READY = True\n"
+    )
+    hooks = type(sys)("lazy_imports_test_hooks")
+    hooks.started, hooks.release = started, release
+    monkeypatch.setitem(sys.modules, "lazy_imports_test_hooks", hooks)
+    monkeypatch.syspath_prepend(str(tmp_path))
+    return started, release
+
+
+def test_load_waits_for_a_module_another_thread_is_importing(tmp_path, monkeypatch):
+    name = "lazy_imports_slow_module"
+    started, release = _write_slow_module(tmp_path, monkeypatch, name)
+
+    async def scenario():
+        warm_up = asyncio.create_task(lazy_imports.load(name))
+        assert await asyncio.to_thread(started.wait, 5)
+        # Half-initialised: present in sys.modules but still executing
+        assert name in sys.modules and not hasattr(sys.modules[name], "READY")
+        request = asyncio.create_task(lazy_imports.load(name))
+        await asyncio.sleep(0.05)
+        assert not request.done()
+        release.set()
+        module = await asyncio.wait_for(request, 5)
+        assert module.READY
+        assert (await warm_up) is module
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        release.set()
+        sys.modules.pop(name, None)
+
+
+def test_load_returns_imported_module_directly():
+    async def scenario():
+        return await lazy_imports.load("json")
+
+    assert asyncio.run(scenario()) is sys.modules["json"]
+
+
+def test_warm_up_records_loaded_and_failed_modules():
+    async def scenario():
+        warm_up = lazy_imports.WarmUp(["json", "lazy_imports_no_such_module"], delay=0)
+        warm_up.start()
+        await warm_up._task
+        return warm_up.stats()
+
+    stats = asyncio.run(scenario())
+    assert stats["done"]
+    assert list(stats["modulesMs"]) == ["json"]
+    assert stats["failed"] == ["lazy_imports_no_such_module"]
+
+
+def test_import_timer_records_self_and_cumulative_time(tmp_path, monkeypatch):
+    (tmp_path / "lazy_imports_timed_outer.py").write_text("import lazy_imports_timed_inner\n")
+    (tmp_path / "lazy_imports_timed_inner.py").write_text("VALUE = 1\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    timer = lazy_imports.ImportTimer()
+    timer.install()
+    try:
+        import lazy_imports_timed_outer  # noqa: F401
+    finally:
+        sys.meta_path.remove(timer)
+        sys.modules.pop("lazy_imports_timed_outer", None)
+        sys.modules.pop("lazy_imports_timed_inner", None)
+    outer_total, outer_self = timer.modules["lazy_imports_timed_outer"]
+    inner_total, _ = timer.modules["lazy_imports_timed_inner"]
+    assert outer_total >= inner_total
+    assert outer_self <= outer_total
@@ -0,0 +1,100 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+
+import llm_cache
+from benchmarks.fakes import FakeDatabase
+from llm_cache import LlmCache, cache_enabled, ttl_for
+
+
+def test_key_covers_model_system_message_and_prompt():
+    key = LlmCache.make_key("gpt", "system", "prompt")
+    assert key == LlmCache.make_key("gpt", "system", "prompt")
+    assert len({key,
+                LlmCache.make_key("gpt-mini", "system", "prompt"),
+                LlmCache.make_key("gpt", "system!", "prompt"),
+                LlmCache.make_key("gpt", "system", "prompt!")}) == 4
+    # Parts are delimited, so moving text between them changes the key
+    assert LlmCache.make_key("gpt", "ab", "c") != LlmCache.make_key("gpt", "a", "bc")
+
+
+def test_ttl_per_endpoint_with_overrides(monkeypatch):
+    assert ttl_for("cover_letter") == 15 * 60
+    assert ttl_for("resume_parse") == 7 * 24 * 3600
+    assert ttl_for("unknown") == 3600
+    monkeypatch.setenv("LLM_CACHE_TTL_COVER_LETTER", "0")
+    assert ttl_for("cover_letter") == 0
+
+    cache = LlmCache(FakeDatabase().llm_cache)
+
+    async def scenario():
+        await cache.set("cover_letter", "k1", "letter")
+        await cache.set("ats_analysis", "k2", "analysis")
+    asyncio.run(scenario())
+    # A TTL of 0 turns caching off for that endpoint
+    assert [doc["_id"] for doc in cache.collection.docs] == ["k2"]
+    expires_in = cache.collection.docs[0]["expiresAt"] - datetime.utcnow()
+    assert timedelta(hours=23, minutes=59) < expires_in <= timedelta(hours=24)
+
+
+def test_expired_entries_are_not_served(monkeypatch):
+    cache = LlmCache(FakeDatabase().llm_cache)
+    asyncio.run(cache.set("cover_letter", "k", "letter"))
+    later = llm_cache.time.time() + 16 * 60
+    monkeypatch.setattr(llm_cache.time, "time", lambda: later)
+    cache.collection.docs[0]["expiresAt"] = datetime.utcnow() - timedelta(seconds=1)
+    assert asyncio.run(cache.get("cover_letter", "k")) is None
+    assert cache.stats()["endpoints"]["cover_letter"] == {"hits": 0, "misses": 1}
+
+
+def test_memory_tier_evicts_least_recently_used():
+    cache = LlmCache(FakeDatabase().llm_cache, max_entries=2)
+
+    async def scenario():
+        await cache.set("ats_analysis", "a", "A")
+        await cache.set("ats_analysis", "b", "B")
+        assert await cache.get("ats_analysis", "a") == "A"
+        await cache.set("ats_analysis", "c", "C")
+    asyncio.run(scenario())
+    assert list(cache._entries) == ["a", "c"]
+
+
+def test_mongo_hit_fills_the_memory_tier():
+    collection = FakeDatabase().llm_cache
+    asyncio.run(LlmCache(collection).set("resume_parse", "k", "parsed"))
+
+    cache = LlmCache(collection)
+    lookups = []
+    find_one = collection.find_one
+
+    async def counting_find_one(*args, **kwargs):
+        lookups.append(args)
+        return await find_one(*args, **kwargs)
+    collection.find_one = counting_find_one
+
+    async def scenario():
+        assert await cache.get("resume_parse", "k") == "parsed"
+        assert await cache.get("resume_parse", "k") == "parsed"
+    asyncio.run(scenario())
+    assert len(lookups) == 1
+    assert cache.stats()["endpoints"]["resume_parse"] == {"hits": 2, "misses": 0}
+
+
+def test_delete_removes_both_tiers():
+    cache = LlmCache(FakeDatabase().llm_cache)
+
+    async def scenario():
+        await cache.set("ats_analysis", "k", "bad")
+        await cache.delete("k")
+        return await cache.get("ats_analysis", "k")
+    assert asyncio.run(scenario()) is None
+    assert cache.collection.docs == []
+
+
+@pytest.mark.parametrize("header, enabled", [
+    (None, True), ("", True), ("0", True), ("false", True), ("No", True), ("off", True),
+    ("1", False), ("true", False), (" TRUE ", False), ("yes", False), ("on", False),
+])
+def test_cache_bypass_header_is_parsed_as_a_boolean(header, enabled):
+    assert cache_enabled(header) is enabled
@@ -0,0 +1,140 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("pymongo")
+
+from benchmarks.fakes import FakeDatabase
+from llm_cache import LlmCache
+from llm_gateway import BATCH, INTERACTIVE, LlmGateway, LlmResponseError, PriorityLimiter, decode_json
+
+
+def test_decode_json_strips_code_fence():
+    assert decode_json('```json\n{"a": 1}\n```') == {"a": 1}
+    with pytest.raises(LlmResponseError):
+        decode_json("not json")
+
+
+def test_interactive_gets_in_while_batch_is_capped():
+    async def scenario():
+        limiter = PriorityLimiter(8, {BATCH: 6})
+        for _ in range(6):
+            await limiter.acquire(BATCH)
+        # Queued behind its lane cap while global slots are still free
+        batch = asyncio.create_task(limiter.acquire(BATCH))
+        await asyncio.sleep(0)
+        assert not batch.done()
+
+        await asyncio.wait_for(limiter.acquire(INTERACTIVE), 1)
+        assert limiter.active == 7
+        assert not batch.done()
+
+        limiter.release(BATCH)
+        await asyncio.wait_for(batch, 1)
+        assert limiter.active == 7
+
+    asyncio.run(scenario())
+
+
+def test_free_slot_goes_to_interactive_waiter_first():
+    async def scenario():
+        limiter = PriorityLimiter(1)
+        await limiter.acquire(BATCH)
+        order = []
+
+        async def waiter(lane):
+            await limiter.acquire(lane)
+            order.append(lane)
+            limiter.release(lane)
+
+        tasks = [asyncio.create_task(waiter(BATCH)), asyncio.create_task(waiter(INTERACTIVE))]
+        await asyncio.sleep(0)
+        limiter.release(BATCH)
+        await asyncio.gather(*tasks)
+        assert order == [INTERACTIVE, BATCH]
+        assert limiter.active == 0
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_waiter_does_not_leak_a_slot():
+    async def scenario():
+        limiter = PriorityLimiter(1)
+        await limiter.acquire(INTERACTIVE)
+        waiting = asyncio.create_task(limiter.acquire(INTERACTIVE))
+        await asyncio.sleep(0)
+        waiting.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiting
+        limiter.release(INTERACTIVE)
+        assert limiter.active == 0
+        await asyncio.wait_for(limiter.acquire(INTERACTIVE), 1)
+
+    asyncio.run(scenario())
+
+
+def _gateway(replies):
+    gateway = LlmGateway(LlmCache(FakeDatabase().llm_cache), "openai", "test-model", 4, 2, 0, 0.01, 0.01, 5)
+    sent = []
+
+    async def send(endpoint, system_message, prompt):
+        sent.append(prompt)
+        return replies.pop(0)
+    gateway._send = send
+    return gateway, sent
+
+
+def test_undecodable_cache_hit_is_dropped_and_called_again():
+    gateway, sent = _gateway(['{"score": 80}'])
+    key = gateway.cache.make_key("test-model", "system", "prompt")
+
+    async def scenario():
+        await gateway.cache.set("ats_analysis", key, '{"score": 8')
+        assert await gateway.complete_json("ats_analysis", "system", "prompt") == {"score": 80}
+        # The fresh reply replaced the bad entry, so the next call is a hit
+        assert await gateway.complete_json("ats_analysis", "system", "prompt") == {"score": 80}
+
+    asyncio.run(scenario())
+    assert sent == ["prompt"]
+    assert gateway.cache.collection.docs[0]["response"] == '{"score": 80}'
+
+
+def test_reply_that_does_not_decode_is_not_cached():
+    gateway, sent = _gateway(["not json", '{"ok": true}'])
+
+    async def scenario():
+        with pytest.raises(LlmResponseError):
+            await gateway.complete_json("ats_analysis", "system", "prompt")
+        assert await gateway.complete_json("ats_analysis", "system", "prompt") == {"ok": True}
+
+    asyncio.run(scenario())
+    assert sent == ["prompt", "prompt"]
+
+
+def _collect(gateway, **kwargs):
+    async def scenario():
+        return "".join([chunk async for chunk in gateway.stream("resume_parse", "system", "prompt", **kwargs)])
+    return asyncio.run(scenario())
+
+
+def test_stream_caches_only_replies_that_validate():
+    gateway, sent = _gateway(['{"summary": "cut sho', '{"summary": "ok"}'])
+    gateway.use_openai = False
+
+    assert _collect(gateway, validate=decode_json) == '{"summary": "cut sho'
+    assert gateway.cache.collection.docs == []
+    assert _collect(gateway, validate=decode_json) == '{"summary": "ok"}'
+    assert _collect(gateway, validate=decode_json) == '{"summary": "ok"}'
+    assert len(sent) == 2
+
+
+def test_stream_without_validator_or_with_cache_off_does_not_cache():
+    gateway, sent = _gateway(['{"a": 1}', '{"a": 2}', '{"a": 3}'])
+    gateway.use_openai = False
+
+    assert _collect(gateway) == '{"a": 1}'
+    assert _collect(gateway, validate=decode_json, use_cache=False) == '{"a": 2}'
+    assert gateway.cache.collection.docs == []
+    assert asyncio.run(gateway.complete("resume_parse", "system", "prompt", use_cache=False)) == '{"a": 3}'
+    assert gateway.cache.collection.docs == []
+    assert len(sent) == 3
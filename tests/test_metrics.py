@@ -0,0 +1,120 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("pymongo")
+
+from prometheus_client import CollectorRegistry, generate_latest
+
+import metrics
+from metrics import MetricsMiddleware, MongoCommandListener, StatsCollector, server_timing
+
+
+def _sample(name, labels):
+    return metrics.registry.get_sample_value(name, labels) or 0
+
+
+def _request(app, path="/api/things", route="/api/things/{thing_id}", scope_type="http"):
+    scope = {"type": scope_type, "method": "GET", "path": path}
+    if route is not None:
+        scope["route"] = SimpleNamespace(path=route)
+    sent = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(app(scope, receive, send))
+    return sent
+
+
+async def _ok(scope, receive, send):
+    with metrics.stage("validate"):
+        pass
+    metrics.record_stage("mongo", 0.002)
+    metrics.record_stage("mongo", 0.003)
+    await send({"type": "http.response.start", "status": 201, "headers": [(b"content-type", b"text/plain")]})
+    await send({"type": "http.response.body", "body": b"ok"})
+
+
+def test_server_timing_sums_repeated_stages_in_order():
+    assert server_timing([("mongo", 0.002), ("llm", 1.5), ("mongo", 0.0031)]) == "mongo;dur=5.1, llm;dur=1500.0"
+    assert server_timing([]) == ""
+
+
+def test_middleware_adds_server_timing_and_times_the_route():
+    labels = {"method": "GET", "route": "/api/things/{thing_id}", "status": "201"}
+    before = _sample("http_request_duration_seconds_count", labels)
+
+    start, body = _request(MetricsMiddleware(_ok))
+    headers = dict(start["headers"])
+    assert headers[b"content-type"] == b"text/plain"
+    names = [entry.split(";")[0] for entry in headers[b"server-timing"].decode().split(", ")]
+    assert names == ["validate", "mongo", "total"]
+    assert "mongo;dur=5.0" in headers[b"server-timing"].decode()
+    assert body["body"] == b"ok"
+    assert _sample("http_request_duration_seconds_count", labels) == before + 1
+
+
+def test_middleware_header_can_be_turned_off_and_stages_stay_per_request():
+    start, _ = _request(MetricsMiddleware(_ok, add_server_timing=False))
+    assert b"server-timing" not in dict(start["headers"])
+    # Outside a request, stages only reach the histograms
+    metrics.record_stage("validate", 0.001)
+    assert metrics._stages.get() is None
+
+
+def test_unmatched_and_failed_requests_share_bounded_labels():
+    async def broken(scope, receive, send):
+        raise RuntimeError("handler crashed")
+
+    labels = {"method": "GET", "route": "unmatched", "status": "500"}
+    before = _sample("http_request_duration_seconds_count", labels)
+    with pytest.raises(RuntimeError):
+        _request(MetricsMiddleware(broken), path="/wp-login.php", route=None)
+    assert _sample("http_request_duration_seconds_count", labels) == before + 1
+
+
+def test_non_http_scopes_pass_through_untimed():
+    seen = []
+
+    async def app(scope, receive, send):
+        seen.append(scope["type"])
+
+    assert _request(MetricsMiddleware(app), scope_type="lifespan") == []
+    assert seen == ["lifespan"]
+
+
+def test_mongo_listener_times_commands_and_the_request_stage():
+    listener = MongoCommandListener()
+    stages = []
+    token = metrics._stages.set(stages)
+    before = _sample("mongo_command_duration_seconds_count", {"command": "find"})
+    try:
+        listener.started(SimpleNamespace(command_name="find"))
+        listener.succeeded(SimpleNamespace(command_name="find", duration_micros=2500))
+        listener.failed(SimpleNamespace(command_name="find", duration_micros=500))
+    finally:
+        metrics._stages.reset(token)
+    assert stages == [("mongo", 0.0025), ("mongo", 0.0005)]
+    assert _sample("mongo_command_duration_seconds_count", {"command": "find"}) == before + 2
+
+
+def test_stats_collector_exposes_counters_and_gauges():
+    registry = CollectorRegistry()
+    rows = {"hits": 3}
+
+    def read():
+        yield ("cache_hits", "Cache hits", "counter", ["endpoint"], [(["ats"], rows["hits"])])
+        yield ("pool_in_flight", "Jobs running", "gauge", [], [([], 2)])
+    registry.register(StatsCollector(read))
+
+    assert registry.get_sample_value("cache_hits_total", {"endpoint": "ats"}) == 3
+    assert registry.get_sample_value("pool_in_flight") == 2
+    # Read again on every scrape
+    rows["hits"] = 5
+    assert registry.get_sample_value("cache_hits_total", {"endpoint": "ats"}) == 5
+    assert b"# TYPE pool_in_flight gauge" in generate_latest(registry)
@@ -0,0 +1,67 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+
+from benchmarks.fakes import FakeDatabase
+from pagination import (after_cursor, build_projection, decode_cursor, encode_cursor, parse_fields,
+                        shape_item)
+
+START = datetime(2026, 1, 1)
+
+
+def test_cursor_round_trip():
+    cursor = encode_cursor(START, "resume-1")
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == (START, "resume-1")
+
+
+@pytest.mark.parametrize("cursor", ["", "not base64!", "e30", encode_cursor(START, "x")[:-3]])
+def test_malformed_cursor_raises_value_error(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
+
+
+def test_no_cursor_means_no_filter():
+    assert after_cursor(None) == {}
+    assert after_cursor("") == {}
+
+
+def test_pages_cover_every_document_once_across_ties():
+    db = FakeDatabase()
+    # Pairs share an updatedAt, so the id tiebreak decides the order
+    docs = [{"id": f"r{i:02d}", "updatedAt": START + timedelta(minutes=i // 2)} for i in range(23)]
+
+    async def walk(limit):
+        await db.resumes.insert_many([dict(doc) for doc in docs])
+        seen, cursor = [], None
+        while True:
+            page = await db.resumes.find(after_cursor(cursor), {"_id": 0, "id": 1, "updatedAt": 1}) \
+                .sort([("updatedAt", -1), ("id", -1)]) \
+                .limit(limit + 1) \
+                .to_list(limit + 1)
+            seen.extend(doc["id"] for doc in page[:limit])
+            if len(page) <= limit:
+                return seen
+            cursor = encode_cursor(page[limit - 1]["updatedAt"], page[limit - 1]["id"])
+
+    expected = [doc["id"] for doc in sorted(docs, key=lambda d: (d["updatedAt"], d["id"]), reverse=True)]
+    assert asyncio.run(walk(5)) == expected
+
+
+def test_fields_selection_and_projection():
+    assert parse_fields(None) == ["id", "name", "template", "updatedAt"]
+    assert parse_fields("id, name,,resumeData.skills") == ["id", "name", "resumeData.skills"]
+    with pytest.raises(ValueError):
+        parse_fields("id,password")
+
+    projection = build_projection(["name", "resumeData", "resumeData.skills"])
+    assert projection == {"_id": 0, "id": 1, "updatedAt": 1, "resumeData": 1}
+
+
+def test_shape_item_flattens_aliases():
+    doc = {"id": "r1", "updatedAt": START,
+           "resumeData": {"personalInfo": {"fullName": "Ada Lovelace"}, "skills": ["Python"]}}
+    assert shape_item(doc, ["id", "name", "email", "resumeData.skills"]) == {
+        "id": "r1", "name": "Ada Lovelace", "email": "", "resumeData": doc["resumeData"],
+    }
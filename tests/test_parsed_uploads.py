@@ -0,0 +1,82 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("pymongo")
+
+from pymongo.errors import DuplicateKeyError
+
+from benchmarks.fakes import FakeDatabase
+from parsed_uploads import ParsedUploadStore, parser_version, text_fingerprint
+
+TEXT = "Ada Lovelace\nAnalyst\n\nExperience\nEngineer, 2019 - Present"
+PARSED = {"personalInfo": {"fullName": "Ada Lovelace"}}
+
+
+def test_parser_version_covers_every_part():
+    assert parser_version("prompt", "system", "model") == parser_version("prompt", "system", "model")
+    assert parser_version("prompt", "system", "model") != parser_version("prompt", "system", "model-2")
+    assert parser_version("ab", "c") != parser_version("a", "bc")
+
+
+def test_lookups_only_see_the_current_version():
+    store = ParsedUploadStore(FakeDatabase().parsed_uploads)
+
+    async def scenario():
+        await store.save("file-a", TEXT, PARSED, "v1")
+        return (await store.find_by_file("file-a", "v1"), await store.find_by_text(text_fingerprint(TEXT), "v1"),
+                await store.find_by_file("file-a", "v2"), await store.find_by_text(text_fingerprint(TEXT), "v2"))
+
+    by_file, by_text, old_file, old_text = asyncio.run(scenario())
+    assert by_file["resumeData"] == PARSED and by_text["resumeData"] == PARSED
+    assert old_file is None and old_text is None
+
+
+def test_same_text_in_another_file_reuses_the_entry():
+    collection = FakeDatabase().parsed_uploads
+    store = ParsedUploadStore(collection)
+    # Re-exported with different line wrapping and spacing
+    reexport = TEXT.replace("\n", "  \n ")
+    assert text_fingerprint(reexport) == text_fingerprint(TEXT)
+
+    async def scenario():
+        await store.save("file-a", TEXT, PARSED, "v1")
+        stored = await store.find_by_text(text_fingerprint(reexport), "v1")
+        await store.save("file-b", reexport, stored["resumeData"], "v1")
+        await store.save("file-b", reexport, stored["resumeData"], "v1")
+        return await store.find_by_file("file-b", "v1")
+
+    assert asyncio.run(scenario())["resumeData"] == PARSED
+    assert len(collection.docs) == 1
+    assert collection.docs[0]["fileHashes"] == ["file-a", "file-b"]
+
+
+class _RacingCollection:
+    """Fails the first upsert as a unique index would when another entry lists the file"""
+
+    def __init__(self, collection):
+        self.collection = collection
+        self.conflicts = 1
+
+    async def update_one(self, *args, **kwargs):
+        if self.conflicts:
+            self.conflicts -= 1
+            raise DuplicateKeyError("E11000 duplicate key error")
+        return await self.collection.update_one(*args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self.collection, name)
+
+
+def test_duplicate_key_moves_the_file_to_the_new_text():
+    collection = FakeDatabase().parsed_uploads
+    store = ParsedUploadStore(collection)
+
+    async def scenario():
+        await store.save("file-a", "Text from the previous extractor", PARSED, "v1")
+        store.collection = _RacingCollection(collection)
+        await store.save("file-a", TEXT, {"summary": "new"}, "v1")
+        return await store.find_by_file("file-a", "v1")
+
+    assert asyncio.run(scenario())["resumeData"] == {"summary": "new"}
+    assert [doc["fileHashes"] for doc in collection.docs] == [[], ["file-a"]]
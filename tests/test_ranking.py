@@ -0,0 +1,66 @@
+from datetime import datetime
+
+import numpy as np
+
+import ranking
+from ranking import FeatureCache, job_keywords, keyword_coverage, similarities, text_features, top_k
+
+JD = ("Backend engineer. Python, Django and PostgreSQL. Python services on AWS. "
+      "Kubernetes deployments. Python testing.")
+
+
+def test_text_features_are_sorted_unique_counts():
+    features = text_features("Python python Django")
+    assert np.all(np.diff(features.indices) > 0)
+    assert features.counts.sum() == 3 + 2  # three words, two bigrams
+    assert features.counts[np.searchsorted(features.indices, ranking.term_index("python"))] == 2
+
+
+def test_similarity_orders_relevant_resumes_first():
+    documents = [
+        text_features("Chef. Pastry, bread and catering."),
+        text_features("Python and Django developer. PostgreSQL, AWS, Kubernetes."),
+        text_features("Python scripting for data analysis."),
+    ]
+    scores = similarities(text_features(JD), documents)
+    assert scores.shape == (3,)
+    assert scores[0] == 0
+    assert scores[1] > scores[2] > 0
+    assert np.all(scores <= 1 + 1e-9)
+    assert top_k(scores, 2) == [1, 2]
+    assert top_k(scores, 10) == [1, 2, 0]
+
+
+def test_similarity_of_empty_inputs_is_zero():
+    empty = text_features("")
+    assert similarities(text_features(JD), [empty, empty]).tolist() == [0, 0]
+    assert similarities(empty, [text_features("Python")]).tolist() == [0]
+    assert similarities(text_features(JD), []).size == 0
+
+
+def test_keyword_coverage_reports_matched_and_missing():
+    keywords = job_keywords(JD)
+    assert all(keyword.term.count(" ") < ranking.RANK_NGRAM for keyword in keywords)
+    score, matched, missing = keyword_coverage(keywords, text_features("Python, Django, PostgreSQL"))
+    assert {"Python", "Django", "PostgreSQL"} <= set(matched)
+    assert "Kubernetes" in missing
+    assert 0 < score < 100
+    assert keyword_coverage([], text_features("Python")) == (0, [], [])
+
+
+def test_feature_cache_invalidates_on_update_and_evicts_by_bytes():
+    one, two = datetime(2026, 1, 1), datetime(2026, 1, 2)
+    features = text_features("Python Django PostgreSQL")
+    cache = FeatureCache(max_bytes=features.nbytes * 2)
+    cache.put("a", one, "A", features)
+    assert cache.get("a", one) == ("A", features)
+    assert cache.get("a", two) is None
+
+    cache.put("b", one, "B", features)
+    cache.get("a", one)
+    cache.put("c", one, "C", features)
+    assert cache.get("b", one) is None
+    assert cache.get("a", one) is not None
+    stats = cache.stats()
+    assert stats["entries"] == 2 and stats["bytes"] <= stats["maxBytes"]
+    assert stats["hits"] == 3 and stats["misses"] == 2
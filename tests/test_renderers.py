@@ -0,0 +1,79 @@
+import dataclasses
+import io
+import re
+import zipfile
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("reportlab")
+pytest.importorskip("docx")
+
+import export_templates
+import renderers
+
+SELECTOR = Path(__file__).resolve().parents[1] / "frontend" / "src" / "components" / "TemplateSelector.js"
+FRONTEND_TEMPLATES = re.findall(r"^\s*id: '([a-z0-9-]+)'", SELECTOR.read_text(encoding="utf-8"), re.MULTILINE)
+
+RESUME = {
+    "personalInfo": {"fullName": "Ada Lovelace", "email": "ada@example.com", "phone": "+44 20 7946 0000",
+                     "location": "London"},
+    "summary": "Analyst & engineer.",
+    "experience": [{"title": "Engineer", "company": "Analytical Engines", "startDate": "2019", "current": True,
+                    "bullets": ["Cut costs by 30%", ""]}],
+    "education": [{"degree": "BSc Mathematics", "school": "UCL", "graduationDate": "2018"}],
+    "skills": ["Python", "Go"],
+    "certifications": [{"name": "CKA", "issuer": "CNCF", "date": "2021"}],
+    "languages": [{"language": "French", "proficiency": "Fluent"}],
+}
+
+
+def test_every_frontend_template_is_registered():
+    assert len(FRONTEND_TEMPLATES) >= 10
+    assert set(FRONTEND_TEMPLATES) <= set(export_templates.template_names())
+
+
+@pytest.mark.parametrize("template", FRONTEND_TEMPLATES)
+def test_every_frontend_template_renders(template):
+    pdf = renderers.render_resume_pdf(RESUME, template)
+    assert pdf.startswith(b"%PDF")
+
+    docx = renderers.render_resume_docx(RESUME, template)
+    with zipfile.ZipFile(io.BytesIO(docx)) as archive:
+        body = archive.read("word/document.xml").decode("utf-8")
+    assert "Ada Lovelace" in body and "Cut costs by 30%" in body
+    title = export_templates.get_template(template).section_titles["experience"]
+    assert title in body
+
+
+def test_fingerprint_follows_the_definition():
+    modern = export_templates.get_template("modern")
+    assert modern.fingerprint != export_templates.get_template("professional").fingerprint
+    assert export_templates.compile_template(modern.definition).fingerprint == modern.fingerprint
+    edited = export_templates.compile_template(dataclasses.replace(modern.definition, accent="#000000"))
+    assert edited.fingerprint != modern.fingerprint
+
+
+def test_export_key_changes_with_renderer_version_and_template(monkeypatch):
+    key = renderers.export_key("pdf", RESUME, template="modern")
+    assert key == renderers.export_key("pdf", RESUME, template="modern")
+    assert key != renderers.export_key("docx", RESUME, template="modern")
+    assert key != renderers.export_key("pdf", RESUME, template="professional")
+    # Unknown names render with the default template, so they share its artifact
+    assert renderers.export_key("pdf", RESUME, template="missing") == \
+        renderers.export_key("pdf", RESUME, template=export_templates.DEFAULT_TEMPLATE)
+
+    monkeypatch.setattr(renderers, "RENDERER_VERSION", renderers.RENDERER_VERSION + "-next")
+    assert renderers.export_key("pdf", RESUME, template="modern") != key
+    monkeypatch.undo()
+
+    modern = export_templates.get_template("modern")
+    edited = export_templates.compile_template(dataclasses.replace(modern.definition, accent="#000000"))
+    monkeypatch.setitem(export_templates._registry, "modern", edited)
+    assert renderers.export_key("pdf", RESUME, template="modern") != key
+
+
+def test_cover_letter_key_has_no_template():
+    request = {"personalInfo": {"fullName": "Ada"}, "content": "Dear team"}
+    assert renderers.export_key("cover_letter_pdf", request, "1 May 2026") != \
+        renderers.export_key("cover_letter_pdf", request, "2 May 2026")
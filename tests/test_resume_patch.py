@@ -0,0 +1,116 @@
+import pytest
+
+from resume_patch import PatchError, PatchNotApplicable, apply, normalise, to_update
+
+
+def _doc():
+    return {
+        "id": "r1",
+        "template": "modern",
+        "resumeData": {
+            "summary": "Engineer",
+            "skills": ["Python", "Go"],
+            "experience": [{"title": "A"}, {"title": "B"}],
+        },
+    }
+
+
+def _patch(*operations):
+    ops = normalise(list(operations))
+    return apply(_doc(), ops), to_update(ops, apply(_doc(), ops))
+
+
+def test_add_at_index_inserts_before_the_element():
+    patched, update = _patch({"op": "add", "path": "/resumeData/experience/1", "value": {"title": "New"}})
+    assert [e["title"] for e in patched["resumeData"]["experience"]] == ["A", "New", "B"]
+    assert update == {"$set": {"resumeData.experience": patched["resumeData"]["experience"]}}
+
+
+def test_add_at_array_length_appends():
+    patched, _ = _patch({"op": "add", "path": "/resumeData/skills/2", "value": "Rust"})
+    assert patched["resumeData"]["skills"] == ["Python", "Go", "Rust"]
+
+
+def test_add_dash_pushes():
+    patched, update = _patch({"op": "add", "path": "/resumeData/skills/-", "value": "Rust"})
+    assert patched["resumeData"]["skills"] == ["Python", "Go", "Rust"]
+    assert update == {"$push": {"resumeData.skills": {"$each": ["Rust"]}}}
+
+
+def test_add_past_the_end_is_rejected():
+    with pytest.raises(PatchNotApplicable):
+        _patch({"op": "add", "path": "/resumeData/skills/3", "value": "Rust"})
+
+
+def test_add_to_object_sets_the_member():
+    patched, update = _patch({"op": "add", "path": "/resumeData/headline", "value": "Hi"})
+    assert patched["resumeData"]["headline"] == "Hi"
+    assert update == {"$set": {"resumeData.headline": "Hi"}}
+
+
+def test_replace_overwrites_and_needs_an_existing_target():
+    patched, update = _patch({"op": "replace", "path": "/resumeData/skills/0", "value": "Java"})
+    assert patched["resumeData"]["skills"] == ["Java", "Go"]
+    assert update == {"$set": {"resumeData.skills.0": "Java"}}
+    with pytest.raises(PatchNotApplicable):
+        _patch({"op": "replace", "path": "/resumeData/skills/2", "value": "Java"})
+    with pytest.raises(PatchNotApplicable):
+        _patch({"op": "replace", "path": "/resumeData/headline", "value": "Hi"})
+
+
+def test_remove_array_element_sets_the_array():
+    patched, update = _patch({"op": "remove", "path": "/resumeData/experience/0"})
+    assert patched["resumeData"]["experience"] == [{"title": "B"}]
+    assert update == {"$set": {"resumeData.experience": [{"title": "B"}]}}
+    with pytest.raises(PatchNotApplicable):
+        _patch({"op": "remove", "path": "/resumeData/experience/5"})
+
+
+def test_remove_member_unsets_it():
+    patched, update = _patch({"op": "remove", "path": "/resumeData/summary"})
+    assert "summary" not in patched["resumeData"]
+    assert update == {"$unset": {"resumeData.summary": ""}}
+
+
+def test_test_operation_guards_the_patch():
+    patched, update = _patch(
+        {"op": "test", "path": "/resumeData/summary", "value": "Engineer"},
+        {"op": "replace", "path": "/resumeData/summary", "value": "Lead"},
+    )
+    assert patched["resumeData"]["summary"] == "Lead"
+    assert update == {"$set": {"resumeData.summary": "Lead"}}
+    with pytest.raises(PatchNotApplicable):
+        _patch({"op": "test", "path": "/resumeData/summary", "value": "Other"})
+
+
+def test_field_diff_format():
+    ops = normalise(set_fields={"resumeData.summary": "New"}, push_fields={"resumeData.skills": "Rust"},
+                    unset_fields=["template"])
+    patched = apply(_doc(), ops)
+    assert patched["resumeData"]["summary"] == "New"
+    assert patched["resumeData"]["skills"][-1] == "Rust"
+    assert "template" not in patched
+    assert to_update(ops, patched) == {
+        "$set": {"resumeData.summary": "New"},
+        "$unset": {"template": ""},
+        "$push": {"resumeData.skills": {"$each": ["Rust"]}},
+    }
+
+
+def test_overlapping_operations_collapse_into_one_set():
+    patched, update = _patch(
+        {"op": "replace", "path": "/resumeData/experience/0/title", "value": "X"},
+        {"op": "remove", "path": "/resumeData/experience/1"},
+    )
+    assert update == {"$set": {"resumeData.experience": [{"title": "X"}]}}
+
+
+def test_malformed_patches_are_rejected():
+    with pytest.raises(PatchError):
+        normalise([{"op": "move", "path": "/resumeData/summary", "from": "/template"}])
+    with pytest.raises(PatchError):
+        normalise([{"op": "add", "path": "/resumeData/summary"}])
+    with pytest.raises(PatchError):
+        normalise([{"op": "replace", "path": "/id", "value": "x"}])
+    with pytest.raises(PatchError):
+        normalise([])
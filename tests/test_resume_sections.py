@@ -0,0 +1,98 @@
+import pytest
+
+from resume_sections import (CHARS_PER_TOKEN, heading_section, merge_results, plan_chunks, segment, split_entries,
+                             split_to_budget)
+
+ID_PREFIXES = {"experience": "exp", "education": "edu", "certifications": "cert", "languages": "lang"}
+
+
+def _job(n, bullets=4):
+    lines = [f"Senior Engineer {n}", f"Company {n} | Jan 20{n:02d} - Dec 20{n + 1:02d}"]
+    lines += [f"• Delivered project {n}.{b} with measurable results across several teams" for b in range(bullets)]
+    return "\n".join(lines)
+
+
+@pytest.mark.parametrize("line, section", [
+    ("WORK EXPERIENCE", "experience"),
+    ("Professional Experience:", "experience"),
+    ("  Education  ", "education"),
+    ("Technical Skills", "skills"),
+    ("Licenses & Certifications", "certifications"),
+    ("Languages", "languages"),
+    ("Professional Summary", "profile"),
+    ("== Publications ==", "other"),
+    ("Experience with Python and Go", None),
+    ("Led the education outreach programme for five years", None),
+    ("", None),
+])
+def test_heading_detection(line, section):
+    assert heading_section(line) == section
+
+
+def test_segment_groups_lines_under_headings():
+    text = "Ada Lovelace\nada@example.com\n\nSUMMARY\nAnalyst.\n\nExperience\nEngineer\n\nReferences\nOn request"
+    assert segment(text) == {
+        "contact": "Ada Lovelace\nada@example.com",
+        "profile": "Analyst.",
+        "experience": "Engineer",
+        "other": "On request",
+    }
+
+
+def test_entries_split_after_bullets_without_blank_lines():
+    text = "\n".join(_job(n) for n in range(1, 4))
+    assert split_entries(text) == [_job(1), _job(2), _job(3)]
+
+
+def test_description_paragraph_stays_with_its_entry():
+    entry = "Engineer\nAcme, 2019 - Present\n\nOwned the billing platform end to end.\n\nKey work:\n• Migrated to Postgres"
+    assert split_entries(entry + "\n\n" + _job(5)) == [entry, _job(5)]
+
+
+def test_budget_split_never_cuts_an_entry():
+    jobs = [_job(n) for n in range(1, 13)]
+    text = "\n".join(jobs)
+    max_tokens = len(jobs[0]) * 3 // CHARS_PER_TOKEN
+    chunks = split_to_budget(text, max_tokens)
+
+    assert len(chunks) > 1
+    assert all(len(chunk) <= max_tokens * CHARS_PER_TOKEN for chunk in chunks)
+    assert [entry for chunk in chunks for entry in split_entries(chunk)] == jobs
+
+
+def test_oversized_entry_is_wrapped_at_line_breaks():
+    entry = _job(1, bullets=40)
+    chunks = split_to_budget(entry, 200 // CHARS_PER_TOKEN)
+    assert all(len(chunk) <= 200 for chunk in chunks)
+    assert "\n".join(chunks) == entry
+
+
+def test_plan_chunks_needs_structure():
+    assert plan_chunks("Just a paragraph about me.", 100) is None
+    text = "Ada\n\nExperience\n" + "\n".join(_job(n) for n in range(1, 9)) + "\n\nEducation\nBSc, 2010\n\nSkills\nPython, Go"
+    chunks = plan_chunks(text, 150)
+    sections = [section for section, _ in chunks]
+    assert sections[0] == "profile" and sections[-2:] == ["education", "skills"]
+    assert sections.count("experience") > 1
+
+
+def test_merge_results_in_order_with_sequential_ids():
+    chunks = [("profile", ""), ("experience", ""), ("experience", ""), ("skills", ""), ("skills", "")]
+    results = [
+        {"personalInfo": {"fullName": "Ada"}, "summary": "Analyst"},
+        {"experience": [{"title": "A"}, {"title": "B"}]},
+        {"experience": [{"title": "C", "id": "exp1"}]},
+        {"skills": ["Python", "Go"]},
+        {"skills": ["python", "SQL", 3]},
+    ]
+    merged = merge_results(chunks, results, ID_PREFIXES)
+    assert merged["personalInfo"] == {"fullName": "Ada"} and merged["summary"] == "Analyst"
+    assert [(item["title"], item["id"]) for item in merged["experience"]] == [("A", "exp1"), ("B", "exp2"), ("C", "exp3")]
+    assert merged["skills"] == ["Python", "Go", "SQL"]
+    assert merged["education"] == []
+
+
+@pytest.mark.parametrize("result", [["not", "an", "object"], {"experience": ["text entry"]}, {"experience": "x"}])
+def test_merge_results_rejects_malformed_replies(result):
+    with pytest.raises(ValueError):
+        merge_results([("experience", "")], [result], ID_PREFIXES)
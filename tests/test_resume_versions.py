@@ -0,0 +1,131 @@
+import asyncio
+import copy
+from datetime import datetime
+
+import pytest
+
+pytest.importorskip("pymongo")
+
+from benchmarks.fakes import FakeDatabase
+from resume_versions import DELTA, SNAPSHOT, VersionError, VersionStore, apply, diff
+
+NOW = datetime(2026, 1, 1)
+
+
+def _resume(**changes):
+    doc = {
+        "resumeData": {
+            "personalInfo": {"fullName": "Ada Lovelace", "email": "ada@example.com"},
+            "summary": "Analyst",
+            "experience": [{"id": "exp1", "company": "A", "bullets": ["one", "two"]},
+                           {"id": "exp2", "company": "B", "bullets": []}],
+            "skills": ["Python", "SQL"],
+        },
+        "template": "modern",
+    }
+    doc["resumeData"].update(changes)
+    return doc
+
+
+@pytest.mark.parametrize("edit", [
+    lambda d: d["resumeData"].update(summary="Engineer"),
+    lambda d: d["resumeData"]["skills"].append("Go"),
+    lambda d: d["resumeData"]["skills"].insert(0, "Go"),
+    lambda d: d["resumeData"]["experience"].pop(0),
+    lambda d: d["resumeData"]["experience"][1]["bullets"].extend(["x", "y"]),
+    lambda d: d["resumeData"]["personalInfo"].pop("email"),
+    lambda d: d["resumeData"].update(skills="Python, SQL"),
+    lambda d: d.update(template="classic"),
+])
+def test_diff_apply_round_trip(edit):
+    old = _resume()
+    new = copy.deepcopy(old)
+    edit(new)
+    delta = diff(old, new)
+    assert delta
+    assert apply(old, delta) == new
+    assert old == _resume()
+
+
+def test_diff_of_equal_content_is_empty_and_edits_stay_small():
+    assert diff(_resume(), _resume()) == []
+    new = _resume()
+    new["resumeData"]["experience"][0]["bullets"][1] = "three"
+    assert diff(_resume(), new) == [
+        {"op": "set", "path": ["resumeData", "experience", 0, "bullets", 1], "value": "three"}
+    ]
+
+
+def test_apply_rejects_paths_that_do_not_exist():
+    with pytest.raises(VersionError):
+        apply(_resume(), [{"op": "set", "path": ["resumeData", "missing", "x"], "value": 1}])
+
+
+def _save_all(store, versions):
+    async def run():
+        previous = None
+        for number, content in enumerate(versions, start=1):
+            delta = diff(previous, content) if previous is not None else []
+            await store.record("r1", number, previous, content, delta, NOW)
+            previous = content
+    asyncio.run(run())
+
+
+def _entries(db):
+    return sorted((doc["version"], doc["kind"], doc["base"]) for doc in db.resume_versions.docs)
+
+
+def _history(count):
+    return [_resume(summary=f"Version {n}", skills=["Python"] * (n % 3)) for n in range(1, count + 1)]
+
+
+def test_versions_replay_from_snapshots_every_interval():
+    db = FakeDatabase()
+    store = VersionStore(db.resume_versions, snapshot_every=3)
+    history = _history(8)
+    _save_all(store, history)
+
+    kinds = {version: (kind, base) for version, kind, base in _entries(db)}
+    assert kinds == {1: (SNAPSHOT, 1), 2: (DELTA, 1), 3: (DELTA, 1), 4: (SNAPSHOT, 4),
+                     5: (DELTA, 4), 6: (DELTA, 4), 7: (SNAPSHOT, 7), 8: (DELTA, 7)}
+    for number, content in enumerate(history, start=1):
+        assert asyncio.run(store.fetch("r1", number))["content"] == content
+    assert asyncio.run(store.fetch("r1", 9)) is None
+
+
+def test_gap_in_history_is_anchored_on_a_snapshot():
+    db = FakeDatabase()
+    store = VersionStore(db.resume_versions, snapshot_every=50)
+    one, two, three = _history(3)
+    # Version 1 predates history, so version 2 arrives with nothing to chain to
+    asyncio.run(store.record("r1", 2, one, two, diff(one, two), NOW))
+    asyncio.run(store.record("r1", 3, two, three, diff(two, three), NOW))
+
+    assert _entries(db) == [(1, SNAPSHOT, 1), (2, DELTA, 1), (3, DELTA, 1)]
+    assert asyncio.run(store.fetch("r1", 3))["content"] == three
+
+
+def test_saves_recorded_out_of_order_still_replay():
+    db = FakeDatabase()
+    store = VersionStore(db.resume_versions, snapshot_every=50)
+    one, two, three, four = _history(4)
+    _save_all(store, [one, two])
+
+    async def concurrent():
+        # Version 4's record lands before version 3's
+        await store.record("r1", 4, three, four, diff(three, four), NOW)
+        await store.record("r1", 3, two, three, diff(two, three), NOW)
+    asyncio.run(concurrent())
+
+    assert _entries(db) == [(1, SNAPSHOT, 1), (2, DELTA, 1), (3, SNAPSHOT, 3), (4, DELTA, 3)]
+    for number, content in enumerate([one, two, three, four], start=1):
+        assert asyncio.run(store.fetch("r1", number))["content"] == content
+
+
+def test_incomplete_history_raises():
+    db = FakeDatabase()
+    store = VersionStore(db.resume_versions, snapshot_every=50)
+    _save_all(store, _history(3))
+    db.resume_versions.docs = [doc for doc in db.resume_versions.docs if doc["version"] != 2]
+    with pytest.raises(VersionError):
+        asyncio.run(store.fetch("r1", 3))
@@ -0,0 +1,95 @@
+import asyncio
+
+import pytest
+
+from single_flight import SingleFlight
+
+
+def test_concurrent_callers_share_one_call():
+    flights = SingleFlight()
+    calls = []
+
+    async def work(value):
+        calls.append(value)
+        await asyncio.sleep(0.01)
+        return {"value": value}
+
+    async def run():
+        return await asyncio.gather(*[flights.run("ats", "same", work, 1) for _ in range(5)],
+                                    flights.run("ats", "other", work, 2))
+
+    results = asyncio.run(run())
+    assert calls == [1, 2]
+    assert results[:5] == [{"value": 1}] * 5 and results[5] == {"value": 2}
+    assert results[0] is results[4]
+    assert flights.stats() == {"inFlight": 0, "endpoints": {"ats": {"calls": 2, "coalesced": 4}}}
+
+
+def test_exceptions_reach_every_caller_and_are_not_remembered():
+    flights = SingleFlight()
+    attempts = []
+
+    async def fail():
+        attempts.append(1)
+        await asyncio.sleep(0.01)
+        raise ValueError("upstream failed")
+
+    async def run():
+        results = await asyncio.gather(*[flights.run("parse", "k", fail) for _ in range(3)],
+                                       return_exceptions=True)
+        assert all(isinstance(result, ValueError) for result in results)
+        with pytest.raises(ValueError):
+            await flights.run("parse", "k", fail)
+
+    asyncio.run(run())
+    assert len(attempts) == 2
+
+
+def test_one_caller_leaving_does_not_cancel_the_others():
+    flights = SingleFlight()
+    finished = []
+
+    async def work():
+        await asyncio.sleep(0.05)
+        finished.append(True)
+        return "done"
+
+    async def run():
+        leaving = asyncio.ensure_future(flights.run("skills", "k", work))
+        staying = asyncio.ensure_future(flights.run("skills", "k", work))
+        await asyncio.sleep(0.01)
+        leaving.cancel()
+        assert await staying == "done"
+        assert leaving.cancelled()
+
+    asyncio.run(run())
+    assert finished == [True]
+
+
+def test_shared_call_is_cancelled_when_every_caller_leaves():
+    flights = SingleFlight()
+    cancelled = []
+
+    async def work():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+
+    async def run():
+        callers = [asyncio.ensure_future(flights.run("ats", "k", work)) for _ in range(2)]
+        await asyncio.sleep(0.01)
+        for caller in callers:
+            caller.cancel()
+        await asyncio.gather(*callers, return_exceptions=True)
+        await asyncio.sleep(0)
+        assert flights.stats()["inFlight"] == 0
+
+        # A later caller starts a fresh call rather than joining the cancelled one
+        async def quick():
+            return "fresh"
+        assert await flights.run("ats", "k", quick) == "fresh"
+
+    asyncio.run(run())
+    assert cancelled == [True]
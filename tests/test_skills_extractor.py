@@ -0,0 +1,27 @@
+from skills_extractor import TAXONOMY, candidate_phrases
+
+
+def test_taxonomy_matches_aliases_to_canonical_skills():
+    skills = TAXONOMY.extract("We use Python, React.js, k8s and PostgreSQL; Python again.")
+    assert [skill.name for skill in skills] == ["Python", "React", "Kubernetes", "PostgreSQL"]
+    assert TAXONOMY.canonical("k8s") == "kubernetes"
+
+
+def test_candidates_skip_taxonomy_matches_and_sentence_starts():
+    text = "We use Python and Google Tag Manager. Vue3 is nice; Strong HIPAA knowledge.\nPlease apply."
+    assert candidate_phrases(text) == ["Google Tag Manager", "Vue3", "HIPAA"]
+
+
+def test_capitalised_runs_break_on_punctuation():
+    assert candidate_phrases("tools like Google Tag Manager, Adobe Analytics") == ["Google Tag Manager", "Adobe Analytics"]
+
+
+def test_candidates_are_limited():
+    text = " ".join(f"Tool{i}" for i in range(100))
+    assert len(candidate_phrases(text, limit=5)) == 5
+
+
+def test_long_job_description_is_scanned_once():
+    # Tens of KB of text; the old per-token prefix scan made this quadratic
+    text = "Experience with Python, Kubernetes and Google Tag Manager. We value HIPAA and Vue3. " * 300
+    assert candidate_phrases(text) == ["Google Tag Manager", "HIPAA", "Vue3"]
@@ -0,0 +1,92 @@
+import json
+
+import pytest
+
+from streaming import DelimitedStream, JsonSectionStream, sse_event
+
+PARSED = {
+    "personalInfo": {"fullName": "Ada \"AL\" Lovelace", "email": "ada@example.com"},
+    "summary": "Builds {things}, [carefully]: fast.",
+    "experience": [
+        {"title": "Engineer", "bullets": ["Cut costs, 30%", "Led {team}"]},
+        {"title": "Analyst", "bullets": []},
+    ],
+    "skills": ["Python", "C++", "\\escaped"],
+    "languages": [],
+}
+
+
+def _feed(stream, text, size):
+    events = []
+    for start in range(0, len(text), size):
+        events.extend(stream.feed(text[start:start + size]))
+    return events
+
+
+@pytest.mark.parametrize("size", [1, 3, 7, 10_000])
+def test_sections_are_emitted_as_they_complete_whatever_the_chunking(size):
+    text = "```json\n" + json.dumps(PARSED, indent=2) + "\n```"
+    stream = JsonSectionStream()
+    events = _feed(stream, text, size)
+
+    assert stream.complete
+    assert [(kind, key) for kind, key, _ in events] == [
+        ("value", "personalInfo"), ("value", "summary"),
+        ("item", "experience"), ("item", "experience"), ("value", "experience"),
+        ("item", "skills"), ("item", "skills"), ("item", "skills"), ("value", "skills"),
+        ("value", "languages"),
+    ]
+    values = {key: value for kind, key, value in events if kind == "value"}
+    assert values == PARSED
+    assert [value for kind, key, value in events if kind == "item" and key == "experience"] == PARSED["experience"]
+
+
+def test_items_are_emitted_before_the_array_closes():
+    stream = JsonSectionStream()
+    assert stream.feed('{"experience": [{"title": "A"}, ') == [("item", "experience", {"title": "A"})]
+    assert stream.feed('{"title": "B"}') == []
+    assert stream.feed("]") == [("item", "experience", {"title": "B"})]
+    assert not stream.complete
+    assert stream.feed("}") == [("value", "experience", [{"title": "A"}, {"title": "B"}])]
+    assert stream.complete
+    assert stream.feed(', "ignored": 1}') == []
+
+
+@pytest.mark.parametrize("text", ["{}", "```json\n{ }\n```", '{"skills": []}'])
+def test_empty_object_and_array_complete_without_values(text):
+    stream = JsonSectionStream()
+    events = _feed(stream, text, 1)
+    assert stream.complete
+    assert events == ([] if "skills" not in text else [("value", "skills", [])])
+
+
+def test_consumed_text_is_dropped_but_text_stays_whole():
+    text = "```json\n" + json.dumps(PARSED, indent=2) + "\n```"
+    stream = JsonSectionStream()
+    buffered = []
+    for start in range(0, len(text), 5):
+        stream.feed(text[start:start + 5])
+        buffered.append(len(stream._buffer))
+    # Only the value being read is held, never the whole reply
+    assert max(buffered) < len(text) // 2
+    assert buffered[-1] == 0
+    assert stream.text == text
+
+
+def test_delimited_stream_holds_back_a_split_delimiter():
+    stream = DelimitedStream("\n---JSON---\n")
+    forwarded = [stream.feed(chunk) for chunk in ["Dear team,\nI am", " writing.\n--", "-JSON", "---\n{\"a\"", ": 1}"]]
+    assert forwarded == ["Dear team,\nI am", " writing.", "", "", ""]
+    assert stream.finish() == ("", '{"a": 1}')
+    assert stream.body == "Dear team,\nI am writing."
+
+
+def test_delimited_stream_without_delimiter_flushes_everything():
+    stream = DelimitedStream("\n---JSON---\n")
+    assert stream.feed("Plain text\n-") == "Plain text"
+    assert stream.finish() == ("\n-", "")
+    assert stream.body == "Plain text\n-"
+
+
+def test_sse_event_format():
+    assert sse_event("summary", {"summary": "Café"}) == 'event: summary\ndata: {"summary": "Café"}\n\n'
@@ -0,0 +1,121 @@
+import asyncio
+import io
+import os
+import zipfile
+
+import pytest
+
+pytest.importorskip("fastapi")
+
+import uploads
+from fastapi import HTTPException
+from uploads import UploadLimitMiddleware, UploadTooLarge, detect_kind, spool, spool_bytes, unpack_zip
+
+
+class _File:
+    def __init__(self, data: bytes, filename: str = "cv.pdf"):
+        self._data = io.BytesIO(data)
+        self.filename = filename
+
+    async def read(self, size: int = -1) -> bytes:
+        return self._data.read(size)
+
+
+def _zip(entries) -> bytes:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as zf:
+        for name, data in entries:
+            zf.writestr(name, data)
+    return buffer.getvalue()
+
+
+def test_detect_kind_goes_by_content(tmp_path):
+    docx = _zip([("[Content_Types].xml", "<x/>"), ("word/document.xml", "<w/>")])
+    cases = {
+        "a.pdf": b"%PDF-1.7\n...",
+        "b.docx": docx,
+        "c.zip": _zip([("one.pdf", b"%PDF-1.4 stored")]),
+        "d.pdf": b"plain text pretending to be a PDF",
+    }
+    kinds = {}
+    for name, data in cases.items():
+        path = tmp_path / name
+        path.write_bytes(data)
+        kinds[name] = detect_kind(str(path))
+    assert kinds == {"a.pdf": "pdf", "b.docx": "docx", "c.zip": "zip", "d.pdf": None}
+
+
+def test_spool_hashes_and_caps_size(tmp_path):
+    upload = asyncio.run(spool(_File(b"%PDF-1.4 data"), 100, str(tmp_path)))
+    assert upload.kind == "pdf" and upload.size == 13 and len(upload.sha256) == 64
+    assert upload.read_bytes() == b"%PDF-1.4 data"
+    upload.remove()
+    assert not os.listdir(tmp_path)
+
+    with pytest.raises(UploadTooLarge):
+        asyncio.run(spool(_File(b"x" * 200), 100, str(tmp_path)))
+    assert not os.listdir(tmp_path)
+
+
+def test_unpack_zip_spools_entries_and_marks_oversized_ones(tmp_path):
+    archive = spool_bytes(_zip([("a.pdf", b"%PDF-1.4 a"), ("big.pdf", b"%PDF" + b"x" * 100), ("__MACOSX/a", b"")]),
+                          directory=str(tmp_path))
+    entries = unpack_zip(archive, 50, str(tmp_path))
+    assert [(name, upload is not None) for name, upload in entries] == [("a.pdf", True), ("big.pdf", False)]
+    assert entries[0][1].kind == "pdf"
+
+
+def test_unpack_zip_rejects_too_many_entries_before_writing(tmp_path):
+    spool_dir = tmp_path / "spool"
+    spool_dir.mkdir()
+    archive = spool_bytes(_zip([(f"{i}.pdf", b"%PDF-1.4") for i in range(20)]), directory=str(tmp_path))
+    with pytest.raises(HTTPException) as raised:
+        unpack_zip(archive, 1000, str(spool_dir), max_entries=10)
+    assert raised.value.status_code == 413
+    assert not os.listdir(spool_dir)
+
+
+def test_unpack_zip_caps_total_unpacked_bytes(tmp_path):
+    spool_dir = tmp_path / "spool"
+    spool_dir.mkdir()
+    # Highly compressible, like a zip bomb kept under the per-file cap
+    archive = spool_bytes(_zip([(f"{i}.pdf", b"\0" * 10_000) for i in range(10)]), directory=str(tmp_path))
+    with pytest.raises(UploadTooLarge):
+        unpack_zip(archive, 20_000, str(spool_dir), max_total_bytes=50_000)
+    assert not os.listdir(spool_dir)
+
+
+def _http_scope(path: str, headers=()):
+    return {"type": "http", "path": path, "headers": list(headers)}
+
+
+def test_middleware_rejects_declared_oversize_body():
+    sent = []
+
+    async def app(scope, receive, send):
+        raise AssertionError("app must not run")
+
+    async def send(message):
+        sent.append(message)
+
+    middleware = UploadLimitMiddleware(app, {"/upload": 10})
+    asyncio.run(middleware(_http_scope("/upload", [(b"content-length", b"11")]), None, send))
+    assert sent[0]["status"] == 413
+
+
+def test_middleware_removes_spooled_files_even_if_no_response_starts(tmp_path):
+    spooled = []
+
+    async def app(scope, receive, send):
+        spooled.append(spool_bytes(b"%PDF-1.4", directory=str(tmp_path)))
+        # e.g. the client went away before the streamed response began
+        raise asyncio.CancelledError()
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    middleware = UploadLimitMiddleware(app, {"/upload": 1000})
+    with pytest.raises(asyncio.CancelledError):
+        asyncio.run(middleware(_http_scope("/upload"), receive, None))
+    assert spooled and not os.path.exists(spooled[0].path)
+    assert uploads._request_spools.get() is None
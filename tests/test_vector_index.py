@@ -0,0 +1,167 @@
+import asyncio
+import threading
+
+import numpy as np
+import pytest
+
+import vector_index
+from benchmarks.fakes import FakeDatabase
+from vector_index import ResumeSearch, VectorIndex, embed_text
+
+
+def _vector(seed: int) -> np.ndarray:
+    vector = np.random.default_rng(seed).standard_normal(vector_index.DIM).astype(np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+def test_embeddings_are_unit_length_and_similar_for_similar_text():
+    a = embed_text("Python developer building Django services on AWS")
+    b = embed_text("Django and Python engineer, AWS services")
+    c = embed_text("Registered nurse in paediatric intensive care")
+    assert np.isclose(np.linalg.norm(a), 1.0)
+    assert a @ b > a @ c
+
+
+def test_upsert_delete_search_and_reopen(tmp_path):
+    index = VectorIndex(tmp_path / "index")
+    for i in range(20):
+        index.upsert(f"r{i}", _vector(i))
+    index.upsert("r3", _vector(100))
+    assert index.delete("r4")
+    assert not index.delete("missing")
+
+    assert index.search(_vector(5), k=1)[0][0] == "r5"
+    assert index.search(_vector(100), k=1)[0][0] == "r3"
+    assert "r4" not in {resume_id for resume_id, _ in index.search(_vector(4), k=20)}
+    index.close()
+
+    reopened = VectorIndex(tmp_path / "index")
+    assert reopened.stats()["live"] == 19
+    assert reopened.search(_vector(100), k=1)[0][0] == "r3"
+    assert reopened.search(_vector(7), k=1)[0][0] == "r7"
+    reopened.close()
+
+
+def test_compact_keeps_live_rows_only(tmp_path):
+    index = VectorIndex(tmp_path / "index")
+    for i in range(30):
+        index.upsert(f"r{i}", _vector(i))
+    for i in range(10):
+        index.delete(f"r{i}")
+    index.compact()
+    assert index.stats()["rows"] == 20 and index.stats()["dead"] == 0
+    assert index.search(_vector(15), k=1)[0][0] == "r15"
+    index.close()
+    reopened = VectorIndex(tmp_path / "index")
+    assert reopened.stats()["live"] == 20
+    reopened.close()
+
+
+def test_compact_copies_without_the_lock_and_keeps_writes_made_meanwhile(tmp_path, monkeypatch):
+    index = VectorIndex(tmp_path / "index")
+    for i in range(10):
+        index.upsert(f"r{i}", _vector(i))
+    index.delete("r0")
+    original_path = index._path
+    lock_free = []
+
+    def path_during_copy(name):
+        if name == "assign.i32.tmp" and not lock_free:
+            probe = threading.Thread(target=lambda: lock_free.append(index._lock.acquire(timeout=0)) or index._lock.release())
+            probe.start()
+            probe.join()
+            # Writes landing while the copy is in progress
+            index.upsert("r1", _vector(101))
+            index.delete("r2")
+            index.upsert("new", _vector(200))
+        return original_path(name)
+
+    monkeypatch.setattr(index, "_path", path_during_copy)
+    index.compact()
+    monkeypatch.undo()
+
+    assert lock_free == [True]
+    ids = set(index.rows)
+    assert ids == {f"r{i}" for i in range(3, 10)} | {"r1", "new"}
+    assert index.search(_vector(101), k=1)[0][0] == "r1"
+    assert index.search(_vector(200), k=1)[0][0] == "new"
+    index.close()
+    assert set(VectorIndex(tmp_path / "index").rows) == ids
+
+
+def test_train_assigns_rows_and_probed_search_finds_them(tmp_path, monkeypatch):
+    monkeypatch.setattr(vector_index, "IVF_MIN_ROWS", 50)
+    index = VectorIndex(tmp_path / "index")
+    for i in range(200):
+        index.upsert(f"r{i}", _vector(i))
+    assert index.needs_training()
+    index.train()
+    assert index.centroids is not None
+    assert sum(len(rows) for rows in index._postings) == 200
+    index.upsert("late", _vector(500))
+    assert index.search(_vector(500), k=1, nprobe=len(index.centroids))[0][0] == "late"
+    assert index.search(_vector(42), k=1, nprobe=len(index.centroids))[0][0] == "r42"
+    index.close()
+
+
+class _FailingCollection:
+    def find(self, *args, **kwargs):
+        raise RuntimeError("database unavailable")
+
+
+def test_failed_rebuild_is_logged_and_cleans_up(tmp_path, caplog):
+    async def scenario():
+        search = ResumeSearch(_FailingCollection(), tmp_path / "index")
+        search.index.upsert("kept", _vector(1))
+        search.start_rebuild()
+        with pytest.raises(RuntimeError):
+            await search._rebuild
+        await asyncio.sleep(0)
+        return search
+
+    search = asyncio.run(scenario())
+    assert not (tmp_path / "index.rebuild").exists()
+    assert not search.rebuilding
+    assert "kept" in search.index.rows
+    assert "rebuild failed" in caplog.text
+
+
+def test_rebuild_reembeds_stored_resumes(tmp_path):
+    async def scenario():
+        db = FakeDatabase()
+        await db.resumes.insert_one({"id": "a", "resumeData": {"summary": "Python Django developer"}})
+        await db.resumes.insert_one({"id": "b", "resumeData": {"summary": "Paediatric nurse"}})
+        search = ResumeSearch(db.resumes, tmp_path / "index")
+        await search.rebuild()
+        return search, await search.search("Django developer", 1)
+
+    search, hits = asyncio.run(scenario())
+    assert set(search.index.rows) == {"a", "b"}
+    assert hits[0][0] == "a"
+    assert not (tmp_path / "index.rebuild").exists()
+
+
+def test_writes_during_a_rebuild_reach_the_new_index(tmp_path):
+    async def scenario():
+        db = FakeDatabase()
+        await db.resumes.insert_one({"id": "a", "resumeData": {"summary": "Python Django developer"}})
+        await db.resumes.insert_one({"id": "b", "resumeData": {"summary": "Paediatric nurse"}})
+        search = ResumeSearch(db.resumes, tmp_path / "index")
+        await search.upsert("b", {"summary": "Paediatric nurse"})
+        search.start_rebuild()
+        await search.upsert("c", {"summary": "Rust systems programmer"})
+        await search.delete("b")
+        await search._rebuild
+        return search, await search.search("Rust programmer", 1)
+
+    search, hits = asyncio.run(scenario())
+    assert set(search.index.rows) == {"a", "c"}
+    assert hits[0][0] == "c"
+
+
+def test_second_process_cannot_open_the_same_index(tmp_path):
+    search = ResumeSearch(FakeDatabase().resumes, tmp_path / "index")
+    with pytest.raises(RuntimeError, match="one server worker"):
+        ResumeSearch(FakeDatabase().resumes, tmp_path / "index")
+    search.close()
+    ResumeSearch(FakeDatabase().resumes, tmp_path / "index").close()
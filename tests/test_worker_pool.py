@@ -0,0 +1,102 @@
+import asyncio
+import os
+import time
+
+import pytest
+
+from worker_pool import WorkerPool, WorkerPoolBusy, WorkerPoolUnavailable
+
+
+# Module-level so spawned workers can import them
+
+
+def sleep_and_return(seconds: float, value):
+    time.sleep(seconds)
+    return value
+
+
+def crash():
+    os._exit(1)
+
+
+def crash_once(flag_path: str):
+    if not os.path.exists(flag_path):
+        open(flag_path, "w").close()
+        os._exit(1)
+    return "recovered"
+
+
+def test_runs_jobs_in_worker_processes():
+    async def scenario():
+        pool = WorkerPool("test", max_workers=2)
+        try:
+            return await asyncio.gather(*[pool.run(sleep_and_return, 0, i) for i in range(4)]), pool.stats()
+        finally:
+            pool.shutdown()
+
+    results, stats = asyncio.run(scenario())
+    assert results == [0, 1, 2, 3]
+    assert stats["completed"] == 4
+
+
+def test_timeout_does_not_fail_jobs_running_alongside():
+    async def scenario():
+        pool = WorkerPool("test", max_workers=2, job_timeout=30)
+        try:
+            # Start both workers before timing anything
+            await asyncio.gather(pool.run(sleep_and_return, 0, None), pool.run(sleep_and_return, 0, None))
+            healthy = asyncio.create_task(pool.run(sleep_and_return, 1.0, "ok"))
+            with pytest.raises(asyncio.TimeoutError):
+                await pool.run(sleep_and_return, 10, "stuck", timeout=0.3)
+            assert pool.stats()["retiredExecutors"] == 1
+            # New work goes to fresh workers while the old ones finish
+            assert await pool.run(sleep_and_return, 0, "fresh") == "fresh"
+            assert await healthy == "ok"
+            await asyncio.sleep(0)
+            return pool.stats()
+        finally:
+            pool.shutdown()
+
+    stats = asyncio.run(scenario())
+    assert stats["retiredExecutors"] == 0
+    assert stats["timedOut"] == 1 and stats["failed"] == 0
+
+
+def test_crashed_worker_is_retried_once(tmp_path):
+    async def scenario():
+        pool = WorkerPool("test", max_workers=1)
+        try:
+            return await pool.run(crash_once, str(tmp_path / "crashed"))
+        finally:
+            pool.shutdown()
+
+    assert asyncio.run(scenario()) == "recovered"
+
+
+def test_repeated_crash_is_reported_as_unavailable():
+    async def scenario():
+        pool = WorkerPool("test", max_workers=1)
+        try:
+            with pytest.raises(WorkerPoolUnavailable):
+                await pool.run(crash)
+            # The pool keeps working afterwards
+            return await pool.run(sleep_and_return, 0, "ok")
+        finally:
+            pool.shutdown()
+
+    assert asyncio.run(scenario()) == "ok"
+
+
+def test_rejects_work_beyond_the_queue():
+    async def scenario():
+        pool = WorkerPool("test", max_workers=1, max_queue=0)
+        try:
+            running = asyncio.create_task(pool.run(sleep_and_return, 0.5, None))
+            await asyncio.sleep(0)
+            with pytest.raises(WorkerPoolBusy):
+                await pool.run(sleep_and_return, 0, None)
+            await running
+        finally:
+            pool.shutdown()
+
+    asyncio.run(scenario())